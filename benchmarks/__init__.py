@@ -0,0 +1,19 @@
+"""
+Benchmark suite of the `balderhub-data` package.
+
+The benchmarks are not part of the distributed package. The suite `startup` measures import times, class creation,
+factory generation and environment construction. The suite `micro` measures the hot paths of data items,
+collections and unordered lists for different data sizes and reports the throughput, the latency percentiles (per
+operation) and the peak memory. Run them from the root directory of the repository:
+
+.. code-block:: none
+
+    # execute all benchmarks and store the results
+    PYTHONPATH=src python -m benchmarks run --output results.json
+
+    # execute the micro benchmarks of the hot paths with specific data sizes
+    PYTHONPATH=src python -m benchmarks run --suite micro --sizes 10,1000,1000000 --seed 1
+
+    # compare the results with a baseline - exits with code 1 if a benchmark regressed
+    python -m benchmarks compare baseline.json results.json --threshold 0.2
+"""
@@ -0,0 +1,83 @@
+from __future__ import annotations
+from typing import Optional
+import argparse
+import sys
+
+from ._core import BENCHMARKS, BenchmarkContext, compare_results, load_results, run_benchmarks, save_results
+
+#: all modules that register benchmarks - they are imported on demand, because they import the package itself
+BENCHMARK_MODULES = ['startup', 'micro']
+
+
+def _import_benchmark_modules() -> None:
+    for cur_module in BENCHMARK_MODULES:
+        __import__(f'{__package__}.{cur_module}')
+
+
+def _parse_sizes(value: str) -> list[int]:
+    sizes = [int(cur_size) for cur_size in value.split(',') if cur_size.strip()]
+    if not sizes or any(cur_size < 1 for cur_size in sizes):
+        raise argparse.ArgumentTypeError('sizes need to be positive integers')
+    return sizes
+
+
+def _run(args: argparse.Namespace) -> int:
+    _import_benchmark_modules()
+    unknown_suites = set(args.suite or []) - set(BENCHMARKS.keys())
+    if unknown_suites:
+        print(f'unknown suites: {", ".join(sorted(unknown_suites))}', file=sys.stderr)
+        return 2
+    context = BenchmarkContext(repeat=args.repeat, seed=args.seed, trace_memory=not args.no_memory)
+    results = run_benchmarks(context, sizes=args.sizes, suites=args.suite, name_filter=args.filter)
+    if args.output:
+        save_results(results, args.output)
+        print(f'results were written to `{args.output}`')
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    comparison = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+    regressions = 0
+    for cur_name, cur_baseline, cur_current, cur_change in comparison:
+        is_regression = cur_change > args.threshold
+        regressions += is_regression
+        print(f"{'REGRESSION' if is_regression else 'ok':<10} {cur_name:<80} {cur_baseline * 1000:10.3f}ms -> "
+              f"{cur_current * 1000:10.3f}ms ({cur_change:+.1%})")
+    print(f'{regressions} of {len(comparison)} benchmarks regressed by more than {args.threshold:.0%}')
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Entry point of the benchmark command line interface.
+
+    :param argv: the command line arguments (uses `sys.argv` if None)
+    :return: the exit code
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='benchmarks of balderhub-data')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='executes the benchmarks')
+    run_parser.add_argument('--suite', action='append', help='only run this suite (can be given multiple times)')
+    run_parser.add_argument('--filter', help='only run benchmarks that contain this string in their name')
+    run_parser.add_argument('--repeat', type=int, default=5, help='number of repetitions of every benchmark')
+    run_parser.add_argument('--sizes', type=_parse_sizes, default=None,
+                            help='comma separated data sizes of the sized benchmarks (f.e. `10,1000,1000000`)')
+    run_parser.add_argument('--seed', type=int, default=0, help='seed of the generated benchmark data')
+    run_parser.add_argument('--no-memory', action='store_true', help='do not measure the peak memory')
+    run_parser.add_argument('--output', help='path of the JSON file the results are written to')
+    run_parser.set_defaults(func=_run)
+
+    compare_parser = subparsers.add_parser('compare', help='compares a result file with a baseline')
+    compare_parser.add_argument('baseline', help='path of the JSON result file of the baseline')
+    compare_parser.add_argument('current', help='path of the JSON result file that should be checked')
+    compare_parser.add_argument('--threshold', type=float, default=0.2,
+                                help='allowed relative slowdown of the median (default: 0.2 = 20%%)')
+    compare_parser.set_defaults(func=_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
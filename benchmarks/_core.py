@@ -0,0 +1,277 @@
+from __future__ import annotations
+from typing import Any, Callable, Optional, Union
+import dataclasses
+import datetime
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+#: the data sizes the sized benchmarks are executed with, if no sizes are provided
+DEFAULT_SIZES = [10, 1000, 100000]
+
+
+@dataclasses.dataclass
+class BenchmarkContext:
+    """
+    Settings a benchmark function is executed with.
+    """
+    #: number of measured repetitions
+    repeat: int = 5
+    #: the data size (number of items / operations) - only used by sized benchmarks
+    size: int = 1
+    #: seed for the generation of the benchmark data
+    seed: int = 0
+    #: True if the peak memory should be measured (with an additional traced execution)
+    trace_memory: bool = True
+
+
+@dataclasses.dataclass
+class Measurement:
+    """
+    The result of one benchmark execution.
+    """
+    #: the measured durations in seconds (one per repetition)
+    samples: list[float]
+    #: the number of operations that were executed within one sample
+    operations: int = 1
+    #: the peak memory (in bytes) that was allocated while executing one sample - None if it was not measured
+    peak_memory_bytes: Optional[int] = None
+
+
+BenchmarkFunction = Callable[[BenchmarkContext], Union[Measurement, list[float]]]
+
+
+@dataclasses.dataclass
+class RegisteredBenchmark:
+    """
+    A benchmark that was registered with :func:`register_benchmark`.
+    """
+    #: the benchmark function
+    func: BenchmarkFunction
+    #: True if the benchmark is executed for every requested data size
+    sized: bool = False
+
+
+#: all registered benchmarks (suite name -> benchmark name -> benchmark)
+BENCHMARKS: dict[str, dict[str, RegisteredBenchmark]] = {}
+
+
+def register_benchmark(suite: str, name: str, sized: bool = False) -> Callable[[BenchmarkFunction], BenchmarkFunction]:
+    """
+    Decorator that registers a benchmark function in :data:`BENCHMARKS`. The function receives a
+    :class:`BenchmarkContext` and returns a :class:`Measurement` or the list of measured durations (in seconds).
+
+    :param suite: the name of the suite the benchmark belongs to
+    :param name: the name of the benchmark (unique within the suite)
+    :param sized: True if the benchmark should be executed for every requested data size (the name of the result is
+                  extended by the size, f.e. `filter_by[1000]`)
+    :return: the decorator
+    """
+    def decorator(func: BenchmarkFunction) -> BenchmarkFunction:
+        suite_benchmarks = BENCHMARKS.setdefault(suite, {})
+        if name in suite_benchmarks:
+            raise KeyError(f'benchmark `{suite}.{name}` is already registered')
+        suite_benchmarks[name] = RegisteredBenchmark(func=func, sized=sized)
+        return func
+    return decorator
+
+
+def time_calls(func: Callable[..., Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> list[float]:
+    """
+    Measures the duration of `repeat` calls of the provided function.
+
+    :param func: the function that should be measured - if `setup` is given, it receives the return value of it
+    :param repeat: the number of measured calls
+    :param setup: optional function that is executed (unmeasured) before every call
+    :return: the duration of every call in seconds
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is None:
+            start = time.perf_counter()
+            func()
+        else:
+            prepared = setup()
+            start = time.perf_counter()
+            func(prepared)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def measure_peak_memory(func: Callable[..., Any], setup: Optional[Callable[[], Any]] = None) -> int:
+    """
+    Executes the provided function once while tracing the memory allocations.
+
+    :param func: the function that should be measured - if `setup` is given, it receives the return value of it
+    :param setup: optional function that is executed (untraced) before the call
+    :return: the peak of the allocated memory in bytes
+    """
+    prepared = setup() if setup is not None else None
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        if setup is None:
+            func()
+        else:
+            func(prepared)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return max(peak - before, 0)
+
+
+def measure(
+        context: BenchmarkContext,
+        func: Callable[..., Any],
+        operations: int = 1,
+        setup: Optional[Callable[[], Any]] = None
+) -> Measurement:
+    """
+    Measures the provided function according to the context (timing and, if enabled, peak memory).
+
+    :param context: the context of the benchmark execution
+    :param func: the function that should be measured - if `setup` is given, it receives the return value of it
+    :param operations: the number of operations one call of `func` executes
+    :param setup: optional function that is executed (unmeasured) before every call
+    :return: the measurement
+    """
+    samples = time_calls(func, context.repeat, setup=setup)
+    peak_memory = measure_peak_memory(func, setup=setup) if context.trace_memory else None
+    return Measurement(samples=samples, operations=operations, peak_memory_bytes=peak_memory)
+
+
+def _percentile(sorted_values: list[float], percentile: float) -> float:
+    # nearest-rank percentile - the number of samples is small, an interpolation would only fake precision
+    rank = max(int(round(percentile / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def calculate_statistics(measurement: Measurement | list[float]) -> dict[str, Any]:
+    """
+    Calculates the statistics of the provided measurement, that are stored in the result file. The latency values
+    are per operation, all other durations per sample.
+
+    :param measurement: the measurement (or the measured durations in seconds)
+    :return: a dictionary with the statistical values
+    """
+    if not isinstance(measurement, Measurement):
+        measurement = Measurement(samples=list(measurement))
+    samples = measurement.samples
+    per_operation = sorted(cur_sample / measurement.operations for cur_sample in samples)
+    total_duration = sum(samples)
+    return {
+        'repeat': len(samples),
+        'operations': measurement.operations,
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'max': max(samples),
+        'latency_p50': _percentile(per_operation, 50),
+        'latency_p99': _percentile(per_operation, 99),
+        'throughput': measurement.operations * len(samples) / total_duration if total_duration else None,
+        'peak_memory_bytes': measurement.peak_memory_bytes,
+    }
+
+
+def run_benchmarks(
+        context: BenchmarkContext,
+        sizes: Optional[list[int]] = None,
+        suites: Optional[list[str]] = None,
+        name_filter: Optional[str] = None
+) -> dict:
+    """
+    Executes the registered benchmarks.
+
+    :param context: the base context of all benchmark executions (the size is replaced for sized benchmarks)
+    :param sizes: the data sizes the sized benchmarks are executed with (uses :data:`DEFAULT_SIZES` if None)
+    :param suites: the suites that should be executed (all if None)
+    :param name_filter: only execute benchmarks that contain this string in their full name
+    :return: the result structure (as it is stored in the JSON file)
+    """
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    results = {}
+    for cur_suite, cur_benchmarks in BENCHMARKS.items():
+        if suites is not None and cur_suite not in suites:
+            continue
+        for cur_name, cur_benchmark in cur_benchmarks.items():
+            executions = [(f'{cur_suite}.{cur_name}[{cur_size}]', cur_size) for cur_size in sizes] \
+                if cur_benchmark.sized else [(f'{cur_suite}.{cur_name}', context.size)]
+            for cur_full_name, cur_size in executions:
+                if name_filter is not None and name_filter not in cur_full_name:
+                    continue
+                stats = calculate_statistics(cur_benchmark.func(dataclasses.replace(context, size=cur_size)))
+                results[cur_full_name] = stats
+                print(f"{cur_full_name:<80} median: {stats['median'] * 1000:10.3f}ms", flush=True)
+    return {
+        'meta': {
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'package_version': _get_package_version(),
+            'repeat': context.repeat,
+            'seed': context.seed,
+            'sizes': sizes,
+        },
+        'results': results
+    }
+
+
+def _get_package_version() -> str:
+    try:
+        import balderhub.data  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return ''
+    return balderhub.data.__version__
+
+
+def save_results(results: dict, path: str) -> None:
+    """
+    Stores the results of :func:`run_benchmarks` as JSON file.
+
+    :param results: the result structure
+    :param path: the path of the JSON file
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict:
+    """
+    Loads a result file that was created with :func:`save_results`.
+
+    :param path: the path of the JSON file
+    :return: the result structure
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list[tuple[str, float, float, float]]:
+    """
+    Compares the median values of two result structures.
+
+    :param baseline: the result structure of the baseline
+    :param current: the result structure that should be checked
+    :param threshold: the allowed relative slowdown (f.e. `0.2` for 20%)
+    :return: a list with all benchmarks that exist in both results, as tuple of benchmark name, baseline median,
+             current median and relative change - sorted by the relative change (the biggest slowdown first)
+    """
+    if threshold < 0:
+        raise ValueError('the threshold needs to be positive')
+    comparison = []
+    for cur_name, cur_baseline in baseline['results'].items():
+        cur_current = current['results'].get(cur_name)
+        if cur_current is None:
+            continue
+        change = (cur_current['median'] - cur_baseline['median']) / cur_baseline['median'] \
+            if cur_baseline['median'] else 0.0
+        comparison.append((cur_name, cur_baseline['median'], cur_current['median'], change))
+    return sorted(comparison, key=lambda elem: elem[3], reverse=True)
@@ -0,0 +1,209 @@
+"""
+Micro benchmarks for the hot paths of data items, collections and unordered lists. All benchmarks are sized: the size
+is the number of items (or list elements) the operation is executed on.
+"""
+from __future__ import annotations
+import functools
+import random
+
+from balderhub.data.lib.scenario_features.data_environment_feature import DataEnvironmentFeature
+from balderhub.data.lib.utils.filter import Filter
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+from balderhub.data.lib.utils.single_data_item_collection import SingleDataItemCollection
+from balderhub.data.lib.utils.unordered_list import UnorderedList
+
+from ._core import BenchmarkContext, Measurement, measure, register_benchmark
+from .models import VALUE_CARDINALITY, create_items, create_model
+
+SUITE = 'micro'
+
+#: number of string fields of every level of the benchmark models
+WIDTH = 10
+
+
+@functools.lru_cache(maxsize=None)
+def nested_model() -> type[SingleDataItem]:
+    """model with three levels of directly nested items"""
+    return create_model(width=WIDTH, depth=3, name_prefix='MicroNested')
+
+
+@functools.lru_cache(maxsize=None)
+def list_model() -> type[SingleDataItem]:
+    """model with two levels of items that are nested within lists"""
+    return create_model(width=WIDTH, depth=2, list_field=True, name_prefix='MicroList')
+
+
+@register_benchmark(SUITE, 'item.get_field_value', sized=True)
+def item_get_field_value(context: BenchmarkContext) -> Measurement:
+    """reads a value of the deepest level of every item"""
+    items = create_items(nested_model(), context.size, context.seed)
+
+    def run():
+        for cur_item in items:
+            cur_item.get_field_value('child__child__field_0')
+    return measure(context, run, operations=context.size)
+
+
+@register_benchmark(SUITE, 'item.set_field_value', sized=True)
+def item_set_field_value(context: BenchmarkContext) -> Measurement:
+    """sets a value of the second level of every item (with validation)"""
+    items = create_items(nested_model(), context.size, context.seed)
+
+    def run():
+        for cur_item in items:
+            cur_item.set_field_value('child__field_0', 'changed')
+    return measure(context, run, operations=context.size)
+
+
+@register_benchmark(SUITE, 'item.get_all_fields_for', sized=True)
+def item_get_all_fields_for(context: BenchmarkContext) -> Measurement:
+    """requests all nested fields of the model (`size` calls)"""
+    model = nested_model()
+
+    def run():
+        for _ in range(context.size):
+            model.get_all_fields_for()
+    return measure(context, run, operations=context.size)
+
+
+@register_benchmark(SUITE, 'item.compare_equal', sized=True)
+def item_compare_equal(context: BenchmarkContext) -> Measurement:
+    """compares every item with an equal copy"""
+    items = create_items(nested_model(), context.size, context.seed)
+    others = create_items(nested_model(), context.size, context.seed)
+
+    def run():
+        for cur_item, cur_other in zip(items, others):
+            cur_item.compare(cur_other)
+    return measure(context, run, operations=context.size)
+
+
+@register_benchmark(SUITE, 'item.get_difference_error_messages', sized=True)
+def item_get_difference_error_messages(context: BenchmarkContext) -> Measurement:
+    """determines the differences between items with different (random) values"""
+    items = create_items(nested_model(), context.size, context.seed)
+    others = create_items(nested_model(), context.size, context.seed + 1)
+
+    def run():
+        for cur_item, cur_other in zip(items, others):
+            cur_item.get_difference_error_messages(cur_other)
+    return measure(context, run, operations=context.size)
+
+
+@register_benchmark(SUITE, 'item.deep_copy', sized=True)
+def item_deep_copy(context: BenchmarkContext) -> Measurement:
+    """creates a deep copy of every item (reference for `item.snapshot`)"""
+    items = create_items(list_model(), context.size, context.seed)
+
+    def run():
+        for cur_item in items:
+            cur_item.model_copy(deep=True)
+    return measure(context, run, operations=context.size)
+
+
+@register_benchmark(SUITE, 'item.snapshot', sized=True)
+def item_snapshot(context: BenchmarkContext) -> Measurement:
+    """creates a copy-on-write snapshot of every item and changes one nested value of it"""
+    items = create_items(list_model(), context.size, context.seed)
+
+    def run():
+        for cur_item in items:
+            cur_item.snapshot().get_mutable('child')
+    return measure(context, run, operations=context.size)
+
+
+@register_benchmark(SUITE, 'collection.filter_by', sized=True)
+def collection_filter_by(context: BenchmarkContext) -> Measurement:
+    """filters the collection by a direct and a nested field"""
+    collection = SingleDataItemCollection(create_items(nested_model(), context.size, context.seed))
+    value = f'value_{random.Random(context.seed).randrange(VALUE_CARDINALITY)}'
+
+    def run():
+        collection.filter_by(field_0=value)
+        collection.filter_by(child__field_1=value)
+    return measure(context, run, operations=2)
+
+
+@register_benchmark(SUITE, 'environment.filter_by_indexed', sized=True)
+def environment_filter_by_indexed(context: BenchmarkContext) -> Measurement:
+    """filters the items of a data environment by a direct and a nested field, both are indexed"""
+    data_item_type = create_model(width=WIDTH, depth=3, name_prefix='MicroIndexed',
+                                  indexed_fields=['field_0', 'child__field_1'])
+    items = create_items(data_item_type, context.size, context.seed)
+
+    class IndexedEnvironment(DataEnvironmentFeature):
+        """environment that holds the generated items"""
+
+        def load_data(self) -> None:
+            self._add_data(items)
+
+    environment = IndexedEnvironment()
+    value = f'value_{random.Random(context.seed).randrange(VALUE_CARDINALITY)}'
+
+    def run():
+        environment.get_all_for(data_item_type).filter_by(field_0=value)
+        environment.get_all_for(data_item_type).filter_by(child__field_1=value)
+    return measure(context, run, operations=2)
+
+
+@register_benchmark(SUITE, 'collection.get_largest', sized=True)
+def collection_get_largest(context: BenchmarkContext) -> Measurement:
+    """returns the ten items with the largest value of a field, without and with a sorted index"""
+    items = create_items(nested_model(), context.size, context.seed)
+    collection = SingleDataItemCollection(items)
+    indexed_collection = SingleDataItemCollection(list(items))
+    indexed_collection.add_index('field_0', ordered=True)
+
+    def run():
+        collection.get_largest('field_0', 10)
+        indexed_collection.get_largest('field_0', 10)
+    return measure(context, run, operations=2)
+
+
+@register_benchmark(SUITE, 'collection.sample_filtered', sized=True)
+def collection_sample_filtered(context: BenchmarkContext) -> Measurement:
+    """samples ten items that match a filter on a field of the deepest level"""
+    collection = SingleDataItemCollection(create_items(nested_model(), context.size, context.seed))
+    value = f'value_{random.Random(context.seed).randrange(VALUE_CARDINALITY)}'
+
+    class DeepValueFilter(Filter):
+        """matches the items with the value in the deepest level"""
+        def apply(self, item: SingleDataItem) -> bool:
+            return item.get_field_value('child__child__field_0') == value
+
+    return measure(context, lambda: collection.sample(10, filter_obj=DeepValueFilter(), seed=context.seed))
+
+
+@register_benchmark(SUITE, 'collection.filter_by_list_field', sized=True)
+def collection_filter_by_list_field(context: BenchmarkContext) -> Measurement:
+    """filters a collection of items with nested lists by a direct field"""
+    collection = SingleDataItemCollection(create_items(list_model(), context.size, context.seed))
+    value = f'value_{random.Random(context.seed).randrange(VALUE_CARDINALITY)}'
+    return measure(context, lambda: collection.filter_by(field_0=value))
+
+
+@register_benchmark(SUITE, 'collection.get_by', sized=True)
+def collection_get_by(context: BenchmarkContext) -> Measurement:
+    """searches the one item with a specific unique identification"""
+    collection = SingleDataItemCollection(create_items(nested_model(), context.size, context.seed))
+    return measure(context, lambda: collection.get_by(id=context.size // 2))
+
+
+@register_benchmark(SUITE, 'collection.compare_ignore_order', sized=True)
+def collection_compare(context: BenchmarkContext) -> Measurement:
+    """compares the collection with an equal collection in reversed order"""
+    collection = SingleDataItemCollection(create_items(nested_model(), context.size, context.seed))
+    other = SingleDataItemCollection(list(reversed(create_items(nested_model(), context.size, context.seed))))
+    return measure(context, lambda: collection.compare(other, ignore_order=True))
+
+
+@register_benchmark(SUITE, 'unordered_list.eq', sized=True)
+def unordered_list_eq(context: BenchmarkContext) -> Measurement:
+    """compares an unordered list with a shuffled copy"""
+    rng = random.Random(context.seed)
+    values = [rng.randrange(context.size * 10) for _ in range(context.size)]
+    shuffled = list(values)
+    rng.shuffle(shuffled)
+    unordered_list = UnorderedList(values)
+    other = UnorderedList(shuffled)
+    return measure(context, lambda: unordered_list == other)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+from typing import Any, Optional, Sequence
+import itertools
+import random
+
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+
+#: counter that makes the names of the generated classes unique
+_CLASS_COUNTER = itertools.count()
+
+#: number of different values a generated string field can have (small enough that filters have matches)
+VALUE_CARDINALITY = 100
+
+
+def _get_unique_identification(self):
+    return self.id
+
+
+def create_model(
+        width: int,
+        depth: int = 1,
+        list_field: bool = False,
+        name_prefix: str = 'Synthetic',
+        indexed_fields: Sequence[str] = ()
+) -> type[SingleDataItem]:
+    """
+    Creates a new synthetic data item class. Every call creates a new class, so the class creation itself (and all
+    class-level caches) can be measured.
+
+    Every model has an integer field `id` (the unique identification) and `width` string fields `field_<n>`. If the
+    depth is bigger than one, the model has an additional field `child` that holds a model with the depth reduced by
+    one (or a list of them if `list_field` is True).
+
+    :param width: the number of string fields of every level
+    :param depth: the number of nested levels (1 for a flat model)
+    :param list_field: True if the nested child should be a list of data items
+    :param name_prefix: the prefix of the generated class names
+    :param indexed_fields: the field lookups the top-level class declares as indexed (see
+                           :meth:`SingleDataItem.get_indexed_fields`)
+    :return: the new data item class
+    """
+    if width < 0 or depth < 1:
+        raise ValueError('width needs to be positive and depth needs to be at least 1')
+    child_type: Optional[type[SingleDataItem]] = None
+    if depth > 1:
+        child_type = create_model(width, depth - 1, list_field=list_field, name_prefix=name_prefix)
+
+    annotations = {'id': int}
+    for cur_idx in range(width):
+        annotations[f'field_{cur_idx}'] = str
+    if child_type is not None:
+        annotations['child'] = list[child_type] if list_field else child_type
+
+    class_name = f'{name_prefix}Depth{depth}Model{next(_CLASS_COUNTER)}'
+    namespace = {
+        '__module__': __name__,
+        '__qualname__': class_name,
+        '__annotations__': annotations,
+        'get_unique_identification': _get_unique_identification,
+    }
+    if indexed_fields:
+        namespace['get_indexed_fields'] = classmethod(lambda cls: list(indexed_fields))
+    return type(class_name, (SingleDataItem,), namespace)
+
+
+def generate_item_data(
+        data_item_type: type[SingleDataItem],
+        identifier: int,
+        rng: random.Random,
+        list_size: int = 3
+) -> dict[str, Any]:
+    """
+    Generates the (nested) field values for one item of a model that was created with :func:`create_model`.
+
+    :param data_item_type: the data item class
+    :param identifier: the value of the field `id`
+    :param rng: the random generator the values are taken from
+    :param list_size: the number of children if the nested child is a list
+    :return: the field values as nested dictionary
+    """
+    nested_fields = data_item_type.get_nested_data_item_fields()
+    data: dict[str, Any] = {}
+    for cur_field in data_item_type.model_fields:
+        if cur_field == 'id':
+            data[cur_field] = identifier
+        elif cur_field in nested_fields:
+            child_type, is_list = nested_fields[cur_field]
+            if is_list:
+                data[cur_field] = [generate_item_data(child_type, identifier * list_size + cur_idx, rng, list_size)
+                                   for cur_idx in range(list_size)]
+            else:
+                data[cur_field] = generate_item_data(child_type, identifier, rng, list_size)
+        else:
+            data[cur_field] = f'value_{rng.randrange(VALUE_CARDINALITY)}'
+    return data
+
+
+def create_items(
+        data_item_type: type[SingleDataItem],
+        count: int,
+        seed: int = 0,
+        list_size: int = 3
+) -> list[SingleDataItem]:
+    """
+    Creates `count` items with reproducible random values for a model that was created with :func:`create_model`.
+    The items are created without validation (the generated values are valid by construction), so big data sets can
+    be prepared quickly.
+
+    :param data_item_type: the data item class
+    :param count: the number of items
+    :param seed: the seed of the random generator - the same seed always results in the same items
+    :param list_size: the number of children if the nested child is a list
+    :return: the list with the created items
+    """
+    rng = random.Random(seed)
+    return data_item_type.create_many_trusted(
+        generate_item_data(data_item_type, cur_idx, rng, list_size) for cur_idx in range(count)
+    )
@@ -0,0 +1,131 @@
+"""
+Benchmarks for the startup of a test session: importing the package, defining data item classes, generating the
+factory feature classes and constructing data environments.
+"""
+from __future__ import annotations
+import json
+import os
+import subprocess
+import sys
+
+from balderhub.data.lib.scenario_features.data_environment_feature import DataEnvironmentFeature
+from balderhub.data.lib.utils.auto_feature_factory import AutoFeatureFactory, pregenerate_factory_classes
+
+from ._core import BenchmarkContext, register_benchmark, time_calls
+from .models import create_model
+
+SUITE = 'startup'
+
+#: all subpackages whose import time is measured
+IMPORTED_MODULES = [
+    'balderhub.data',
+    'balderhub.data.lib.utils',
+    'balderhub.data.lib.utils.single_data_item',
+    'balderhub.data.lib.scenario_features',
+    'balderhub.data.lib.scenario_features.data_environment_feature',
+    'balderhub.data.lib.setup_features',
+    'balderhub.data.lib.setup_features.factories',
+]
+
+_IMPORT_CODE = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def _measure_import(module: str, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        # a fresh interpreter for every sample, because python caches all imported modules
+        result = subprocess.run(
+            [sys.executable, '-c', _IMPORT_CODE.format(module=module)],
+            capture_output=True, text=True, check=True, env=os.environ.copy()
+        )
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def _register_import_benchmark(module: str) -> None:
+    register_benchmark(SUITE, f'import.{module}')(lambda context: _measure_import(module, context.repeat))
+
+
+for _cur_module in IMPORTED_MODULES:
+    _register_import_benchmark(_cur_module)
+
+
+@register_benchmark(SUITE, 'class_creation.flat_width_10')
+def class_creation_flat_small(context: BenchmarkContext) -> list[float]:
+    """defines a flat data item class with 10 fields"""
+    return time_calls(lambda: create_model(width=10), context.repeat)
+
+
+@register_benchmark(SUITE, 'class_creation.flat_width_200')
+def class_creation_flat_large(context: BenchmarkContext) -> list[float]:
+    """defines a flat data item class with 200 fields"""
+    return time_calls(lambda: create_model(width=200), context.repeat)
+
+
+@register_benchmark(SUITE, 'class_creation.nested_depth_10')
+def class_creation_deep(context: BenchmarkContext) -> list[float]:
+    """defines a chain of 10 nested data item classes with 10 fields each"""
+    return time_calls(lambda: create_model(width=10, depth=10), context.repeat)
+
+
+@register_benchmark(SUITE, 'class_creation.nested_list_depth_5')
+def class_creation_deep_list(context: BenchmarkContext) -> list[float]:
+    """defines a chain of 5 data item classes that are nested within lists"""
+    return time_calls(lambda: create_model(width=10, depth=5, list_field=True), context.repeat)
+
+
+def _generate_factory_classes(data_item_type) -> None:
+    pregenerate_factory_classes([data_item_type])
+
+
+def _clear_factory_caches() -> None:
+    for cur_factory in list(AutoFeatureFactory.get_cached_classes().keys()):
+        cur_factory[0].clear_cache()
+
+
+@register_benchmark(SUITE, 'factories.pregenerate_default_factories')
+def factory_generation(context: BenchmarkContext) -> list[float]:
+    """creates the feature classes of all default factories for a new data item class"""
+    try:
+        return time_calls(_generate_factory_classes, context.repeat, setup=lambda: create_model(width=10, depth=2))
+    finally:
+        _clear_factory_caches()
+
+
+def _create_environment_type(item_count: int) -> type[DataEnvironmentFeature]:
+    data_item_type = create_model(width=10, depth=2)
+    child_type, _ = data_item_type.get_nested_data_item_fields()['child']
+    items = [
+        data_item_type(id=cur_idx, child=child_type(id=cur_idx, **{f'field_{i}': 'c' for i in range(10)}),
+                       **{f'field_{i}': 'v' for i in range(10)})
+        for cur_idx in range(item_count)
+    ]
+
+    class BenchmarkEnvironment(DataEnvironmentFeature):
+        """environment that adds the prepared items"""
+        def load_data(self) -> None:
+            self._add_data(items)
+
+        def sync_environment(self) -> None:
+            pass
+
+    return BenchmarkEnvironment
+
+
+@register_benchmark(SUITE, 'environment.construct_empty')
+def environment_construction_empty(context: BenchmarkContext) -> list[float]:
+    """constructs a data environment without any data"""
+    environment_type = _create_environment_type(0)
+    return time_calls(environment_type, context.repeat)
+
+
+@register_benchmark(SUITE, 'environment.construct_10000_items')
+def environment_construction_large(context: BenchmarkContext) -> list[float]:
+    """constructs a data environment that loads 10000 items"""
+    environment_type = _create_environment_type(10000)
+    return time_calls(environment_type, context.repeat)
@@ -1,4 +1,9 @@
-from balderhub.data.lib.utils.decorator_register_for_data_item import register_for_data_item
+from typing import TYPE_CHECKING
+
+from balderhub.data._lazy_import import create_lazy_module_attributes
+
+if TYPE_CHECKING:
+    from balderhub.data.lib.utils.decorator_register_for_data_item import register_for_data_item
 
 __all__ = [
 
@@ -15,3 +20,7 @@ try:
 except ImportError:
     __version__ = ""
     __version_tuple__ = tuple()
+
+__getattr__, __dir__ = create_lazy_module_attributes(__name__, globals(), {
+    'register_for_data_item': ('balderhub.data.lib.utils.decorator_register_for_data_item', 'register_for_data_item'),
+})
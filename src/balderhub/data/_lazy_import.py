@@ -0,0 +1,44 @@
+from __future__ import annotations
+from typing import Any, Callable, Optional
+import importlib
+
+
+def create_lazy_module_attributes(
+        module_name: str,
+        module_globals: dict[str, Any],
+        lazy_attributes: dict[str, tuple[str, Optional[str]]]
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """
+    Creates the module level functions `__getattr__` and `__dir__` (see PEP 562) that load the provided attributes of
+    a package lazily on first access. This keeps the import of the package itself cheap.
+
+    .. code-block:: python
+
+        __getattr__, __dir__ = create_lazy_module_attributes(__name__, globals(), {
+            'SingleDataItem': ('.single_data_item', 'SingleDataItem'),
+            'factories': ('.factories', None),
+        })
+
+    :param module_name: the name of the package (`__name__`)
+    :param module_globals: the global namespace of the package (`globals()`)
+    :param lazy_attributes: a dictionary with the public attribute name as key and a tuple with the (relative) module
+                            name and the name of the attribute within this module as value - if the attribute name is
+                            None, the module itself is returned
+    :return: a tuple with the `__getattr__` and the `__dir__` function for the package
+    """
+
+    def __getattr__(name: str) -> Any:
+        if name not in lazy_attributes:
+            raise AttributeError(f'module `{module_name}` has no attribute `{name}`')
+        sub_module_name, attribute_name = lazy_attributes[name]
+        value = importlib.import_module(sub_module_name, module_name)
+        if attribute_name is not None:
+            value = getattr(value, attribute_name)
+        # cache it within the module namespace - following accesses do not call `__getattr__` anymore
+        module_globals[name] = value
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(module_globals.keys()) | set(lazy_attributes.keys()))
+
+    return __getattr__, __dir__
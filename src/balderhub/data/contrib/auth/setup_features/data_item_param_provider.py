@@ -1,3 +1,5 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Iterator, Type
 import enum
 
 import balder
@@ -5,6 +7,7 @@ import balder
 import balderhub.data.lib.scenario_features
 from balderhub.auth.lib.scenario_features.client import UnresolvedResourceParameterConfig
 from balderhub.auth.lib.utils import ResourceRule
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
 
 from ..utils import ResourceForSpecificDataItem
 
@@ -42,30 +45,81 @@ class DataItemParamProvider(UnresolvedResourceParameterConfig):
         """server vdevice holding the specified initial data configuration feature"""
         all_data = balderhub.data.lib.scenario_features.InitialDataConfig()
 
-    def get_parameters_for(self, resource_rule: ResourceRule) -> list[ResourceForSpecificDataItem.Parameter]:
-        data = self.Server.all_data.data_list
-
-        parameters = [ResourceForSpecificDataItem.Parameter(elem) for elem in data]
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # the parameter objects that were already created, keyed by the type and the unique identification of their
+        # data item - entries of data items that are not part of the data list anymore are removed after every full pass
+        self._parameters: Dict[tuple[Type[SingleDataItem], Any], ResourceForSpecificDataItem.Parameter] = {}
 
-        if resource_rule.cb_rule is not None:
-            # filter parameters
-            parameters = [param for param in parameters if resource_rule.cb_rule(param)]
+    def _iter_parameters(self) -> Iterator[ResourceForSpecificDataItem.Parameter]:
+        """
+        Iterates over the parameters of all data items of the server. Parameter objects are created lazily on first
+        request and reused for all following rules, as long as the server returns the same data item objects (f.e.
+        the data items of a data environment - the collection itself can be a new one on every access).
 
+        :return: an iterator over the parameters
+        """
+        seen_keys = set()
+        for cur_item in self.Server.all_data.data_list:
+            key = (cur_item.__class__, cur_item.get_unique_identification())
+            seen_keys.add(key)
+            parameter = self._parameters.get(key)
+            if parameter is None or parameter.data_item is not cur_item:
+                parameter = ResourceForSpecificDataItem.Parameter(cur_item)
+                self._parameters[key] = parameter
+            yield parameter
+        # full pass -> forget the parameters of data items that were removed
+        for cur_key in self._parameters.keys() - seen_keys:
+            del self._parameters[cur_key]
+
+    def _get_max_parameters_per_rule(self) -> int | None:
+        """
+        :return: the number of parameters that is returned for every rule at most (None if there is no limit)
+        """
         if self.RESOLVING_MODE == self.ResolvingMode.ALL:
-            # do nothing
-            pass
-        elif self.RESOLVING_MODE == self.ResolvingMode.MINIMUM:
+            return None
+        if self.RESOLVING_MODE == self.ResolvingMode.MINIMUM:
             if self.ENFORCING_PARAMETERS <= 0:
                 raise ValueError(
                     f'in resolving mode {self.ResolvingMode.MINIMUM} the ENFORCING_PARAMETERS needs to be >0'
                 )
-            parameters = parameters[:self.ENFORCING_PARAMETERS]
-        else:
-            raise ValueError(f'unexpected value for ResolvingMode {self.RESOLVING_MODE}')
+            return self.ENFORCING_PARAMETERS
+        raise ValueError(f'unexpected value for ResolvingMode {self.RESOLVING_MODE}')
 
-        if len(parameters) < self.ENFORCING_PARAMETERS:
-            raise ValueError(
-                f'{self.__class__.__name__}.ENFORCING_PARAMETERS requires at least {self.ENFORCING_PARAMETERS} '
-                f'parameters for every rule - but rule {resource_rule} only has {len(parameters)} possible parameters')
+    def get_parameters_for(self, resource_rule: ResourceRule) -> list[ResourceForSpecificDataItem.Parameter]:
+        return self.get_parameters_for_rules([resource_rule])[0]
+
+    def get_parameters_for_rules(
+            self,
+            resource_rules: Iterable[ResourceRule]
+    ) -> list[list[ResourceForSpecificDataItem.Parameter]]:
+        """
+        Returns the parameters for multiple resource rules within one pass over the data. In resolving mode
+        ``ResolvingMode.MINIMUM`` a rule is not evaluated anymore as soon as it has ``ENFORCING_PARAMETERS`` matching
+        parameters, and the pass stops as soon as all rules have them.
 
-        return parameters
+        :param resource_rules: the resource rules
+        :return: the parameters for every resource rule (in the same order as the resource rules)
+        """
+        resource_rules = list(resource_rules)
+        max_parameters = self._get_max_parameters_per_rule()
+        result = [[] for _ in resource_rules]
+        # indices of the rules that still need parameters
+        pending = list(range(len(resource_rules)))
+        for cur_parameter in self._iter_parameters():
+            if not pending:
+                break
+            for cur_rule_idx in pending:
+                cb_rule = resource_rules[cur_rule_idx].cb_rule
+                if cb_rule is None or cb_rule(cur_parameter):
+                    result[cur_rule_idx].append(cur_parameter)
+            if max_parameters is not None:
+                pending = [cur_rule_idx for cur_rule_idx in pending if len(result[cur_rule_idx]) < max_parameters]
+
+        for cur_rule, cur_parameters in zip(resource_rules, result):
+            if len(cur_parameters) < self.ENFORCING_PARAMETERS:
+                raise ValueError(
+                    f'{self.__class__.__name__}.ENFORCING_PARAMETERS requires at least {self.ENFORCING_PARAMETERS} '
+                    f'parameters for every rule - but rule {cur_rule} only has {len(cur_parameters)} possible '
+                    f'parameters')
+        return result
@@ -1,9 +1,14 @@
-from . import factories
+from typing import TYPE_CHECKING
 
-from .abstract_data_item_related_feature import AbstractDataItemRelatedFeature
-from .accessible_initial_data_config import AccessibleInitialDataConfig
-from .data_environment_feature import DataEnvironmentFeature
-from .initial_data_config import InitialDataConfig
+from balderhub.data._lazy_import import create_lazy_module_attributes
+
+if TYPE_CHECKING:
+    from . import factories
+
+    from .abstract_data_item_related_feature import AbstractDataItemRelatedFeature
+    from .accessible_initial_data_config import AccessibleInitialDataConfig
+    from .data_environment_feature import DataEnvironmentFeature
+    from .initial_data_config import InitialDataConfig
 
 
 __all__ = [
@@ -12,3 +17,11 @@ __all__ = [
     'DataEnvironmentFeature',
     'InitialDataConfig',
 ]
+
+__getattr__, __dir__ = create_lazy_module_attributes(__name__, globals(), {
+    'factories': ('.factories', None),
+    'AbstractDataItemRelatedFeature': ('.abstract_data_item_related_feature', 'AbstractDataItemRelatedFeature'),
+    'AccessibleInitialDataConfig': ('.accessible_initial_data_config', 'AccessibleInitialDataConfig'),
+    'DataEnvironmentFeature': ('.data_environment_feature', 'DataEnvironmentFeature'),
+    'InitialDataConfig': ('.initial_data_config', 'InitialDataConfig'),
+})
@@ -10,8 +10,13 @@ class AbstractDataItemRelatedFeature(balder.Feature):
     Base factory usable feature. All Features that should be creatable by a factory class needs to be a subclass of
     this feature class.
     """
-    #: static managing class property that stores parametrized feature class definitions per data item class
-    _features_by_data_item_type = {}
+    #: static managing class property that stores all registrations per data item class (data item class ->
+    #: registrations as tuple of the class the registration was done for and the registered feature class)
+    _registrations_by_data_item_type: dict[type[SingleDataItem], dict[tuple[type, type], None]] = {}
+    #: static managing class property that holds the precomputed resolution index (feature class -> data item class ->
+    #: tuple of all registered feature classes) - it is built lazily per feature class and invalidated with every new
+    #: registration
+    _resolved_features_index: dict[type, dict[type[SingleDataItem], tuple[type, ...]]] = {}
 
     @property
     def data_item_type(self) -> Type[SingleDataItem]:
@@ -47,20 +52,44 @@ class AbstractDataItemRelatedFeature(balder.Feature):
         :param feature_cls: the feature class type that should be registered
         :param data_item_type: the data item type that should be assigned to the provided `feature_cls`
         """
-        if cls not in AbstractDataItemRelatedFeature._features_by_data_item_type.keys():
-            AbstractDataItemRelatedFeature._features_by_data_item_type[cls] = {}
+        registrations = AbstractDataItemRelatedFeature._registrations_by_data_item_type.setdefault(data_item_type, {})
+        #: only add it if it was not added before
+        if (cls, feature_cls) not in registrations:
+            registrations[(cls, feature_cls)] = None
+            # the registration is valid for this class and all parent classes that are based on
+            # :class:`AbstractDataItemRelatedFeature` too -> resolution index needs to be rebuilt
+            AbstractDataItemRelatedFeature._resolved_features_index.clear()
 
-        if data_item_type not in AbstractDataItemRelatedFeature._features_by_data_item_type[cls]:
-            AbstractDataItemRelatedFeature._features_by_data_item_type[cls][data_item_type] = []
+    @classmethod
+    def _get_resolved_features_index(cls) -> dict[type[SingleDataItem], tuple[type, ...]]:
+        """
+        Returns the resolution index for this feature class. It maps every data item type to all feature classes that
+        were registered for this class or one of its subclasses. The index is built once and reused till the next
+        registration.
 
-        #: only add it if it was not added before
-        if feature_cls not in AbstractDataItemRelatedFeature._features_by_data_item_type[cls][data_item_type]:
-            AbstractDataItemRelatedFeature._features_by_data_item_type[cls][data_item_type].append(feature_cls)
+        :return: the resolution index of this feature class
+        """
+        index = AbstractDataItemRelatedFeature._resolved_features_index.get(cls)
+        if index is None:
+            index = {}
+            for cur_data_item_type, cur_registrations in \
+                    AbstractDataItemRelatedFeature._registrations_by_data_item_type.items():
+                feature_classes = {
+                    cur_feature_cls: None
+                    for cur_registered_for, cur_feature_cls in cur_registrations.keys()
+                    if issubclass(cur_registered_for, cls)
+                }
+                if feature_classes:
+                    index[cur_data_item_type] = tuple(feature_classes.keys())
+            AbstractDataItemRelatedFeature._resolved_features_index[cls] = index
+        return index
 
-        # now register that for all parent classes that are based on :class:`AbstractDataItemRelatedFeature` too
-        for cur_base in cls.__bases__:
-            if issubclass(cur_base, AbstractDataItemRelatedFeature):
-                cur_base.register_feature_with_data_item_type(feature_cls=feature_cls, data_item_type=data_item_type)
+    @classmethod
+    def has_registered_features(cls) -> bool:
+        """
+        :return: True if this feature class or one of its subclasses was registered for a data item type
+        """
+        return bool(cls._get_resolved_features_index())
 
     @classmethod
     def get_specific_feature_for(cls, data_item_type: Type[SingleDataItem], **vdevice_mapping):
@@ -73,8 +102,7 @@ class AbstractDataItemRelatedFeature(balder.Feature):
         :return: returns a feature object of this type that was defined for the provided `data_item_type`
         """
 
-        available_feature_classes = \
-            AbstractDataItemRelatedFeature._features_by_data_item_type.get(cls, {}).get(data_item_type, [])
+        available_feature_classes = cls._get_resolved_features_index().get(data_item_type, ())
 
         if len(available_feature_classes) == 0:
             raise KeyError(f'can not find a registered feature for data item `{data_item_type}` in `{cls.__name__}`')
@@ -1,22 +1,92 @@
 from __future__ import annotations
-from typing import Any, List, Dict, Type
+from typing import Any, Awaitable, Callable, Iterable, List, Dict, Optional, Type, Union, TYPE_CHECKING
+import asyncio
+import concurrent.futures
+import functools
+import json
+import os
+import random
 import balder
 
 from balderhub.data.lib.utils import SingleDataItemCollection
+from balderhub.data.lib.utils.change_set import ChangeSet
+from balderhub.data.lib.utils.data_item_index import DataItemIndexes
+from balderhub.data.lib.utils.dependency_graph import DataItemDependencyGraph
 from balderhub.data.lib.utils.single_data_item import SingleDataItem, SingleDataItemTypeT
-from balderhub.data.lib.utils.exceptions import DuplicateDataObjectError
+from balderhub.data.lib.utils.exceptions import DuplicateDataObjectError, ReferentialIntegrityError
+from balderhub.data.lib.utils.not_definable import NOT_DEFINABLE
+from balderhub.data.lib.utils.instrumentation import instrumented, measure_operation
+from balderhub.data.lib.utils.layered_data_items import LayeredDataItems
+from balderhub.data.lib.utils.partitioning import get_partition_for, resolve_partition
+from balderhub.data.lib.utils.sampling import sample_indices
+from balderhub.data.lib.utils.shared_data_store import ENV_VARIABLE_SHARED_STORE, SharedDataItems, SharedDataStore, \
+    get_shared_store_name
 
+if TYPE_CHECKING:
+    from balderhub.data.lib.utils.filter import Filter
 
+#: the shared instances of the environments that are used as base for other environments
+_BASE_ENVIRONMENT_INSTANCES: Dict[type, DataEnvironmentFeature] = {}
+
+
+# pylint: disable-next=too-many-public-methods,too-many-instance-attributes
 class DataEnvironmentFeature(balder.Feature):
     """
     The Data Environment Feature provides an interface for managing a big data set. It helps to configure your tests
     depending on the selected data sets. You can use it to create a nested data-environment structure and define
     different data sets for different setups.
+
+    An environment can be based on another environment (see :attr:`DataEnvironmentFeature.BASE_ENVIRONMENT`). It only
+    holds its own additions, overrides and deletions and falls back to the data of the base environment for all other
+    lookups.
     """
 
-    # TODO do we need a plausibility check after the `load_data` call, that makes sure, that references between all data
-    #  exist?
-    # TODO make sure that `unique_identification` is unique everywhere
+    #: optional environment class this environment is based on - its data is loaded once (shared by all environments
+    #: with the same base) and this environment only adds, overrides (see
+    #: :meth:`DataEnvironmentFeature._override_data`) or removes (see :meth:`DataEnvironmentFeature._remove_data`) data
+    #: items on top of it within its :meth:`DataEnvironmentFeature.load_data`
+    BASE_ENVIRONMENT: Optional[Type[DataEnvironmentFeature]] = None
+
+    #: set it to True to validate the references between the data items after the data was loaded (see
+    #: :meth:`DataEnvironmentFeature.validate_references`) - a
+    #: :class:`balderhub.data.lib.utils.exceptions.ReferentialIntegrityError` is raised for dangling references
+    VALIDATE_REFERENCES: bool = False
+
+    #: number of partitions the data items are sharded into (for example one partition per parallel test worker) - if
+    #: it is None, the environment variable `BALDERHUB_DATA_PARTITION_COUNT` is used (no partitioning if both are not
+    #: set)
+    PARTITION_COUNT: Optional[int] = None
+
+    #: the partition (starting with 0) this environment loads and syncs - if it is None, the environment variable
+    #: `BALDERHUB_DATA_PARTITION_INDEX` is used
+    PARTITION_INDEX: Optional[int] = None
+
+    #: name of a published shared data store (see :meth:`DataEnvironmentFeature.publish_shared_data`), the environment
+    #: attaches to instead of loading the data itself - if it is None, the environment attaches to the store of its
+    #: class within the test session named by the environment variable `BALDERHUB_DATA_SHARED_STORE` (if published)
+    SHARED_DATA_STORE_NAME: Optional[str] = None
+
+    #: optional path to a JSON file, the digests of the last synced state are persisted in - with that, a new test run
+    #: only syncs the data items that changed since the last run (None keeps the state in memory only)
+    SYNC_STATE_PATH: Optional[str] = None
+
+    #: maximum number of hook calls that are executed concurrently by
+    #: :meth:`DataEnvironmentFeature.async_sync_environment`
+    SYNC_CONCURRENCY: int = 8
+
+    #: maximum number of data items that are provided to one create/update hook call of
+    #: :meth:`DataEnvironmentFeature.async_sync_environment` (None provides all items of a type in one call)
+    SYNC_BATCH_SIZE: Optional[int] = None
+
+    #: number of retries of a failed hook call of :meth:`DataEnvironmentFeature.async_sync_environment` (see
+    #: :meth:`DataEnvironmentFeature.should_retry_sync`)
+    SYNC_MAX_RETRIES: int = 0
+
+    #: delay in seconds before the first retry, it is doubled for every following retry
+    SYNC_RETRY_DELAY: float = 0.1
+
+    #: version of the persisted sync state format
+    _SYNC_STATE_VERSION = 1
 
     class DoesNotExist(Exception):
         """
@@ -27,8 +97,53 @@ class DataEnvironmentFeature(balder.Feature):
         super().__init__(**kwargs)
         # holds the whole data
         self._data: Dict[Type[SingleDataItemTypeT], Dict[Any, SingleDataItemTypeT]] = {}
+        # the last synced state: type key -> `repr()` of the unique identification -> [digest, identifier]
+        self._sync_state: Optional[Dict[str, Dict[str, list]]] = None
+        # reverse map of the synced state (created on the first deletion of a type): type key -> JSON string of the
+        # stored identifier -> `repr()` of the unique identification
+        self._synced_id_keys: Dict[str, Dict[str, str]] = {}
+        # True if the dirty tracking of all items is relative to the last synced state (it was synced in this process)
+        self._sync_state_matches_dirty_tracking = False
+        # the data items (type, unique identification) that were added or replaced since the last sync - their dirty
+        # tracking starts when they are added, so they always need to be compared with the synced state
+        self._added_since_sync: set[tuple[Type[SingleDataItem], Any]] = set()
+        # the partition of this environment as tuple `(partition index, partition count)` or None
+        self._partition = resolve_partition(self.PARTITION_INDEX, self.PARTITION_COUNT)
+        # the data items of other partitions that were already loaded with `load_foreign_item()`
+        self._foreign_data: Dict[Type[SingleDataItemTypeT], Dict[Any, SingleDataItemTypeT]] = {}
+        # the indexes of the data item types that declare indexed fields
+        self._indexes: Dict[Type[SingleDataItemTypeT], DataItemIndexes] = {}
+        # the shared data store this environment published or attached to
+        self._shared_data_store: Optional[SharedDataStore] = None
+        # the single worker thread the synchronous sync hooks are executed in by the default async hooks (only exists
+        # during `async_apply_change_set()`)
+        self._sync_hook_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+        if self.SHARED_DATA_STORE_NAME:
+            self._shared_data_store = SharedDataStore.attach(self.SHARED_DATA_STORE_NAME, owner=self._get_owner_key())
+        elif os.environ.get(ENV_VARIABLE_SHARED_STORE):
+            try:
+                self._shared_data_store = SharedDataStore.attach(self._get_session_store_name(),
+                                                                 owner=self._get_owner_key())
+            except FileNotFoundError:
+                # the data of this environment class was not published in this session
+                pass
+        if self._shared_data_store is not None:
+            # the data was already loaded and validated by the publishing process
+            for cur_type in self._shared_data_store.data_item_types:
+                self._data[cur_type] = self._shared_data_store.get_items(cur_type)
+            return
 
-        self.load_data()
+        if self.BASE_ENVIRONMENT is not None:
+            for cur_type, cur_items in self.BASE_ENVIRONMENT.get_base_instance()._data.items():
+                self._data[cur_type] = LayeredDataItems(cur_items)
+
+        with measure_operation('DataEnvironmentFeature.load_data'):
+            self.load_data()
+        if self.VALIDATE_REFERENCES:
+            violations = self.validate_references()
+            if violations:
+                raise ReferentialIntegrityError(violations)
 
     def load_data(self) -> None:
         """
@@ -36,25 +151,207 @@ class DataEnvironmentFeature(balder.Feature):
         overwrite it in subclass to fill the data environment with data.
         """
 
+    def publish_shared_data(self, name: Optional[str] = None) -> str:
+        """
+        This method publishes the data of this environment in a shared memory block. Environments of the same class in
+        other processes (forked or spawned test workers) attach to it read-only instead of running
+        :meth:`DataEnvironmentFeature.load_data` if their :attr:`DataEnvironmentFeature.SHARED_DATA_STORE_NAME` is set
+        to the returned name or if the data was published under the session set in the environment variable
+        `BALDERHUB_DATA_SHARED_STORE`. They deserialize the data items on first access. Environments of other classes
+        refuse to attach to the store. Call :meth:`DataEnvironmentFeature.unpublish_shared_data` after all workers are
+        finished.
+
+        :param name: the name of the shared memory block (if it is None, the store name of this class within the
+                     session of `BALDERHUB_DATA_SHARED_STORE` is used, or a random name if the variable is not set)
+        :return: the name of the published shared data store
+        """
+        if self._shared_data_store is not None:
+            raise RuntimeError('the data of this environment is already stored in a shared data store')
+        if name is None and os.environ.get(ENV_VARIABLE_SHARED_STORE):
+            name = self._get_session_store_name()
+        self._shared_data_store = SharedDataStore.publish(self._data, name=name, owner=self._get_owner_key())
+        return self._shared_data_store.name
+
+    def unpublish_shared_data(self) -> None:
+        """
+        This method releases the shared memory block that was published by
+        :meth:`DataEnvironmentFeature.publish_shared_data`.
+        """
+        if self._shared_data_store is None:
+            raise RuntimeError('the data of this environment was not published')
+        self._shared_data_store.unlink()
+        self._shared_data_store = None
+
+    @classmethod
+    def get_base_instance(cls) -> DataEnvironmentFeature:
+        """
+        This method returns the instance of this environment class, that is used as base for other environments (see
+        :attr:`DataEnvironmentFeature.BASE_ENVIRONMENT`). It is created on first call and shared afterward, so the data
+        of a base environment is only loaded once.
+
+        :return: the shared instance of this environment
+        """
+        instance = _BASE_ENVIRONMENT_INSTANCES.get(cls)
+        if instance is None:
+            instance = cls()
+            _BASE_ENVIRONMENT_INSTANCES[cls] = instance
+        return instance
+
+    def _get_loaded_items(self, data_obj_type: Type[SingleDataItemTypeT]) -> List[SingleDataItemTypeT]:
+        """
+        :return: all data items of the type that are already in memory (data items of an attached shared data store or
+                 a base environment that were never accessed can not have any changes)
+        """
+        items = self._data.get(data_obj_type, {})
+        if isinstance(items, (SharedDataItems, LayeredDataItems)):
+            return items.loaded_values()
+        return list(items.values())
+
+    @property
+    def partition(self) -> Optional[tuple[int, int]]:
+        """
+        :return: a tuple with the partition index and the number of partitions of this environment, or None if the
+                 environment is not partitioned
+        """
+        return self._partition
+
+    def get_partition_key(self, item: SingleDataItem) -> Any:
+        """
+        This method returns the key that decides which partition a data item belongs to. The default implementation
+        uses the unique identification. Overwrite it to shard by another key - for example to keep data items that
+        reference each other within the same partition.
+
+        :param item: the data item
+        :return: the partition key (needs a deterministic `repr()`)
+        """
+        return item.get_unique_identification()
+
+    def is_in_partition(self, item: SingleDataItem) -> bool:
+        """
+        This method checks if a data item belongs to the partition of this environment. Data items of other partitions
+        are ignored by :meth:`DataEnvironmentFeature._add_data`.
+
+        :param item: the data item
+        :return: True if the data item belongs to this partition (always True if the environment is not partitioned)
+        """
+        if self._partition is None:
+            return True
+        partition_index, partition_count = self._partition
+        return get_partition_for(self.get_partition_key(item), partition_count) == partition_index
+
+    def load_foreign_item(
+            self,
+            data_obj_type: Type[SingleDataItemTypeT],
+            unique_identification: Any
+    ) -> SingleDataItemTypeT:
+        """
+        This method is called by :meth:`DataEnvironmentFeature.get` for data items that are not part of the partition
+        of this environment. Overwrite it to resolve references to data items of other partitions lazily (the result is
+        cached). The default implementation raises :class:`DataEnvironmentFeature.DoesNotExist`.
+
+        :param data_obj_type: the data-item type
+        :param unique_identification: the unique-identification value of the requested data-item
+        :return: the data item
+        """
+        raise self.DoesNotExist(f'no element with unique-identification `{unique_identification}` of type '
+                                f'`{data_obj_type}` exist in partition {self._partition} of the environment')
+
+    @instrumented()
     def get_all_for(self, data_obj_type: Type[SingleDataItemTypeT]) -> SingleDataItemCollection:
         """
-        This method returns all known data-items for a specific data item type.
+        This method returns all known data-items for a specific data item type. Data items of a
+        :attr:`DataEnvironmentFeature.BASE_ENVIRONMENT` are only materialized in this environment when the collection
+        hands them out (f.e. by indexing, iterating or filtering).
+
         :param data_obj_type: the data-item type
         :return: a list of all known data-items
         """
         if data_obj_type not in self._data.keys():
             return SingleDataItemCollection([])
-        return SingleDataItemCollection(list(self._data[data_obj_type].values()))
+        indexes = self._get_indexes(data_obj_type)
+        items = self._data[data_obj_type]
+        if not isinstance(items, LayeredDataItems):
+            return SingleDataItemCollection(list(items.values()), indexes=indexes)
+        collection_items = []
+        keys_of_borrowed_items = {}
+        for cur_identifier, cur_item in items.read_only_items():
+            collection_items.append(cur_item)
+            if not items.is_own(cur_identifier):
+                keys_of_borrowed_items[id(cur_item)] = cur_identifier
+        return SingleDataItemCollection(
+            collection_items,
+            indexes=indexes,
+            borrowed_item_ids=set(keys_of_borrowed_items),
+            materialize_borrowed=lambda item: items[keys_of_borrowed_items[id(item)]]
+        )
+
+    @instrumented()
+    def sample_for(
+            self,
+            data_obj_type: Type[SingleDataItemTypeT],
+            k: int,
+            filter_obj: Filter | None = None,
+            seed: Any = None
+    ) -> SingleDataItemCollection:
+        """
+        This method returns `k` random data-items (without repetition) of a specific data item type, that match the
+        filter. Other than ``get_all_for(...).sample(...)`` it only accesses the data items it checks, so data items of
+        a base environment or a shared data store that are not part of the sample are neither copied nor deserialized.
+
+        :param data_obj_type: the data-item type
+        :param k: the number of requested data-items
+        :param filter_obj: optional filter the sampled data-items need to match
+        :param seed: optional seed to get a reproducible sample
+        :return: a collection with the sampled data-items in random order (it holds less than `k` data-items if there
+                 are not enough matching data-items)
+        """
+        items = self._data.get(data_obj_type, {})
+        keys = list(items.keys())
+        # the filter does not change the data items -> data items of a base environment are not materialized for it
+        peek = items.peek if isinstance(items, LayeredDataItems) else items.__getitem__
+        predicate = None if filter_obj is None else lambda idx: filter_obj.apply(peek(keys[idx]))
+        sampled_indices = sample_indices(len(keys), k, random.Random(seed), predicate=predicate)
+        return SingleDataItemCollection([items[keys[cur_index]] for cur_index in sampled_indices])
+
+    def _get_indexes(self, data_obj_type: Type[SingleDataItemTypeT]) -> Optional[DataItemIndexes]:
+        """
+        :return: the indexes of the data-item type (see :meth:`SingleDataItem.get_indexed_fields` and
+                 :meth:`SingleDataItem.get_sorted_indexed_fields`) or None if the type does not declare indexed fields
+        """
+        indexes = self._indexes.get(data_obj_type)
+        if indexes is None:
+            field_lookups = data_obj_type.get_indexed_fields()
+            sorted_field_lookups = data_obj_type.get_sorted_indexed_fields()
+            if not field_lookups and not sorted_field_lookups:
+                return None
+            indexes = DataItemIndexes(
+                field_lookups,
+                source=lambda: (cur_item for _, cur_item in self._iter_read_only_items(data_obj_type)),
+                sorted_field_lookups=sorted_field_lookups
+            )
+            items = self._data.get(data_obj_type)
+            if isinstance(items, LayeredDataItems):
+                # the indexes hold the data items of the base environment until they are materialized in this layer
+                items.on_materialize = indexes.replace
+            self._indexes[data_obj_type] = indexes
+        return indexes
 
+    @instrumented()
     def get(self, data_obj_type: Type[SingleDataItemTypeT], unique_identification: Any) -> SingleDataItemTypeT:
         """
         This method returns exactly one element identified by the `unique_identification`.
-        It raises an exception if the requested element does not exist in the environment.
+        It raises an exception if the requested element does not exist in the environment. If the environment is
+        partitioned, elements of other partitions are loaded with :meth:`DataEnvironmentFeature.load_foreign_item`.
 
         :param data_obj_type: the data-item type
         :param unique_identification: the unique-identification value of the requested data-item type
         :return: the specific data item
         """
+        if self._partition is not None and unique_identification not in self._data.get(data_obj_type, {}):
+            foreign_items = self._foreign_data.setdefault(data_obj_type, {})
+            if unique_identification not in foreign_items:
+                foreign_items[unique_identification] = self.load_foreign_item(data_obj_type, unique_identification)
+            return foreign_items[unique_identification]
         if data_obj_type not in self._data.keys():
             raise self.DoesNotExist(f'no items from type `{data_obj_type}` exist in the environment')
         if unique_identification not in self._data[data_obj_type].keys():
@@ -62,9 +359,89 @@ class DataEnvironmentFeature(balder.Feature):
                                     f'type `{data_obj_type}` exist in the environment')
         return self._data[data_obj_type][unique_identification]
 
+    @instrumented()
+    def validate_references(self) -> List[str]:
+        """
+        This method checks that all data items referenced by the data items of this environment exist in the
+        environment too. References to data item types that have no data items in this environment at all and to data
+        items of other partitions are not checked. It also checks that the unique identification of every data item
+        still matches the one it was added with. The check is one linear pass over all data items that uses the
+        internal per-type indexes. If the environment is based on a :attr:`DataEnvironmentFeature.BASE_ENVIRONMENT`,
+        the unchanged data items of the base environment are only checked if this environment removed data items.
+
+        :return: the descriptions of all found violations (an empty list if the data is consistent)
+        """
+        violations = []
+        # removed data items could be referenced by the unchanged data items of the base environment
+        check_base_items = any(isinstance(cur_items, LayeredDataItems) and cur_items.deleted
+                               for cur_items in self._data.values())
+        for cur_type, cur_items in self._data.items():
+            nested_fields = cur_type.get_nested_data_item_fields()
+            if isinstance(cur_items, LayeredDataItems) and not check_base_items:
+                cur_items = cur_items.own_items()
+            else:
+                cur_items = self._iter_read_only_items(cur_type)
+            for cur_identifier, cur_item in cur_items:
+                if cur_item.get_unique_identification() != cur_identifier:
+                    violations.append(f'{cur_type.__name__}({cur_identifier!r}) was added with this unique '
+                                      f'identification, but has the unique identification '
+                                      f'{cur_item.get_unique_identification()!r} now')
+                for cur_field_name, (_, is_list) in nested_fields.items():
+                    cur_value = cur_item.__dict__.get(cur_field_name)
+                    if cur_value is None or cur_value is NOT_DEFINABLE:
+                        continue
+                    referenced = enumerate(cur_value) if is_list else [(None, cur_value)]
+                    for cur_idx, cur_referenced_item in referenced:
+                        referenced_items = self._data.get(cur_referenced_item.__class__)
+                        if referenced_items is None:
+                            continue
+                        referenced_identifier = cur_referenced_item.get_unique_identification()
+                        if referenced_identifier is NOT_DEFINABLE or referenced_identifier in referenced_items:
+                            continue
+                        if not self.is_in_partition(cur_referenced_item):
+                            continue
+                        field_description = cur_field_name if cur_idx is None else f'{cur_field_name}[{cur_idx}]'
+                        violations.append(
+                            f'{cur_type.__name__}({cur_identifier!r}).{field_description} references '
+                            f'{cur_referenced_item.__class__.__name__}({referenced_identifier!r}), which does not '
+                            f'exist in the environment'
+                        )
+        return violations
+
+    @instrumented()
+    def get_dirty_items(self, data_obj_type: Type[SingleDataItemTypeT] | None = None) -> SingleDataItemCollection:
+        """
+        This method returns all data-items that were changed since they were added to the environment (or since the
+        last :meth:`DataEnvironmentFeature.clear_dirty` call). See :meth:`SingleDataItem.get_dirty_fields` for more
+        details.
+
+        :param data_obj_type: the data-item type (None to return the changed items of all types)
+        :return: a collection with all changed data-items
+        """
+        data_obj_types = self._data.keys() if data_obj_type is None else [data_obj_type]
+        return SingleDataItemCollection([
+            cur_item
+            for cur_type in data_obj_types
+            for cur_item in self._get_loaded_items(cur_type)
+            if cur_item.is_dirty()
+        ])
+
+    def clear_dirty(self, data_obj_type: Type[SingleDataItemTypeT] | None = None) -> None:
+        """
+        This method marks all data-items of the environment as unchanged. Call it after the environment was synced with
+        the related system.
+
+        :param data_obj_type: the data-item type (None to clear the changes of all types)
+        """
+        data_obj_types = list(self._data.keys()) if data_obj_type is None else [data_obj_type]
+        for cur_type in data_obj_types:
+            for cur_item in self._get_loaded_items(cur_type):
+                cur_item.clear_dirty()
+
     def _add_data(self, data_objects: SingleDataItem | List[SingleDataItem]) -> None:
         """
-        Method to add a new data set to the internal data set storage.
+        Method to add a new data set to the internal data set storage. If the environment is partitioned, data items of
+        other partitions are ignored (see :meth:`DataEnvironmentFeature.is_in_partition`).
 
         :param data_objects: the data item object / objects that should be added
         """
@@ -73,11 +450,298 @@ class DataEnvironmentFeature(balder.Feature):
         for cur_data_object in data_objects:
             if cur_data_object.__class__ not in self._data.keys():
                 self._data[cur_data_object.__class__] = {}
+            if self._partition is not None and not self.is_in_partition(cur_data_object):
+                continue
             if cur_data_object.get_unique_identification() in self._data[cur_data_object.__class__].keys():
                 raise DuplicateDataObjectError(
                     'another data object with the same identifier already exists in environment data'
                 )
             self._data[cur_data_object.__class__][cur_data_object.get_unique_identification()] = cur_data_object
+            indexes = self._get_indexes(cur_data_object.__class__)
+            if indexes is not None:
+                indexes.add(cur_data_object)
+            # the item is in the state it was loaded with -> track the following changes only (a new item without
+            # tracking state was never changed, so there is nothing to clear)
+            if cur_data_object._get_tracking_state() is not None:  # pylint: disable=protected-access
+                cur_data_object.clear_dirty()
+            if self._sync_state_matches_dirty_tracking:
+                self._added_since_sync.add((cur_data_object.__class__, cur_data_object.get_unique_identification()))
+
+    def _override_data(self, data_objects: SingleDataItem | List[SingleDataItem]) -> None:
+        """
+        Method to replace data items of the internal data set storage (for example data items of the base
+        environment) with new versions. Data items that do not exist yet are added.
+
+        :param data_objects: the data item object / objects that should replace the stored ones
+        """
+        if isinstance(data_objects, SingleDataItem):
+            data_objects = [data_objects]
+        for cur_data_object in data_objects:
+            if cur_data_object.get_unique_identification() in self._data.get(cur_data_object.__class__, {}):
+                self._remove_data(cur_data_object.__class__, cur_data_object.get_unique_identification())
+        self._add_data(data_objects)
+
+    def _remove_data(self, data_obj_type: Type[SingleDataItemTypeT], unique_identifications: Any | List[Any]) -> None:
+        """
+        Method to remove data items from the internal data set storage (for example data items of the base
+        environment).
+
+        :param data_obj_type: the data-item type
+        :param unique_identifications: the unique identification / identifications of the data items that should be
+                                       removed
+        """
+        if not isinstance(unique_identifications, list):
+            unique_identifications = [unique_identifications]
+        for cur_identifier in unique_identifications:
+            if cur_identifier not in self._data.get(data_obj_type, {}):
+                raise self.DoesNotExist(f'no element with unique-identification `{cur_identifier}` of type '
+                                        f'`{data_obj_type}` exist in the environment')
+            items = self._data[data_obj_type]
+            indexes = self._get_indexes(data_obj_type)
+            if indexes is not None:
+                # the indexes hold data items of a base environment until they are materialized
+                peek = items.peek if isinstance(items, LayeredDataItems) else items.__getitem__
+                indexes.remove(peek(cur_identifier))
+            del items[cur_identifier]
+
+    def _iter_read_only_items(self, data_obj_type: Type[SingleDataItemTypeT]) -> Iterable[tuple[Any, SingleDataItem]]:
+        """
+        :return: the unique identifications and data items of the data-item type - data items of a base environment are
+                 not materialized and must not be changed
+        """
+        items = self._data.get(data_obj_type, {})
+        return items.read_only_items() if isinstance(items, LayeredDataItems) else items.items()
+
+    @classmethod
+    def _get_owner_key(cls) -> str:
+        return f'{cls.__module__}.{cls.__qualname__}'
+
+    @classmethod
+    def _get_session_store_name(cls) -> str:
+        return get_shared_store_name(os.environ[ENV_VARIABLE_SHARED_STORE], cls._get_owner_key())
+
+    @staticmethod
+    def _get_type_key(data_obj_type: Type[SingleDataItem]) -> str:
+        return f'{data_obj_type.__module__}.{data_obj_type.__qualname__}'
+
+    @staticmethod
+    def _get_serializable_identifier(unique_identification: Any) -> Any:
+        try:
+            json.dumps(unique_identification)
+            return unique_identification
+        except (TypeError, ValueError):
+            return repr(unique_identification)
+
+    def _get_sync_state_path(self) -> Optional[str]:
+        """
+        :return: the path of the persisted sync state - every partition uses its own file
+        """
+        if self.SYNC_STATE_PATH is None or self._partition is None:
+            return self.SYNC_STATE_PATH
+        return f'{self.SYNC_STATE_PATH}.partition-{self._partition[0]}-of-{self._partition[1]}'
+
+    def _get_sync_state(self) -> Dict[str, Dict[str, list]]:
+        if self._sync_state is None:
+            self._sync_state = {}
+            sync_state_path = self._get_sync_state_path()
+            if sync_state_path is not None and os.path.isfile(sync_state_path):
+                with open(sync_state_path, 'r', encoding='utf-8') as file:
+                    content = json.load(file)
+                if content.get('version') == self._SYNC_STATE_VERSION:
+                    self._sync_state = content['types']
+        return self._sync_state
+
+    def _save_sync_state(self) -> None:
+        sync_state_path = self._get_sync_state_path()
+        if sync_state_path is None:
+            return
+        tmp_path = f'{sync_state_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'version': self._SYNC_STATE_VERSION, 'types': self._get_sync_state()}, file)
+        os.replace(tmp_path, sync_state_path)
+
+    def reset_sync_state(self) -> None:
+        """
+        This method forgets the last synced state (also the persisted one). The next
+        :meth:`DataEnvironmentFeature.sync_environment` call will create all data items again.
+        """
+        self._sync_state = {}
+        self._synced_id_keys.clear()
+        self._sync_state_matches_dirty_tracking = False
+        self._added_since_sync.clear()
+        sync_state_path = self._get_sync_state_path()
+        if sync_state_path is not None and os.path.isfile(sync_state_path):
+            os.remove(sync_state_path)
+
+    @instrumented()
+    def compute_change_set(self) -> ChangeSet:
+        """
+        This method determines the difference between the current environment data and the last synced state. It
+        compares the digests (see :meth:`SingleDataItem.get_digest`) of the data items with the synced ones. After a
+        sync in the same process, only the dirty items need to be compared. Data items of a
+        :attr:`DataEnvironmentFeature.BASE_ENVIRONMENT` are only materialized if they are part of the change set.
+
+        :return: the change set that describes the created, updated and deleted data items
+        """
+        sync_state = self._get_sync_state()
+        change_set = ChangeSet()
+        known_type_keys = set()
+        for cur_type, cur_items in self._data.items():
+            type_key = self._get_type_key(cur_type)
+            known_type_keys.add(type_key)
+            synced_items = sync_state.get(type_key, {})
+            existing_id_keys = set()
+            for cur_identifier, cur_item in self._iter_read_only_items(cur_type):
+                id_key = repr(cur_identifier)
+                existing_id_keys.add(id_key)
+                synced_entry = synced_items.get(id_key)
+                if synced_entry is not None and self._sync_state_matches_dirty_tracking and not cur_item.is_dirty() \
+                        and (cur_type, cur_identifier) not in self._added_since_sync:
+                    continue
+                digest = cur_item.get_digest()
+                if synced_entry is None:
+                    change_set.created.setdefault(cur_type, []).append(cur_items[cur_identifier])
+                elif synced_entry[0] != digest:
+                    change_set.updated.setdefault(cur_type, []).append(cur_items[cur_identifier])
+                else:
+                    continue
+                change_set.item_digests[(cur_type, cur_identifier)] = digest
+            deleted = [cur_entry[1] for cur_id_key, cur_entry in synced_items.items()
+                       if cur_id_key not in existing_id_keys]
+            if deleted:
+                change_set.deleted[cur_type] = deleted
+        for cur_type_key, cur_synced_items in sync_state.items():
+            if cur_type_key not in known_type_keys and cur_synced_items:
+                change_set.deleted[cur_type_key] = [cur_entry[1] for cur_entry in cur_synced_items.values()]
+        return change_set
+
+    def get_dependency_graph(self) -> DataItemDependencyGraph:
+        """
+        This method returns the dependency graph of all data item types of this environment. It describes the order the
+        data item types need to be synced or validated in and which types can be processed in parallel.
+
+        :return: the dependency graph between the data item types of this environment
+        """
+        return DataItemDependencyGraph(self._data.keys())
+
+    def _mark_as_synced(self, change_set: ChangeSet, data_obj_type: Type[SingleDataItem],
+                        items: List[SingleDataItem]) -> None:
+        type_key = self._get_type_key(data_obj_type)
+        synced_items = self._get_sync_state().setdefault(type_key, {})
+        synced_id_keys = self._synced_id_keys.get(type_key)
+        for cur_item in items:
+            identifier = cur_item.get_unique_identification()
+            serializable_identifier = self._get_serializable_identifier(identifier)
+            synced_items[repr(identifier)] = [
+                change_set.item_digests[(data_obj_type, identifier)], serializable_identifier
+            ]
+            if synced_id_keys is not None:
+                synced_id_keys[json.dumps(serializable_identifier)] = repr(identifier)
+
+    def _mark_as_deleted(self, data_obj_type: Union[Type[SingleDataItem], str], identifiers: List[Any]) -> None:
+        sync_state = self._get_sync_state()
+        type_key = data_obj_type if isinstance(data_obj_type, str) else self._get_type_key(data_obj_type)
+        synced_items = sync_state.get(type_key, {})
+        synced_id_keys = self._synced_id_keys.get(type_key)
+        if synced_id_keys is None:
+            # the stored identifiers are JSON serializable, so their JSON string can be used as hashable key
+            synced_id_keys = {json.dumps(cur_entry[1]): cur_id_key for cur_id_key, cur_entry in synced_items.items()}
+            self._synced_id_keys[type_key] = synced_id_keys
+        for cur_identifier in identifiers:
+            cur_id_key = synced_id_keys.pop(json.dumps(cur_identifier), None)
+            if cur_id_key is not None:
+                synced_items.pop(cur_id_key, None)
+        if not synced_items:
+            sync_state.pop(type_key, None)
+            self._synced_id_keys.pop(type_key, None)
+
+    def _finish_sync(self) -> None:
+        self.clear_dirty()
+        self._added_since_sync.clear()
+        self._sync_state_matches_dirty_tracking = True
+
+    def apply_change_set(self, change_set: ChangeSet) -> None:
+        """
+        This method transfers a change set into the related system by calling the hooks
+        :meth:`DataEnvironmentFeature.sync_create`, :meth:`DataEnvironmentFeature.sync_update` and
+        :meth:`DataEnvironmentFeature.sync_delete`. Creations and updates are executed type by type, every type after
+        the types it references. Deletions are executed in the reversed order. The synced state is updated after every
+        successful hook call, so a failed sync continues with the remaining changes on the next call.
+
+        :param change_set: the change set that should be applied (see :meth:`DataEnvironmentFeature.compute_change_set`)
+        """
+        layers = self.get_dependency_graph().get_layers()
+        try:
+            for cur_type in [cur_type for cur_layer in layers for cur_type in cur_layer]:
+                if change_set.created.get(cur_type):
+                    self.sync_create(cur_type, change_set.created[cur_type])
+                    self._mark_as_synced(change_set, cur_type, change_set.created[cur_type])
+                if change_set.updated.get(cur_type):
+                    self.sync_update(cur_type, change_set.updated[cur_type])
+                    self._mark_as_synced(change_set, cur_type, change_set.updated[cur_type])
+            for cur_type, cur_identifiers in [cur_deletion for cur_deletion_layer
+                                              in self._get_deletion_layers(change_set, layers)
+                                              for cur_deletion in cur_deletion_layer]:
+                self.sync_delete(cur_type, cur_identifiers)
+                self._mark_as_deleted(cur_type, cur_identifiers)
+        finally:
+            self._save_sync_state()
+        self._finish_sync()
+
+    @staticmethod
+    def _get_deletion_layers(
+            change_set: ChangeSet,
+            layers: List[List[Type[SingleDataItem]]]
+    ) -> List[List[tuple[Union[Type[SingleDataItem], str], List[Any]]]]:
+        """
+        :return: the deletions of the change set grouped in layers - deletions of types that are not part of the
+                 environment anymore first, followed by the layers of the dependency graph in reversed order
+                 (referencing types are deleted before the types they reference)
+        """
+        known_types = {cur_type for cur_layer in layers for cur_type in cur_layer}
+        deletion_layers = [
+            [(cur_type, cur_ids) for cur_type, cur_ids in change_set.deleted.items()
+             if cur_ids and cur_type not in known_types]
+        ]
+        for cur_layer in reversed(layers):
+            deletion_layers.append([(cur_type, change_set.deleted[cur_type]) for cur_type in cur_layer
+                                    if change_set.deleted.get(cur_type)])
+        return [cur_deletion_layer for cur_deletion_layer in deletion_layers if cur_deletion_layer]
+
+    def sync_create(self, data_obj_type: Type[SingleDataItemTypeT], items: List[SingleDataItemTypeT]) -> None:
+        """
+        Hook that creates new data items in the related system. It is called by the incremental
+        :meth:`DataEnvironmentFeature.sync_environment` implementation and needs to be overwritten in subclasses that
+        use it.
+
+        :param data_obj_type: the data-item type
+        :param items: the data items that should be created
+        """
+        raise NotImplementedError
+
+    def sync_update(self, data_obj_type: Type[SingleDataItemTypeT], items: List[SingleDataItemTypeT]) -> None:
+        """
+        Hook that updates data items in the related system, that were changed since the last sync. It is called by the
+        incremental :meth:`DataEnvironmentFeature.sync_environment` implementation and needs to be overwritten in
+        subclasses that use it.
+
+        :param data_obj_type: the data-item type
+        :param items: the data items that should be updated
+        """
+        raise NotImplementedError
+
+    def sync_delete(self, data_obj_type: Union[Type[SingleDataItemTypeT], str], identifiers: List[Any]) -> None:
+        """
+        Hook that deletes data items from the related system, that were synced before but do not exist in the
+        environment anymore. It is called by the incremental :meth:`DataEnvironmentFeature.sync_environment`
+        implementation and needs to be overwritten in subclasses that use it.
+
+        :param data_obj_type: the data-item type (or its qualified name, if the type is not part of the environment
+                              anymore)
+        :param identifiers: the unique identifications of the data items that should be deleted (identifiers that are
+                            not JSON serializable are provided as their `repr()`)
+        """
+        raise NotImplementedError
 
     def sync_environment(self) -> None:
         """
@@ -85,5 +749,201 @@ class DataEnvironmentFeature(balder.Feature):
         the stored data with the related system.
         It is expected that after calling this method, the environment data and the data within the related system are
         in sync.
+
+        The default implementation syncs incrementally: it computes the change set against the last synced state (see
+        :meth:`DataEnvironmentFeature.compute_change_set`) and applies it with the hooks
+        :meth:`DataEnvironmentFeature.sync_create`, :meth:`DataEnvironmentFeature.sync_update` and
+        :meth:`DataEnvironmentFeature.sync_delete`. Unchanged data items are skipped. Set
+        :attr:`DataEnvironmentFeature.SYNC_STATE_PATH` to skip them in following test runs too.
         """
-        raise NotImplementedError
+        with measure_operation('DataEnvironmentFeature.sync_environment'):
+            self.apply_change_set(self.compute_change_set())
+
+    async def _run_sync_hook(self, hook: Callable[..., None], *args) -> None:
+        """
+        Executes a synchronous sync hook without blocking the event loop. All calls are executed one after another in
+        one worker thread of this environment, so synchronous hooks do not need to be thread-safe (they are never
+        executed concurrently). Overwrite the async hooks to transfer changes concurrently.
+
+        :param hook: the synchronous hook
+        :param args: the arguments of the hook
+        """
+        if self._sync_hook_executor is None:
+            self._sync_hook_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='balderhub-data-sync'
+            )
+        await asyncio.get_running_loop().run_in_executor(self._sync_hook_executor, functools.partial(hook, *args))
+
+    async def async_sync_create(
+            self,
+            data_obj_type: Type[SingleDataItemTypeT],
+            items: List[SingleDataItemTypeT]
+    ) -> None:
+        """
+        Async hook that creates new data items in the related system. It is called by
+        :meth:`DataEnvironmentFeature.async_sync_environment`. The default implementation executes
+        :meth:`DataEnvironmentFeature.sync_create` in the single worker thread of this environment, one hook call at
+        a time (so the synchronous hooks do not need to be thread-safe) - overwrite it for a native async
+        implementation that transfers changes concurrently.
+
+        :param data_obj_type: the data-item type
+        :param items: the data items that should be created
+        """
+        await self._run_sync_hook(self.sync_create, data_obj_type, items)
+
+    async def async_sync_update(
+            self,
+            data_obj_type: Type[SingleDataItemTypeT],
+            items: List[SingleDataItemTypeT]
+    ) -> None:
+        """
+        Async hook that updates data items in the related system. It is called by
+        :meth:`DataEnvironmentFeature.async_sync_environment`. The default implementation executes
+        :meth:`DataEnvironmentFeature.sync_update` in the single worker thread of this environment, one hook call at
+        a time (so the synchronous hooks do not need to be thread-safe) - overwrite it for a native async
+        implementation that transfers changes concurrently.
+
+        :param data_obj_type: the data-item type
+        :param items: the data items that should be updated
+        """
+        await self._run_sync_hook(self.sync_update, data_obj_type, items)
+
+    async def async_sync_delete(
+            self,
+            data_obj_type: Union[Type[SingleDataItemTypeT], str],
+            identifiers: List[Any]
+    ) -> None:
+        """
+        Async hook that deletes data items from the related system. It is called by
+        :meth:`DataEnvironmentFeature.async_sync_environment`. The default implementation executes
+        :meth:`DataEnvironmentFeature.sync_delete` in the single worker thread of this environment, one hook call at
+        a time (so the synchronous hooks do not need to be thread-safe) - overwrite it for a native async
+        implementation that transfers changes concurrently.
+
+        :param data_obj_type: the data-item type (or its qualified name, if the type is not part of the environment
+                              anymore)
+        :param identifiers: the unique identifications of the data items that should be deleted
+        """
+        await self._run_sync_hook(self.sync_delete, data_obj_type, identifiers)
+
+    def should_retry_sync(
+            self,
+            operation: str,
+            data_obj_type: Union[Type[SingleDataItem], str],
+            error: Exception,
+            attempt: int
+    ) -> bool:
+        """
+        Retry hook of :meth:`DataEnvironmentFeature.async_sync_environment`, that is called after a hook call failed.
+        The default implementation retries every error up to :attr:`DataEnvironmentFeature.SYNC_MAX_RETRIES` times.
+
+        :param operation: the failed operation (`create`, `update` or `delete`)
+        :param data_obj_type: the data-item type of the failed call
+        :param error: the raised exception
+        :param attempt: the number of the failed attempt (starting with 1)
+        :return: True if the call should be executed again, otherwise the error is raised
+        """
+        # pylint: disable=unused-argument
+        return attempt <= self.SYNC_MAX_RETRIES
+
+    def get_sync_retry_delay(self, attempt: int) -> float:
+        """
+        Retry hook of :meth:`DataEnvironmentFeature.async_sync_environment`, that returns the time to wait before the
+        next attempt. The default implementation doubles the :attr:`DataEnvironmentFeature.SYNC_RETRY_DELAY` for every
+        retry.
+
+        :param attempt: the number of the failed attempt (starting with 1)
+        :return: the delay in seconds
+        """
+        return self.SYNC_RETRY_DELAY * 2 ** (attempt - 1)
+
+    async def _call_sync_hook_with_retries(
+            self,
+            operation: str,
+            hook: Callable[[Any, List[Any]], Awaitable[None]],
+            data_obj_type: Union[Type[SingleDataItem], str],
+            elements: List[Any]
+    ) -> None:
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                await hook(data_obj_type, elements)
+                return
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                if not self.should_retry_sync(operation, data_obj_type, exc, attempt):
+                    raise
+            await asyncio.sleep(self.get_sync_retry_delay(attempt))
+
+    def _split_into_batches(self, elements: List[Any]) -> List[List[Any]]:
+        if self.SYNC_BATCH_SIZE is None:
+            return [elements]
+        return [elements[idx:idx + self.SYNC_BATCH_SIZE] for idx in range(0, len(elements), self.SYNC_BATCH_SIZE)]
+
+    async def async_apply_change_set(self, change_set: ChangeSet) -> None:
+        """
+        This method is the async version of :meth:`DataEnvironmentFeature.apply_change_set`. The changes of one data
+        item type are split into batches (see :attr:`DataEnvironmentFeature.SYNC_BATCH_SIZE`) that are transferred
+        concurrently with the async hooks :meth:`DataEnvironmentFeature.async_sync_create`,
+        :meth:`DataEnvironmentFeature.async_sync_update` and :meth:`DataEnvironmentFeature.async_sync_delete` - at most
+        :attr:`DataEnvironmentFeature.SYNC_CONCURRENCY` calls at the same time. The layers of the dependency graph (see
+        :meth:`DataEnvironmentFeature.get_dependency_graph`) are processed one after another, all types of one layer
+        are processed in parallel. Failed calls are retried depending on
+        :meth:`DataEnvironmentFeature.should_retry_sync`.
+
+        If a call finally fails, the other running calls of the same layer are completed, before the first error is
+        raised. Successful calls are stored in the synced state.
+
+        :param change_set: the change set that should be applied (see :meth:`DataEnvironmentFeature.compute_change_set`)
+        """
+        semaphore = asyncio.Semaphore(self.SYNC_CONCURRENCY)
+
+        async def upsert(operation, hook, data_obj_type, items):
+            async with semaphore:
+                await self._call_sync_hook_with_retries(operation, hook, data_obj_type, items)
+            self._mark_as_synced(change_set, data_obj_type, items)
+
+        async def delete(data_obj_type, identifiers):
+            async with semaphore:
+                await self._call_sync_hook_with_retries('delete', self.async_sync_delete, data_obj_type, identifiers)
+            self._mark_as_deleted(data_obj_type, identifiers)
+
+        async def run_all(coroutines):
+            results = await asyncio.gather(*coroutines, return_exceptions=True)
+            for cur_result in results:
+                if isinstance(cur_result, BaseException):
+                    raise cur_result
+
+        layers = self.get_dependency_graph().get_layers()
+        try:
+            for cur_layer in layers:
+                await run_all(
+                    [upsert('create', self.async_sync_create, cur_type, cur_batch)
+                     for cur_type in cur_layer
+                     for cur_batch in self._split_into_batches(change_set.created.get(cur_type, []))
+                     if cur_batch]
+                    + [upsert('update', self.async_sync_update, cur_type, cur_batch)
+                       for cur_type in cur_layer
+                       for cur_batch in self._split_into_batches(change_set.updated.get(cur_type, []))
+                       if cur_batch]
+                )
+            for cur_deletion_layer in self._get_deletion_layers(change_set, layers):
+                await run_all([delete(cur_type, cur_batch) for cur_type, cur_identifiers in cur_deletion_layer
+                               for cur_batch in self._split_into_batches(cur_identifiers)])
+        finally:
+            self._save_sync_state()
+            if self._sync_hook_executor is not None:
+                # do not block the event loop - a hook that is still running (f.e. after a cancellation) finishes in
+                # the background
+                self._sync_hook_executor.shutdown(wait=False)
+                self._sync_hook_executor = None
+        self._finish_sync()
+
+    async def async_sync_environment(self) -> None:
+        """
+        This method is the async version of :meth:`DataEnvironmentFeature.sync_environment`. It computes the change set
+        against the last synced state and transfers it concurrently (see
+        :meth:`DataEnvironmentFeature.async_apply_change_set`). Use it for related systems that can handle many
+        concurrent requests, like most network APIs.
+        """
+        await self.async_apply_change_set(self.compute_change_set())
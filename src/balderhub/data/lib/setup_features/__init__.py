@@ -1,6 +1,15 @@
-from . import factories
+from typing import TYPE_CHECKING
+
+from balderhub.data._lazy_import import create_lazy_module_attributes
+
+if TYPE_CHECKING:
+    from . import factories
 
 
 __all__ = [
 
 ]
+
+__getattr__, __dir__ = create_lazy_module_attributes(__name__, globals(), {
+    'factories': ('.factories', None),
+})
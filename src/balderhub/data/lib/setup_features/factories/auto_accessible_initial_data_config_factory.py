@@ -21,6 +21,14 @@ class AutoAccessibleInitialDataConfigFactory(AutoFeatureFactory):
             filter_func: Union[Callable[[SingleDataItem], bool], None] = None,
             **kwargs
     ):
+        """
+        Defines a new feature for the specific data-item class given by attribute `data_item_cls`.
+
+        :param data_item_cls: the single data-item class
+        :param filter_func: optional callable that filters the data items that are accessible (a new feature class is
+                            created for every different filter callable)
+        :return: the feature type class
+        """
         return super().get_for(data_item_cls, filter_func=filter_func)
 
     @classmethod
@@ -1,16 +1,25 @@
-from .auto_feature_factory import AutoFeatureFactory
-from .base_response_message import BaseResponseMessage
-from .not_definable import NOT_DEFINABLE
-from .lookup_field_string import LookupFieldString
-from .response_message import ResponseMessage
-from .response_message_list import ResponseMessageList
-from .single_data_item import SingleDataItem
-from .single_data_item_collection import SingleDataItemCollection
-from .unordered_list import UnorderedList
+from typing import TYPE_CHECKING
+
+from balderhub.data._lazy_import import create_lazy_module_attributes
+
+if TYPE_CHECKING:
+    from .auto_feature_factory import AutoFeatureFactory
+    from .base_response_message import BaseResponseMessage
+    from .change_set import ChangeSet
+    from .dependency_graph import DataItemDependencyGraph
+    from .not_definable import NOT_DEFINABLE
+    from .lookup_field_string import LookupFieldString
+    from .response_message import ResponseMessage
+    from .response_message_list import ResponseMessageList
+    from .single_data_item import SingleDataItem
+    from .single_data_item_collection import SingleDataItemCollection
+    from .unordered_list import UnorderedList
 
 __all__ = [
     'NOT_DEFINABLE',
     'BaseResponseMessage',
+    'ChangeSet',
+    'DataItemDependencyGraph',
     'LookupFieldString',
     'ResponseMessage',
     'ResponseMessageList',
@@ -18,3 +27,17 @@ __all__ = [
     'SingleDataItemCollection',
     'UnorderedList'
 ]
+
+__getattr__, __dir__ = create_lazy_module_attributes(__name__, globals(), {
+    'AutoFeatureFactory': ('.auto_feature_factory', 'AutoFeatureFactory'),
+    'BaseResponseMessage': ('.base_response_message', 'BaseResponseMessage'),
+    'ChangeSet': ('.change_set', 'ChangeSet'),
+    'DataItemDependencyGraph': ('.dependency_graph', 'DataItemDependencyGraph'),
+    'NOT_DEFINABLE': ('.not_definable', 'NOT_DEFINABLE'),
+    'LookupFieldString': ('.lookup_field_string', 'LookupFieldString'),
+    'ResponseMessage': ('.response_message', 'ResponseMessage'),
+    'ResponseMessageList': ('.response_message_list', 'ResponseMessageList'),
+    'SingleDataItem': ('.single_data_item', 'SingleDataItem'),
+    'SingleDataItemCollection': ('.single_data_item_collection', 'SingleDataItemCollection'),
+    'UnorderedList': ('.unordered_list', 'UnorderedList'),
+})
@@ -1,19 +1,43 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional, TYPE_CHECKING
+import logging
+import threading
+import time
 
 
+from balderhub.data.lib.utils.instrumentation import measure_operation
 from balderhub.data.lib.utils.single_data_item import SingleDataItem
 
 if TYPE_CHECKING:
     from balderhub.data.lib.scenario_features.abstract_data_item_related_feature import AbstractDataItemRelatedFeature
 
+logger = logging.getLogger(__name__)
+
 
 class AutoFeatureFactory(ABC):
     """
     Base factory class for creating data-item bounded factories.
+
+    All created feature classes are cached per factory class. The cache is keyed by the data item class and the
+    (normalized) keyword arguments given to :meth:`AutoFeatureFactory.get_for`. The cache is thread-safe.
     """
-    _classes = {}
+    #: maximum number of feature classes that are cached for this factory - None for an unbounded cache (default)
+    #:
+    #: .. note::
+    #:     Evicted feature classes are created again on the next request. This creates a new (different) feature class,
+    #:     so only limit the cache if the same feature class is not requested again within one test session. Feature
+    #:     classes that are (or have subclasses that are) registered for a data item type (see
+    #:     :meth:`AbstractDataItemRelatedFeature.has_registered_features`) are never evicted, because the registered
+    #:     features could not be resolved over a new feature class anymore.
+    MAX_CACHED_CLASSES: Optional[int] = None
+
+    #: the caches of all factories (factory class -> (data item class, normalized kwargs) -> created feature class) -
+    #: every factory cache is ordered by the last usage
+    _caches: dict[type[AutoFeatureFactory], OrderedDict[tuple[type[SingleDataItem], Hashable], type]] = {}
+    #: lock that secures the caches (reentrant, because defining a class often requests classes of other factories)
+    _cache_lock = threading.RLock()
 
     @classmethod
     def get_for(cls, data_item_cls: type[SingleDataItem], **kwargs) -> type[AbstractDataItemRelatedFeature]:
@@ -22,14 +46,42 @@ class AutoFeatureFactory(ABC):
 
         :param data_item_cls: the single data-item class
         :param kwargs: optional further attributes that will be forwarded to internal method
-                       :meth:`AutoFeatureFactory.register_cls` and  :meth:`AutoFeatureFactory._define_class`.
+                       :meth:`AutoFeatureFactory.register_cls` and  :meth:`AutoFeatureFactory._define_class`. They are
+                       part of the cache key, so different values result in different feature classes.
         :return: the feature type class
         """
-        if cls not in cls._classes.keys():
-            cls._classes[cls] = {}
-        if data_item_cls not in cls._classes[cls]:
-            cls.register_cls(data_item_cls, **kwargs)
-        return cls._classes[cls][data_item_cls]
+        cache_key = cls._get_cache_key(data_item_cls, **kwargs)
+        with cls._cache_lock:
+            cache = cls._caches.setdefault(cls, OrderedDict())
+            if cache_key not in cache:
+                cls.register_cls(data_item_cls, **kwargs)
+            cache.move_to_end(cache_key)
+            return cache[cache_key]
+
+    @classmethod
+    def pregenerate(
+            cls,
+            data_item_types: Iterable[type[SingleDataItem]],
+            **kwargs
+    ) -> dict[type[SingleDataItem], float]:
+        """
+        Creates (and caches) the feature classes of this factory for all provided data item types in one pass. Call this
+        method at import time (f.e. in your `balderglob.py` file) to move the class creation out of the collection phase
+        of Balder.
+
+        :param data_item_types: the data item types the feature classes should be created for
+        :param kwargs: optional further attributes that are forwarded to :meth:`AutoFeatureFactory.get_for`
+        :return: a dictionary with the time (in seconds) the creation took for every data item type (near zero if the
+                 class was already cached before)
+        """
+        durations = {}
+        for cur_data_item_type in data_item_types:
+            start_time = time.perf_counter()
+            cls.get_for(cur_data_item_type, **kwargs)
+            durations[cur_data_item_type] = time.perf_counter() - start_time
+            logger.debug(f'{cls.__name__}: created feature class for `{cur_data_item_type.__name__}` in '
+                         f'{durations[cur_data_item_type] * 1000:.3f}ms')
+        return durations
 
     @classmethod
     @abstractmethod
@@ -51,6 +103,163 @@ class AutoFeatureFactory(ABC):
         :param data_item_cls: the data item type for which the feature should be defined
         :param kwargs: further attributes that are forwarded from :meth:`AutoFeatureFactory.get_for`
         """
-        if cls not in cls._classes.keys():
-            cls._classes[cls] = {}
-        cls._classes[cls][data_item_cls] = cls._define_class(data_item_cls, **kwargs)
+        cache_key = cls._get_cache_key(data_item_cls, **kwargs)
+        with cls._cache_lock:
+            with measure_operation(f'{cls.__qualname__}._define_class'):
+                new_feature_cls = cls._define_class(data_item_cls, **kwargs)
+            cache = cls._caches.setdefault(cls, OrderedDict())
+            cache[cache_key] = new_feature_cls
+            cache.move_to_end(cache_key)
+            if cls.MAX_CACHED_CLASSES is not None and len(cache) > max(cls.MAX_CACHED_CLASSES, 1):
+                cls._evict_classes(cache, max(cls.MAX_CACHED_CLASSES, 1))
+
+    @classmethod
+    def _evict_classes(cls, cache: OrderedDict[tuple[type[SingleDataItem], Hashable], type], max_size: int) -> None:
+        """
+        Removes the least recently used feature classes from the cache, till it holds at most `max_size` classes.
+        Feature classes with registered features are kept (see :attr:`AutoFeatureFactory.MAX_CACHED_CLASSES`).
+
+        :param cache: the cache of this factory
+        :param max_size: the maximum number of cached classes
+        """
+        # pylint: disable-next=import-outside-toplevel
+        from balderhub.data.lib.scenario_features.abstract_data_item_related_feature import \
+            AbstractDataItemRelatedFeature
+
+        # the most recently used class is never evicted - it was just requested
+        for cur_key, cur_feature_cls in list(cache.items())[:-1]:
+            if len(cache) <= max_size:
+                break
+            is_registered = issubclass(cur_feature_cls, AbstractDataItemRelatedFeature) \
+                and cur_feature_cls.has_registered_features()
+            if not is_registered:
+                del cache[cur_key]
+
+    @classmethod
+    def get_cached_classes(cls) -> dict[tuple[type[AutoFeatureFactory], type[SingleDataItem], Hashable], type]:
+        """
+        Returns all cached feature classes that were created by this factory. If this method is called on
+        :class:`AutoFeatureFactory` itself, it returns the cached classes of all factories.
+
+        :return: a dictionary with the cache key (tuple of factory class, data item class and normalized keyword
+                 arguments) and the created feature class
+        """
+        with cls._cache_lock:
+            return {
+                (cur_factory, *cur_key): cur_feature_cls
+                for cur_factory, cur_cache in cls._caches.items()
+                if cls is AutoFeatureFactory or cur_factory is cls
+                for cur_key, cur_feature_cls in cur_cache.items()
+            }
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """
+        Removes all cached feature classes of this factory. If this method is called on :class:`AutoFeatureFactory`
+        itself, it clears the cache of all factories.
+        """
+        with cls._cache_lock:
+            if cls is AutoFeatureFactory:
+                cls._caches.clear()
+            else:
+                cls._caches.pop(cls, None)
+
+    @classmethod
+    def _get_cache_key(
+            cls,
+            data_item_cls: type[SingleDataItem],
+            **kwargs
+    ) -> tuple[type[SingleDataItem], Hashable]:
+        """
+        Returns the cache key (within the cache of this factory) for the provided arguments of
+        :meth:`AutoFeatureFactory.get_for`.
+
+        :param data_item_cls: the data item type
+        :param kwargs: further attributes of :meth:`AutoFeatureFactory.get_for`
+        :return: the hashable cache key
+        """
+        return data_item_cls, cls._normalize_cache_value(kwargs)
+
+    @classmethod
+    def _normalize_cache_value(cls, value: Any) -> Hashable:
+        """
+        Converts a keyword argument value into a hashable and order independent representation.
+
+        :param value: the value that should be normalized
+        :return: the normalized value
+        """
+        if isinstance(value, dict):
+            return tuple(sorted(
+                ((cls._normalize_cache_value(cur_key), cls._normalize_cache_value(cur_value))
+                 for cur_key, cur_value in value.items()),
+                key=repr
+            ))
+        if isinstance(value, (list, tuple)):
+            return type(value).__name__, tuple(cls._normalize_cache_value(cur_elem) for cur_elem in value)
+        if isinstance(value, (set, frozenset)):
+            return 'set', frozenset(cls._normalize_cache_value(cur_elem) for cur_elem in value)
+        try:
+            hash(value)
+        except TypeError:
+            # unhashable objects are only equal to themselves
+            return 'id', id(value)
+        return value
+
+
+def get_default_factories() -> list[type[AutoFeatureFactory]]:
+    """
+    Returns all factories that are shipped with this package. The factories of the scenario-level are returned first,
+    because the setup-level factories are based on them. The factory of the `contrib.auth` package is only returned if
+    the optional dependency `balderhub-auth` is installed.
+
+    :return: a list of factory classes
+    """
+    # pylint: disable=import-outside-toplevel
+    from balderhub.data.lib import scenario_features, setup_features
+
+    factories = [
+        scenario_features.factories.AutoInitialDataConfigFactory,
+        scenario_features.factories.AutoAccessibleInitialDataConfigFactory,
+        setup_features.factories.AutoInitialDataConfigFactory,
+        setup_features.factories.AutoAccessibleInitialDataConfigFactory,
+    ]
+    try:
+        from balderhub.data.contrib.auth.setup_features.factories import AutoDataParamProviderFactory
+    except ImportError:
+        logger.debug('skip factory `AutoDataParamProviderFactory`, because `balderhub-auth` is not installed')
+    else:
+        factories.append(AutoDataParamProviderFactory)
+    return factories
+
+
+def pregenerate_factory_classes(
+        data_item_types: Iterable[type[SingleDataItem]],
+        factories: Optional[Iterable[type[AutoFeatureFactory]]] = None
+) -> dict[tuple[type[AutoFeatureFactory], type[SingleDataItem]], float]:
+    """
+    Creates the feature classes of all provided factories for all provided data item types in one pass (see
+    :meth:`AutoFeatureFactory.pregenerate`). Call this function at import time (f.e. in your `balderglob.py` file) to
+    move the class creation out of the collection phase of Balder.
+
+    .. code-block:: python
+
+        # balderglob.py
+        from balderhub.data.lib.utils.auto_feature_factory import pregenerate_factory_classes
+
+        pregenerate_factory_classes([BookDataItem, AuthorDataItem])
+
+    :param data_item_types: the data item types the feature classes should be created for
+    :param factories: the factories that should be used (default: all factories of :func:`get_default_factories`)
+    :return: a dictionary with the time (in seconds) the creation took for every factory and data item type
+    """
+    data_item_types = list(data_item_types)
+    factories = get_default_factories() if factories is None else list(factories)
+
+    start_time = time.perf_counter()
+    durations = {}
+    for cur_factory in factories:
+        for cur_data_item_type, cur_duration in cur_factory.pregenerate(data_item_types).items():
+            durations[(cur_factory, cur_data_item_type)] = cur_duration
+    logger.info(f'pregenerated {len(durations)} factory classes for {len(data_item_types)} data item types in '
+                f'{(time.perf_counter() - start_time) * 1000:.3f}ms')
+    return durations
@@ -0,0 +1,140 @@
+from __future__ import annotations
+from typing import Any, Iterable, Iterator, TYPE_CHECKING
+import contextlib
+import contextvars
+import threading
+
+if TYPE_CHECKING:
+    from .single_data_item import SingleDataItem
+
+
+#: all data items that are currently within a :meth:`SingleDataItem.batch_update` block of the current thread / async
+#: task (id of item -> state object) - the mapping is never changed in-place, every block sets a new one
+_NO_ACTIVE_BATCH_UPDATES: dict[int, BatchUpdateState] = {}
+_ACTIVE_BATCH_UPDATES: contextvars.ContextVar[dict[int, BatchUpdateState]] = contextvars.ContextVar(
+    'balderhub_data_active_batch_updates', default=_NO_ACTIVE_BATCH_UPDATES
+)
+#: number of open blocks in all threads - allows to skip the context variable lookup on every field assignment as long
+#: as no block is open at all
+_open_block_count = 0  # pylint: disable=invalid-name
+_open_block_count_lock = threading.Lock()
+
+
+def get_active_batch_updates() -> dict[int, BatchUpdateState]:
+    """
+    Returns the data items that are within a :meth:`SingleDataItem.batch_update` block of the current context. Blocks
+    are bound to the thread (and async task) they were entered in, so writes of other threads to the same data items
+    are validated as usual and are not part of the block.
+
+    :return: a read-only mapping of the ids of the data items to their batch update state
+    """
+    if not _open_block_count:
+        return _NO_ACTIVE_BATCH_UPDATES
+    return _ACTIVE_BATCH_UPDATES.get()
+
+
+def _change_open_block_count(difference: int) -> None:
+    global _open_block_count  # pylint: disable=global-statement,invalid-name
+    with _open_block_count_lock:
+        _open_block_count += difference
+
+
+class BatchUpdateState:
+    """
+    Internal state of a data item that is within a :meth:`SingleDataItem.batch_update` block.
+    """
+
+    def __init__(self):
+        #: number of nested `batch_update()` blocks for the data item
+        self.depth = 0
+        #: all data items with deferred writes (id of item -> (item, backup of its values, backup of its fields-set,
+        #: backup of its tracking state))
+        self._registered_items: dict[int, tuple[SingleDataItem, dict[str, Any], set[str], Any]] = {}
+
+    def register(self, item: SingleDataItem) -> None:
+        """
+        Registers a data item that receives writes without validation. The current values of the item are backed up,
+        so that they can be restored with :meth:`BatchUpdateState.rollback`.
+
+        :param item: the data item that should be registered
+        """
+        if id(item) not in self._registered_items:
+            self._registered_items[id(item)] = (
+                # pylint: disable-next=protected-access
+                item, item.__dict__.copy(), set(item.__pydantic_fields_set__), item._get_tracking_backup()
+            )
+
+    def validate(self) -> None:
+        """
+        Validates the current values of all registered data items. Values that are converted by pydantic (f.e. nested
+        dictionaries) are taken over into the data items.
+        """
+        for item, _, _, _ in self._registered_items.values():
+            validated_item = item.__class__.model_validate(item.__dict__)
+            item.__dict__.update(validated_item.__dict__)
+            # converted values are new nested data items
+            item._notify_observers()  # pylint: disable=protected-access
+
+    def rollback(self) -> None:
+        """
+        Restores all registered data items to their state before they were registered.
+        """
+        for item, values_backup, fields_set_backup, tracking_backup in self._registered_items.values():
+            item.__dict__.clear()
+            item.__dict__.update(values_backup)
+            item.__pydantic_fields_set__.clear()
+            item.__pydantic_fields_set__.update(fields_set_backup)
+            # pylint: disable-next=protected-access
+            item._restore_tracking_backup(tracking_backup)
+
+
+@contextlib.contextmanager
+def batch_update_items(items: Iterable[SingleDataItem]) -> Iterator[list[SingleDataItem]]:
+    """
+    Context manager that defers the pydantic assignment validation for all provided data items till the end of the
+    block (see :meth:`SingleDataItem.batch_update`). The final state of all items is validated when leaving the block.
+    If the validation of one item fails (or the block raises an exception), all items are restored to the state they
+    had before entering the block.
+
+    :param items: the data items that should be updated within the block
+    :return: the context manager that returns the list of data items on enter
+    """
+    items = list(items)
+    active_batch_updates = dict(_ACTIVE_BATCH_UPDATES.get())
+    for cur_item in items:
+        state = active_batch_updates.get(id(cur_item))
+        if state is None:
+            state = BatchUpdateState()
+            state.register(cur_item)
+            active_batch_updates[id(cur_item)] = state
+        state.depth += 1
+    _change_open_block_count(1)
+    token = _ACTIVE_BATCH_UPDATES.set(active_batch_updates)
+
+    def finish_outer_blocks() -> list[BatchUpdateState]:
+        finished_states = []
+        for cur_item in items:
+            cur_state = active_batch_updates[id(cur_item)]
+            cur_state.depth -= 1
+            if cur_state.depth == 0:
+                finished_states.append(cur_state)
+        # restore the data items of the outer blocks
+        _ACTIVE_BATCH_UPDATES.reset(token)
+        _change_open_block_count(-1)
+        return finished_states
+
+    try:
+        yield items
+    except BaseException:
+        for cur_state in finish_outer_blocks():
+            cur_state.rollback()
+        raise
+
+    finished_states = finish_outer_blocks()
+    try:
+        for cur_state in finished_states:
+            cur_state.validate()
+    except BaseException:
+        for cur_state in finished_states:
+            cur_state.rollback()
+        raise
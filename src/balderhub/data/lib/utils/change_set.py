@@ -0,0 +1,41 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Type, Union
+import dataclasses
+
+from .single_data_item import SingleDataItem
+
+
+@dataclasses.dataclass
+class ChangeSet:
+    """
+    Describes the difference between the data of a data environment and the state that was synced with the related
+    system last time. It is computed by :meth:`DataEnvironmentFeature.compute_change_set`.
+    """
+    #: the data items that were not synced yet, per data item type
+    created: Dict[Type[SingleDataItem], List[SingleDataItem]] = dataclasses.field(default_factory=dict)
+    #: the data items that were changed since the last sync, per data item type
+    updated: Dict[Type[SingleDataItem], List[SingleDataItem]] = dataclasses.field(default_factory=dict)
+    #: the unique identifications of the synced data items that do not exist anymore, per data item type (the type
+    #: key is the qualified type name string if the type is not known in the environment anymore)
+    deleted: Dict[Union[Type[SingleDataItem], str], List[Any]] = dataclasses.field(default_factory=dict)
+    #: the digests of all created and updated data items, keyed by `(data item type, unique identification)`
+    item_digests: Dict[tuple[Type[SingleDataItem], Any], str] = dataclasses.field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return sum(len(cur_list) for cur_dict in (self.created, self.updated, self.deleted)
+                   for cur_list in cur_dict.values())
+
+    def is_empty(self) -> bool:
+        """
+        :return: True if there is nothing to sync
+        """
+        return len(self) == 0
+
+    def __repr__(self) -> str:
+        def _summary(changes: dict) -> str:
+            return ', '.join(
+                f'{cur_type if isinstance(cur_type, str) else cur_type.__name__}: {len(cur_list)}'
+                for cur_type, cur_list in changes.items()
+            )
+        return (f'ChangeSet(created=[{_summary(self.created)}], updated=[{_summary(self.updated)}], '
+                f'deleted=[{_summary(self.deleted)}])')
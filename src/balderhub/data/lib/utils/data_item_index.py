@@ -0,0 +1,566 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TYPE_CHECKING
+import bisect
+import itertools
+
+from .lookup_field_string import LookupFieldString
+from .tracked_model import TrackedModel
+
+if TYPE_CHECKING:
+    from .single_data_item import SingleDataItem
+
+
+class HashIndex:
+    """
+    Index that maps the values of one field lookup to the data items having this value. The data items of one value
+    are kept in the order they were added.
+    """
+
+    def __init__(self, field_lookup: str):
+        #: the indexed field lookup
+        self.field_lookup = field_lookup
+        #: the split field lookup (it is resolved for many data items, so it is only split once)
+        self._field_keys = LookupFieldString(field_lookup).split_field_keys
+        #: False if the index can not be used, because a data item has an unhashable value or the lookup could not be
+        #: resolved for it
+        self.usable = True
+        #: maps the field value to the data items (keyed by their sequence number) with this value
+        self._buckets: Dict[Any, Dict[int, SingleDataItem]] = {}
+        #: the value and sequence number every data item was added with (keyed by the `id()` of the data item)
+        self._values: Dict[int, tuple[Any, int]] = {}
+        #: the values whose bucket is not ordered by the sequence numbers (after :meth:`HashIndex.update`)
+        self._unordered_values: set = set()
+        self._sequence = itertools.count()
+
+    def _get_value(self, item: SingleDataItem) -> Any:
+        return item._get_field_value_by_keys(self._field_keys)  # pylint: disable=protected-access
+
+    def build(self, items: Iterable[SingleDataItem]) -> None:
+        """
+        Replaces the content of the index with the provided data items.
+
+        :param items: the data items in the order they should be kept for equal values
+        """
+        self.usable = True
+        self.clear()
+        for cur_item in items:
+            self.add(cur_item)
+
+    def add(self, item: SingleDataItem) -> None:
+        """
+        Adds a data item to the index.
+
+        :param item: the data item
+        """
+        if not self.usable:
+            return
+        try:
+            value = self._get_value(item)
+            bucket = self._buckets.setdefault(value, {})
+        except (KeyError, TypeError):
+            self.usable = False
+            self.clear()
+            return
+        sequence_number = next(self._sequence)
+        bucket[sequence_number] = item
+        self._values[id(item)] = (value, sequence_number)
+
+    def remove(self, item: SingleDataItem) -> None:
+        """
+        Removes a data item from the index.
+
+        :param item: the data item
+        """
+        if id(item) not in self._values:
+            return
+        value, sequence_number = self._values.pop(id(item))
+        bucket = self._buckets[value]
+        del bucket[sequence_number]
+        if not bucket:
+            del self._buckets[value]
+
+    def replace(self, old_item: SingleDataItem, new_item: SingleDataItem) -> None:
+        """
+        Replaces a data item by another one with the same value (f.e. its snapshot) at the same position.
+
+        :param old_item: the data item within the index
+        :param new_item: the data item that replaces it
+        """
+        if id(old_item) not in self._values:
+            return
+        value, sequence_number = self._values.pop(id(old_item))
+        self._buckets[value][sequence_number] = new_item
+        self._values[id(new_item)] = (value, sequence_number)
+
+    def update(self, item: SingleDataItem) -> None:
+        """
+        Moves a changed data item to the bucket of its current value. It keeps its position relative to the other data
+        items.
+
+        :param item: the data item
+        """
+        if not self.usable or id(item) not in self._values:
+            return
+        old_value, sequence_number = self._values[id(item)]
+        try:
+            value = self._get_value(item)
+            if value == old_value:
+                return
+            bucket = self._buckets.setdefault(value, {})
+        except (KeyError, TypeError):
+            self.usable = False
+            self.clear()
+            return
+        self.remove(item)
+        if bucket and next(reversed(bucket)) > sequence_number:
+            self._unordered_values.add(value)
+        bucket[sequence_number] = item
+        self._values[id(item)] = (value, sequence_number)
+
+    def clear(self) -> None:
+        """
+        Removes all data items from the index.
+        """
+        self._buckets.clear()
+        self._values.clear()
+        self._unordered_values.clear()
+
+    def lookup(self, value: Any) -> Optional[List[SingleDataItem]]:
+        """
+        :param value: the requested value
+        :return: the data items with this value or None if the index can not answer the request
+        """
+        if not self.usable:
+            return None
+        try:
+            bucket = self._buckets.get(value, {})
+            if value in self._unordered_values:
+                self._unordered_values.discard(value)
+                bucket = self._buckets[value] = dict(sorted(bucket.items()))
+        except TypeError:
+            # unhashable value
+            return None
+        return list(bucket.values())
+
+
+class SortedIndex:
+    """
+    Index that keeps the data items ordered by the value of one field lookup (data items with the same value are kept
+    in the order they were added). It answers range queries and ordered requests without sorting the data items.
+    """
+
+    def __init__(self, field_lookup: str):
+        #: the indexed field lookup
+        self.field_lookup = field_lookup
+        #: the split field lookup (it is resolved for many data items, so it is only split once)
+        self._field_keys = LookupFieldString(field_lookup).split_field_keys
+        #: False if the index can not be used, because a data item has a value that can not be compared with the
+        #: values of the other data items or the lookup could not be resolved for it
+        self.usable = True
+        #: the sorted keys `(value, sequence number)` of all data items
+        self._keys: List[tuple[Any, int]] = []
+        #: the data items in the same order as the keys
+        self._items: List[SingleDataItem] = []
+        #: the key every data item was added with (keyed by the `id()` of the data item)
+        self._item_keys: Dict[int, tuple[Any, int]] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _get_value(self, item: SingleDataItem) -> Any:
+        return item._get_field_value_by_keys(self._field_keys)  # pylint: disable=protected-access
+
+    def build(self, items: Iterable[SingleDataItem]) -> None:
+        """
+        Replaces the content of the index with the provided data items. The data items are sorted once, so it is much
+        cheaper than adding them one by one.
+
+        :param items: the data items in the order they should be kept for equal values
+        """
+        self.usable = True
+        self.clear()
+        try:
+            entries = [((self._get_value(cur_item), next(self._sequence)), cur_item) for cur_item in items]
+            # the sequence numbers are unique -> the data items themselves are never compared
+            entries.sort(key=lambda entry: entry[0])
+        except (KeyError, TypeError):
+            self.usable = False
+            return
+        self._keys = [cur_key for cur_key, _ in entries]
+        self._items = [cur_item for _, cur_item in entries]
+        self._item_keys = {id(cur_item): cur_key for cur_key, cur_item in entries}
+
+    def add(self, item: SingleDataItem) -> None:
+        """
+        Adds a data item to the index.
+
+        :param item: the data item
+        """
+        if not self.usable:
+            return
+        try:
+            key = (self._get_value(item), next(self._sequence))
+            position = bisect.bisect_right(self._keys, key)
+        except (KeyError, TypeError):
+            self.usable = False
+            self.clear()
+            return
+        self._keys.insert(position, key)
+        self._items.insert(position, item)
+        self._item_keys[id(item)] = key
+
+    def remove(self, item: SingleDataItem) -> None:
+        """
+        Removes a data item from the index.
+
+        :param item: the data item
+        """
+        key = self._item_keys.pop(id(item), None)
+        if key is None:
+            return
+        position = bisect.bisect_left(self._keys, key)
+        del self._keys[position]
+        del self._items[position]
+
+    def replace(self, old_item: SingleDataItem, new_item: SingleDataItem) -> None:
+        """
+        Replaces a data item by another one with the same value (f.e. its snapshot) at the same position.
+
+        :param old_item: the data item within the index
+        :param new_item: the data item that replaces it
+        """
+        key = self._item_keys.pop(id(old_item), None)
+        if key is None:
+            return
+        self._items[bisect.bisect_left(self._keys, key)] = new_item
+        self._item_keys[id(new_item)] = key
+
+    def update(self, item: SingleDataItem) -> None:
+        """
+        Moves a changed data item to the position of its current value. Within equal values, it keeps its position
+        relative to the other data items.
+
+        :param item: the data item
+        """
+        if not self.usable or id(item) not in self._item_keys:
+            return
+        old_key = self._item_keys[id(item)]
+        try:
+            key = (self._get_value(item), old_key[1])
+            if key[0] == old_key[0]:
+                return
+            self.remove(item)
+            position = bisect.bisect_right(self._keys, key)
+        except (KeyError, TypeError):
+            self.usable = False
+            self.clear()
+            return
+        self._keys.insert(position, key)
+        self._items.insert(position, item)
+        self._item_keys[id(item)] = key
+
+    def clear(self) -> None:
+        """
+        Removes all data items from the index.
+        """
+        self._keys.clear()
+        self._items.clear()
+        self._item_keys.clear()
+
+    def get_range(
+            self,
+            lower: Any = None,
+            upper: Any = None,
+            include_lower: bool = True,
+            include_upper: bool = True
+    ) -> List[SingleDataItem]:
+        """
+        Returns all data items with a value within the range.
+
+        :param lower: the lower limit (None for no limit)
+        :param upper: the upper limit (None for no limit)
+        :param include_lower: True if values equal to the lower limit are part of the range
+        :param include_upper: True if values equal to the upper limit are part of the range
+        :return: the data items in ascending order of their values
+        """
+        start, end = 0, len(self._keys)
+        values = _KeyValues(self._keys)
+        if lower is not None:
+            start = (bisect.bisect_left if include_lower else bisect.bisect_right)(values, lower)
+        if upper is not None:
+            end = (bisect.bisect_right if include_upper else bisect.bisect_left)(values, upper)
+        return self._items[start:end] if start < end else []
+
+    def iter_ordered(self, reverse: bool = False) -> Iterator[SingleDataItem]:
+        """
+        Iterates over the data items ordered by their values. Data items with equal values are returned in the order
+        they were added - also in reversed order (like `sorted(..., reverse=True)`).
+
+        :param reverse: True to iterate in descending order
+        :return: an iterator over the data items
+        """
+        if not reverse:
+            yield from self._items
+            return
+        end = len(self._keys)
+        while end > 0:
+            # all data items with the same value are returned in the order they were added
+            start = bisect.bisect_left(_KeyValues(self._keys), self._keys[end - 1][0], 0, end)
+            yield from self._items[start:end]
+            end = start
+
+
+class _KeyValues:
+    """
+    Sequence view on the values of the keys of a :class:`SortedIndex`, used for bisecting by value only.
+    """
+
+    def __init__(self, keys: List[tuple[Any, int]]):
+        self._keys = keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __getitem__(self, position: int) -> Any:
+        return self._keys[position][0]
+
+
+# pylint: disable-next=too-many-instance-attributes
+class DataItemIndexes:
+    """
+    Holds the hash and sorted indexes of one data item type (see :meth:`SingleDataItem.get_indexed_fields` and
+    :meth:`SingleDataItem.get_sorted_indexed_fields`) or of one collection. The indexes are maintained on insertion and
+    removal. The indexed data items (and their nested data items along the indexed field lookups) notify the indexes
+    about their changes (see :meth:`TrackedModel._add_observer`), so only the changed data items are updated on the
+    next request.
+    """
+
+    def __init__(
+            self,
+            field_lookups: Iterable[str],
+            source: Callable[[], Iterable[SingleDataItem]],
+            sorted_field_lookups: Iterable[str] = ()
+    ):
+        """
+        :param field_lookups: the field lookups with a hash index
+        :param source: callable that returns all data items, used for rebuilding the indexes
+        :param sorted_field_lookups: the field lookups with a sorted index
+        """
+        self._indexes = {cur_lookup: HashIndex(cur_lookup) for cur_lookup in field_lookups}
+        self._sorted_indexes = {cur_lookup: SortedIndex(cur_lookup) for cur_lookup in sorted_field_lookups}
+        self._source = source
+        #: False if the indexes need to be (re)built from the source on the next request - they are built on the
+        #: first request, so data items that are added before (f.e. while loading an environment) are not inserted
+        #: one by one
+        self._valid = False
+        #: the indexed data items (keyed by their `id()`)
+        self._items: Dict[int, SingleDataItem] = {}
+        #: the observed models of every indexed data item (keyed by the `id()` of the data item) - the data item itself
+        #: and its nested data items along the indexed field lookups
+        self._observed_models: Dict[int, List[TrackedModel]] = {}
+        #: the ids of the indexed data items an observed model belongs to (keyed by the `id()` of the model)
+        self._item_ids_of_model: Dict[int, set[int]] = {}
+        #: the indexed data items that were changed since the last request (keyed by their `id()`)
+        self._changed_items: Dict[int, SingleDataItem] = {}
+        #: increased whenever a data item is added or removed
+        self._version = 0
+        #: the split field lookups of all indexes without their last field (the nested data items on the way are
+        #: observed) - None if they need to be determined again
+        self._nested_paths: Optional[List[List[str]]] = None
+
+    @property
+    def version(self) -> int:
+        """
+        :return: a counter that is increased whenever a data item is added or removed - holders of the indexes can
+                 remember it to detect that the indexes do not hold the same data items anymore
+        """
+        return self._version
+
+    @property
+    def field_lookups(self) -> List[str]:
+        """
+        :return: the field lookups with a hash index
+        """
+        return list(self._indexes.keys())
+
+    @property
+    def sorted_field_lookups(self) -> List[str]:
+        """
+        :return: the field lookups with a sorted index
+        """
+        return list(self._sorted_indexes.keys())
+
+    def _all_indexes(self) -> List[HashIndex | SortedIndex]:
+        return [*self._indexes.values(), *self._sorted_indexes.values()]
+
+    def add_index(self, field_lookup: str, ordered: bool = False) -> None:
+        """
+        Adds a new index, that is built on the next request.
+
+        :param field_lookup: the field lookup that should be indexed
+        :param ordered: True for a sorted index, False for a hash index
+        """
+        if ordered:
+            self._sorted_indexes[field_lookup] = SortedIndex(field_lookup)
+        else:
+            self._indexes[field_lookup] = HashIndex(field_lookup)
+        self._nested_paths = None
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """
+        Marks the indexes as outdated, so that they are rebuilt on the next request.
+        """
+        self._valid = False
+
+    def _observe(self, item: SingleDataItem) -> None:
+        """
+        Registers this object as observer of the data item and of its nested data items along the indexed field
+        lookups.
+        """
+        if self._nested_paths is None:
+            self._nested_paths = [
+                LookupFieldString(cur_lookup).split_field_keys[:-1]
+                for cur_lookup in itertools.chain(self._indexes, self._sorted_indexes)
+            ]
+        models = {id(item): item}
+        for cur_path in self._nested_paths:
+            cur_model = item
+            for cur_field_name in cur_path:
+                cur_model = cur_model.__dict__.get(cur_field_name)
+                if not isinstance(cur_model, TrackedModel):
+                    break
+                models[id(cur_model)] = cur_model
+        for cur_model in models.values():
+            item_ids = self._item_ids_of_model.setdefault(id(cur_model), set())
+            if not item_ids:
+                cur_model._add_observer(self)  # pylint: disable=protected-access
+            item_ids.add(id(item))
+        self._observed_models[id(item)] = list(models.values())
+
+    def _unobserve(self, item: SingleDataItem) -> None:
+        """
+        Removes the registrations of :meth:`DataItemIndexes._observe`.
+        """
+        for cur_model in self._observed_models.pop(id(item), []):
+            item_ids = self._item_ids_of_model[id(cur_model)]
+            item_ids.discard(id(item))
+            if not item_ids:
+                del self._item_ids_of_model[id(cur_model)]
+                cur_model._remove_observer(self)  # pylint: disable=protected-access
+
+    def item_changed(self, model: TrackedModel) -> None:
+        """
+        Called by the observed models (see :meth:`TrackedModel._add_observer`) after they were changed. The indexed data
+        items the model belongs to are updated on the next request.
+
+        :param model: the changed data item or nested data item
+        """
+        if not self._valid:
+            return
+        for cur_item_id in self._item_ids_of_model.get(id(model), ()):
+            self._changed_items[cur_item_id] = self._items[cur_item_id]
+
+    def add(self, item: SingleDataItem) -> None:
+        """
+        Adds a data item to all indexes.
+
+        :param item: the data item
+        """
+        self._version += 1
+        if not self._valid:
+            return
+        for cur_index in self._all_indexes():
+            cur_index.add(item)
+        self._items[id(item)] = item
+        self._observe(item)
+
+    def remove(self, item: SingleDataItem) -> None:
+        """
+        Removes a data item from all indexes.
+
+        :param item: the data item
+        """
+        self._version += 1
+        if not self._valid:
+            return
+        for cur_index in self._all_indexes():
+            cur_index.remove(item)
+        self._items.pop(id(item), None)
+        self._changed_items.pop(id(item), None)
+        self._unobserve(item)
+
+    def replace(self, old_item: SingleDataItem, new_item: SingleDataItem) -> None:
+        """
+        Replaces a data item by another one with the same values (f.e. its snapshot) in all indexes. The position of
+        the data item within the indexes is kept.
+
+        :param old_item: the data item within the indexes
+        :param new_item: the data item that replaces it
+        """
+        if not self._valid or id(old_item) not in self._items:
+            return
+        for cur_index in self._all_indexes():
+            cur_index.replace(old_item, new_item)
+        del self._items[id(old_item)]
+        self._items[id(new_item)] = new_item
+        self._unobserve(old_item)
+        self._observe(new_item)
+        if self._changed_items.pop(id(old_item), None) is not None:
+            self._changed_items[id(new_item)] = new_item
+
+    def _refresh(self) -> None:
+        all_indexes = self._all_indexes()
+        if not self._valid:
+            for cur_item in list(self._items.values()):
+                self._unobserve(cur_item)
+            self._items.clear()
+            self._changed_items.clear()
+            items = list(self._source())
+            for cur_index in all_indexes:
+                cur_index.build(items)
+            for cur_item in items:
+                self._items[id(cur_item)] = cur_item
+                self._observe(cur_item)
+            self._valid = True
+            return
+        while self._changed_items:
+            _, cur_item = self._changed_items.popitem()
+            for cur_index in all_indexes:
+                cur_index.update(cur_item)
+            # the nested data items along the field lookups could have been replaced
+            self._unobserve(cur_item)
+            self._observe(cur_item)
+
+    def get_sorted_index(self, field_lookup: str) -> Optional[SortedIndex]:
+        """
+        :param field_lookup: the field lookup
+        :return: the up-to-date sorted index of the field lookup or None if there is no usable one
+        """
+        if field_lookup not in self._sorted_indexes:
+            return None
+        self._refresh()
+        index = self._sorted_indexes[field_lookup]
+        return index if index.usable else None
+
+    def find_candidates(self, filters: Dict[str, Any]) -> Optional[tuple[List[SingleDataItem], str]]:
+        """
+        Returns the data items that match one of the filters, determined by the most selective usable index. The
+        candidates still need to be checked against the other filters.
+
+        :param filters: the requested field lookups and their values
+        :return: a tuple with the candidates (in the order they were added) and the field lookup they match, or None if
+                 no index can answer the request
+        """
+        indexed_lookups = [cur_lookup for cur_lookup in filters.keys() if cur_lookup in self._indexes]
+        if not indexed_lookups:
+            return None
+        self._refresh()
+        candidates = None
+        matched_lookup = None
+        for cur_lookup in indexed_lookups:
+            cur_candidates = self._indexes[cur_lookup].lookup(filters[cur_lookup])
+            if cur_candidates is not None and (candidates is None or len(cur_candidates) < len(candidates)):
+                candidates, matched_lookup = cur_candidates, cur_lookup
+        return None if candidates is None else (candidates, matched_lookup)
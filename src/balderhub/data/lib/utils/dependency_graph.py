@@ -0,0 +1,146 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Type
+
+from .single_data_item import SingleDataItem
+
+
+class DataItemDependencyGraph:
+    """
+    Describes which data item types reference which other data item types. A data item type depends on all data item
+    types that are used in its fields - directly (also optional) or as element type of a list (see
+    :meth:`SingleDataItem.get_nested_data_item_fields`). References of a type to itself are ignored. Data item types
+    that reference each other (directly or over other types) are ordered by the order they were added to the graph.
+    """
+
+    def __init__(self, data_item_types: Iterable[Type[SingleDataItem]], include_referenced_types: bool = False):
+        """
+        :param data_item_types: the data item types of the graph
+        :param include_referenced_types: True if all (also indirectly) referenced data item types should be added to
+                                         the graph too, otherwise references to types that are not part of
+                                         `data_item_types` are ignored
+        """
+        #: maps every data item type to the data item types it references (in the order of the nodes)
+        self._dependencies: Dict[Type[SingleDataItem], List[Type[SingleDataItem]]] = {}
+
+        pending = list(data_item_types)
+        for cur_type in pending:
+            self._dependencies.setdefault(cur_type, [])
+        while pending:
+            cur_type = pending.pop(0)
+            for cur_nested_type, _ in cur_type.get_nested_data_item_fields().values():
+                if cur_nested_type not in self._dependencies and include_referenced_types:
+                    self._dependencies[cur_nested_type] = []
+                    pending.append(cur_nested_type)
+                if (cur_nested_type in self._dependencies and cur_nested_type is not cur_type
+                        and cur_nested_type not in self._dependencies[cur_type]):
+                    self._dependencies[cur_type].append(cur_nested_type)
+
+    @property
+    def data_item_types(self) -> List[Type[SingleDataItem]]:
+        """
+        :return: all data item types of this graph
+        """
+        return list(self._dependencies.keys())
+
+    def get_dependencies(self, data_item_type: Type[SingleDataItem]) -> List[Type[SingleDataItem]]:
+        """
+        :param data_item_type: the data item type
+        :return: the data item types of the graph that are directly referenced by the given type
+        """
+        return list(self._dependencies[data_item_type])
+
+    def get_dependents(self, data_item_type: Type[SingleDataItem]) -> List[Type[SingleDataItem]]:
+        """
+        :param data_item_type: the data item type
+        :return: the data item types of the graph that directly reference the given type
+        """
+        return [cur_type for cur_type, cur_dependencies in self._dependencies.items()
+                if data_item_type in cur_dependencies]
+
+    def get_layers(self) -> List[List[Type[SingleDataItem]]]:
+        """
+        Returns the data item types grouped in layers. Every type only depends on types of previous layers, so all
+        types of the same layer are independent of each other and can be processed in parallel.
+
+        Data item types that reference each other in a cycle can not be ordered by their dependencies. They are placed
+        in consecutive layers instead (in the order they were added to the graph), so that they are processed one after
+        another, after all types they reference outside of the cycle.
+
+        :return: a list of layers, every layer is a list of data item types (in the order they were added to the graph)
+        """
+        order = {cur_type: cur_idx for cur_idx, cur_type in enumerate(self._dependencies)}
+        components = self._get_strongly_connected_components()
+        component_of_type = {cur_type: cur_idx for cur_idx, cur_component in enumerate(components)
+                             for cur_type in cur_component}
+        remaining = {
+            cur_idx: {component_of_type[cur_dependency] for cur_type in cur_component
+                      for cur_dependency in self._dependencies[cur_type]} - {cur_idx}
+            for cur_idx, cur_component in enumerate(components)
+        }
+        layers = []
+        while remaining:
+            ready = [cur_idx for cur_idx, cur_dependencies in remaining.items() if not cur_dependencies]
+            for cur_idx in ready:
+                del remaining[cur_idx]
+            for cur_dependencies in remaining.values():
+                cur_dependencies.difference_update(ready)
+            # the types of one cycle are spread over consecutive layers
+            for cur_position in range(max(len(components[cur_idx]) for cur_idx in ready)):
+                layers.append(sorted(
+                    [components[cur_idx][cur_position] for cur_idx in ready if cur_position < len(components[cur_idx])],
+                    key=order.__getitem__
+                ))
+        return layers
+
+    def get_topological_order(self) -> List[Type[SingleDataItem]]:
+        """
+        :return: all data item types of the graph, every type is placed after the types it references (see
+                 :meth:`DataItemDependencyGraph.get_layers` for types that reference each other in a cycle)
+        """
+        return [cur_type for cur_layer in self.get_layers() for cur_type in cur_layer]
+
+    def _get_strongly_connected_components(self) -> List[List[Type[SingleDataItem]]]:
+        """
+        :return: the groups of data item types that reference each other (directly or over other types) - a type that
+                 is not part of a cycle builds its own group, the types of a group are in the order they were added to
+                 the graph
+        """
+        # iterative version of Tarjan's algorithm
+        order = {cur_type: cur_idx for cur_idx, cur_type in enumerate(self._dependencies)}
+        index_of = {}
+        low_link = {}
+        stack = []
+        on_stack = set()
+        components = []
+        for cur_root, cur_root_dependencies in self._dependencies.items():
+            if cur_root in index_of:
+                continue
+            work = [(cur_root, iter(cur_root_dependencies))]
+            index_of[cur_root] = low_link[cur_root] = len(index_of)
+            stack.append(cur_root)
+            on_stack.add(cur_root)
+            while work:
+                cur_type, dependencies = work[-1]
+                next_type = next(dependencies, None)
+                if next_type is not None:
+                    if next_type not in index_of:
+                        index_of[next_type] = low_link[next_type] = len(index_of)
+                        stack.append(next_type)
+                        on_stack.add(next_type)
+                        work.append((next_type, iter(self._dependencies[next_type])))
+                    elif next_type in on_stack:
+                        low_link[cur_type] = min(low_link[cur_type], index_of[next_type])
+                    continue
+                work.pop()
+                if work:
+                    low_link[work[-1][0]] = min(low_link[work[-1][0]], low_link[cur_type])
+                if low_link[cur_type] == index_of[cur_type]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member is cur_type:
+                            break
+                    components.append(sorted(component, key=order.__getitem__))
+        return components
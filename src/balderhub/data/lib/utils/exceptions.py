@@ -6,7 +6,25 @@ class MisconfiguredDataItemError(Exception):
     """
 
 
+class MissingDataItemFieldsError(Exception):
+    """
+    exception that is thrown if a data item is created without validation, but required fields are not provided
+    """
+
+
 class DuplicateDataObjectError(Exception):
     """
     exception for duplicated data objects
     """
+
+
+class ReferentialIntegrityError(Exception):
+    """
+    exception that is thrown if data items of a data environment reference data items that do not exist in it
+    """
+
+    def __init__(self, violations: list[str]):
+        #: the descriptions of all found violations
+        self.violations = violations
+        super().__init__(f'found {len(violations)} referential integrity violation(s) in the data environment:\n'
+                         + '\n'.join(f'  - {cur_violation}' for cur_violation in violations))
@@ -1,4 +1,4 @@
-from typing import Union, Any
+from typing import Union, Any, Iterable, Optional
 
 from .not_definable import NOT_DEFINABLE
 from .lookup_field_string import LookupFieldString
@@ -15,41 +15,86 @@ def convert_field_lookups_to_dict_structure(dictionary: Union[dict, list], neste
         >>> convert_field_lookups_to_dict_structure({'a__d': 3.2, 'a__b__c': 2, 'a__b__d': 3, 'a__c': 'H', 'b': 3})
         {'a': {'d': 3.2, 'b': {'c': 2, 'd': 3}, 'c': 'H'}, 'b': 3}
 
+    .. note::
+        If you need to convert a lot of records, use :func:`convert_many_field_lookups_to_dict_structure`, which reuses
+        the split lookup keys between all records.
+
     :param dictionary: a flat dictionary with field-lookups as keys and their values as values.
     :param nested: False if the function should only return the first level - True if it should return nested
                    directories.
     :return: the converted (nested) dictionary
+    :raises TypeError: if a lookup field requires a nested dictionary at a key that already holds another value
     """
     if isinstance(dictionary, list):
-        return [convert_field_lookups_to_dict_structure(cur_item) for cur_item in dictionary]
+        return convert_many_field_lookups_to_dict_structure(dictionary, nested=nested)
+    return _build_dict_structure(dictionary, nested, {})
 
-    result = {}
-    # sort by first-part-key
-    for cur_lookup_key, cur_value in dictionary.items():
-        # if there is already another dict structure inside it - make sure that this one is already converted
-        if isinstance(cur_value, dict) and nested:
-            cur_value = convert_field_lookups_to_dict_structure(cur_value, nested)
-
-        if '__' in cur_lookup_key:
-            first_part_of_key, remaining_part_of_key = cur_lookup_key.split('__', 1)
-
-            # this is a nested key
-            if first_part_of_key not in result.keys():
-                result[first_part_of_key] = {}
-            # TODO work around -> FIX IT!!!
-            if result[first_part_of_key] is None:
-                result[first_part_of_key] = {}
-            # add subkey
-            result[first_part_of_key][remaining_part_of_key] = cur_value
-        else:
-            result[cur_lookup_key] = cur_value
 
+def convert_many_field_lookups_to_dict_structure(records: Iterable[dict], nested=True) -> list[dict]:
+    """
+    Batch version of :func:`convert_field_lookups_to_dict_structure`. It converts every record of the provided iterable
+    and reuses the split lookup keys between all records (records of the same source normally share the same keys).
+
+    :param records: an iterable of flat dictionaries with field-lookups as keys
+    :param nested: False if the function should only return the first level - True if it should return nested
+                   directories.
+    :return: a list with the converted (nested) dictionaries
+    """
+    split_cache = {}
+    return [_build_dict_structure(cur_record, nested, split_cache) for cur_record in records]
+
+
+def _build_dict_structure(dictionary: dict, nested: bool, split_cache: dict[str, tuple[str, ...]]) -> dict:
+    """
+    Internal helper that converts one flat dictionary into the nested dictionary structure within a single pass.
+
+    :param dictionary: the flat dictionary with field-lookups as keys
+    :param nested: False if the function should only return the first level
+    :param split_cache: a dictionary that caches the split lookup keys (shared between multiple calls)
+    :return: the converted dictionary
+    """
+    result = {}
     if not nested:
+        for cur_lookup_key, cur_value in dictionary.items():
+            first_part_of_key, separator, remaining_part_of_key = cur_lookup_key.partition('__')
+            if not separator:
+                result[cur_lookup_key] = cur_value
+                continue
+            sub_dict = result.get(first_part_of_key)
+            if sub_dict is None:
+                sub_dict = result[first_part_of_key] = {}
+            sub_dict[remaining_part_of_key] = cur_value
         return result
 
-    for cur_key, cur_value in result.items():
-        if isinstance(cur_value, dict):
-            result[cur_key] = convert_field_lookups_to_dict_structure(result[cur_key], nested=True)
+    # explicit stack of (target dictionary, iterator over the remaining source items) - values that are dictionaries
+    # are converted directly (depth-first), so the result does not depend on the order of processing
+    stack = [(result, iter(dictionary.items()))]
+    while stack:
+        target, source_items = stack[-1]
+        for cur_lookup_key, cur_value in source_items:
+            key_parts = split_cache.get(cur_lookup_key)
+            if key_parts is None:
+                key_parts = split_cache[cur_lookup_key] = tuple(cur_lookup_key.split('__'))
+
+            cur_target = target
+            for cur_key_part in key_parts[:-1]:
+                sub_dict = cur_target.get(cur_key_part)
+                if sub_dict is None:
+                    sub_dict = cur_target[cur_key_part] = {}
+                elif not isinstance(sub_dict, dict):
+                    raise TypeError(f'can not add lookup field `{cur_lookup_key}`, because the nested element '
+                                    f'`{cur_key_part}` is not a dictionary (is: `{type(sub_dict)}`)')
+                cur_target = sub_dict
+
+            if isinstance(cur_value, dict):
+                # continue with the nested dictionary first
+                new_sub_dict = cur_target[key_parts[-1]] = {}
+                stack.append((new_sub_dict, iter(cur_value.items())))
+                break
+            cur_target[key_parts[-1]] = cur_value
+        else:
+            # all items of this level are processed
+            stack.pop()
     return result
 
 
@@ -67,18 +112,27 @@ def convert_dict_structure_to_field_lookups(dictionary: Union[dict, list]) -> Un
     """
 
     if isinstance(dictionary, list):
-        return [convert_dict_structure_to_field_lookups(cur_item) for cur_item in dictionary]
+        return [
+            convert_dict_structure_to_field_lookups(cur_item) if isinstance(cur_item, (dict, list)) else cur_item
+            for cur_item in dictionary
+        ]
 
     result = {}
-    for cur_key, cur_value in dictionary.items():
-        if isinstance(cur_value, dict):
-            for cur_sub_key, cur_sub_value in convert_dict_structure_to_field_lookups(cur_value).items():
-                full_key = f'{cur_key}__{cur_sub_key}'
-                result[full_key] = cur_sub_value
-        elif isinstance(cur_value, list):
-            result[cur_key] = convert_dict_structure_to_field_lookups(cur_value)
+    # explicit stack of (key prefix, iterator over the remaining items of this level)
+    stack = [('', iter(dictionary.items()))]
+    while stack:
+        prefix, source_items = stack[-1]
+        for cur_key, cur_value in source_items:
+            if isinstance(cur_value, dict):
+                # continue with the nested dictionary first (to keep the order of the keys)
+                stack.append((f'{prefix}{cur_key}__', iter(cur_value.items())))
+                break
+            if isinstance(cur_value, list):
+                cur_value = convert_dict_structure_to_field_lookups(cur_value)
+            result[prefix + cur_key] = cur_value
         else:
-            result[cur_key] = cur_value
+            # all items of this level are processed
+            stack.pop()
     return result
 
 
@@ -135,3 +189,49 @@ def full_dictionary_is_not_definable(data_dict: dict[str, Any]) -> bool:
             continue
         return False
     return True
+
+
+def compile_lookup_key_shape(lookup_keys: Iterable[str]) -> Optional[dict[str, Any]]:
+    """
+    Compiles the key shape for a set of lookup keys. The key shape is a nested dictionary that has the same structure
+    as the converted data, but holds the original lookup key as value for every leaf.
+
+    :param lookup_keys: the lookup keys
+    :return: the compiled key shape or None if the keys can not be compiled, because one key is a prefix of another key
+    """
+    key_shape = {}
+    for cur_lookup_key in lookup_keys:
+        key_parts = cur_lookup_key.split('__')
+        cur_node = key_shape
+        for cur_key_part in key_parts[:-1]:
+            sub_node = cur_node.get(cur_key_part)
+            if sub_node is None:
+                sub_node = cur_node[cur_key_part] = {}
+            elif not isinstance(sub_node, dict):
+                return None
+            cur_node = sub_node
+        if key_parts[-1] in cur_node:
+            return None
+        cur_node[key_parts[-1]] = cur_lookup_key
+    return key_shape
+
+
+def apply_lookup_key_shape(key_shape: dict[str, Any], data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Creates the nested data structure for the provided data by using a key shape compiled with
+    :func:`compile_lookup_key_shape`.
+
+    :param key_shape: the compiled key shape (needs to match the keys of `data`)
+    :param data: the field lookups with its value
+    :return: the nested dictionary structure
+    """
+    result = {}
+    for cur_key, cur_source in key_shape.items():
+        if isinstance(cur_source, dict):
+            result[cur_key] = apply_lookup_key_shape(cur_source, data)
+            continue
+        cur_value = data[cur_source]
+        if isinstance(cur_value, dict):
+            cur_value = convert_field_lookups_to_dict_structure(cur_value, nested=True)
+        result[cur_key] = cur_value
+    return result
@@ -0,0 +1,301 @@
+from __future__ import annotations
+from typing import Any, Callable, Iterator, Optional, TypeVar
+import collections
+import contextlib
+import functools
+import importlib
+import os
+import sys
+import threading
+import time
+
+FuncT = TypeVar('FuncT', bound=Callable[..., Any])
+
+#: environment variable that enables the instrumentation at import time if it is set to `1`, `true` or `yes`
+ENV_VARIABLE = 'BALDERHUB_DATA_INSTRUMENTATION'
+
+#: maximum number of durations that are kept per operation for calculating the percentiles (the most recent ones)
+MAX_SAMPLES_PER_OPERATION = 10000
+
+
+class OperationStats:
+    """
+    Holds the measured calls of one instrumented operation.
+    """
+
+    def __init__(self, name: str):
+        #: the name of the operation
+        self.name = name
+        #: the total number of calls
+        self.calls = 0
+        #: the total time of all calls in seconds (including the time of nested instrumented operations)
+        self.total_time = 0.0
+        #: the maximum duration of one call in seconds
+        self.max_time = 0.0
+        #: the most recent durations (used for the percentiles)
+        self._samples: collections.deque[float] = collections.deque(maxlen=MAX_SAMPLES_PER_OPERATION)
+
+    def add(self, duration: float) -> None:
+        """
+        Adds the duration of one call.
+
+        :param duration: the duration in seconds
+        """
+        self.calls += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self._samples.append(duration)
+
+    def get_percentile(self, percentile: float) -> float:
+        """
+        Returns the requested percentile (nearest-rank) of the recent durations.
+
+        :param percentile: the percentile (between 0 and 100)
+        :return: the duration in seconds (0.0 if there was no call)
+        """
+        if not self._samples:
+            return 0.0
+        sorted_samples = sorted(self._samples)
+        rank = max(int(round(percentile / 100 * len(sorted_samples) + 0.5)) - 1, 0)
+        return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        :return: the statistic values of this operation as dictionary (all durations in seconds)
+        """
+        return {
+            'calls': self.calls,
+            'total': self.total_time,
+            'mean': self.total_time / self.calls if self.calls else 0.0,
+            'p50': self.get_percentile(50),
+            'p99': self.get_percentile(99),
+            'max': self.max_time,
+        }
+
+
+class _InstrumentedFunction:
+    """
+    A function that was decorated with :func:`instrumented`. Its timing wrapper is only installed (in the class or
+    module that defines the function) while the instrumentation is enabled.
+    """
+
+    def __init__(self, func: Callable[..., Any], operation_name: str):
+        self.func = func
+        self.wrapper = _create_wrapper(func, operation_name)
+        #: True if the wrapper is installed instead of the function
+        self.installed = False
+
+    def _resolve_owner(self) -> Optional[tuple[Any, str]]:
+        """
+        :return: the class or module that defines the function and the attribute name or None if it can not be found
+        """
+        module = sys.modules.get(self.func.__module__)
+        if module is None:
+            module = importlib.import_module(self.func.__module__)
+        *owner_path, attribute_name = self.func.__qualname__.split('.')
+        owner = module
+        for cur_name in owner_path:
+            owner = getattr(owner, cur_name, None)
+            if owner is None:
+                return None
+        return owner, attribute_name
+
+    def set_installed(self, installed: bool) -> None:
+        """
+        Installs the wrapper or restores the original function.
+
+        :param installed: True to install the wrapper
+        """
+        if installed == self.installed:
+            return
+        owner_and_name = self._resolve_owner()
+        if owner_and_name is None:
+            return
+        owner, attribute_name = owner_and_name
+        current = owner.__dict__.get(attribute_name)
+        old_function, new_function = (self.func, self.wrapper) if installed else (self.wrapper, self.func)
+        if isinstance(current, (classmethod, staticmethod)):
+            if current.__func__ is not old_function:
+                return
+            new_value = current.__class__(new_function)
+        elif current is old_function:
+            new_value = new_function
+        else:
+            # the attribute was replaced by something else
+            return
+        setattr(owner, attribute_name, new_value)
+        self.installed = installed
+
+
+class _InstrumentationState:
+    """the global state of the instrumentation"""
+
+    def __init__(self):
+        self.enabled = os.environ.get(ENV_VARIABLE, '').strip().lower() in ('1', 'true', 'yes')
+        self.stats: dict[str, OperationStats] = {}
+        self.lock = threading.Lock()
+        #: all functions that were decorated with :func:`instrumented`
+        self.functions: list[_InstrumentedFunction] = []
+
+    def record(self, name: str, duration: float) -> None:
+        """adds the duration of one call of the operation"""
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = OperationStats(name)
+            stats.add(duration)
+
+
+_STATE = _InstrumentationState()
+
+
+def enable() -> None:
+    """
+    Enables the instrumentation. All calls of instrumented operations are counted and timed from now on. The timing
+    wrappers are installed into the classes and modules that define the instrumented functions.
+    """
+    with _STATE.lock:
+        _STATE.enabled = True
+        for cur_function in _STATE.functions:
+            cur_function.set_installed(True)
+
+
+def disable() -> None:
+    """
+    Disables the instrumentation and restores the original functions, so disabled instrumentation has no overhead.
+    The collected stats are kept until :func:`reset` is called.
+    """
+    with _STATE.lock:
+        _STATE.enabled = False
+        for cur_function in _STATE.functions:
+            cur_function.set_installed(False)
+
+
+def is_enabled() -> bool:
+    """
+    :return: True if the instrumentation is enabled
+    """
+    return _STATE.enabled
+
+
+def reset() -> None:
+    """
+    Removes all collected stats.
+    """
+    with _STATE.lock:
+        _STATE.stats.clear()
+
+
+def get_stats() -> dict[str, dict[str, Any]]:
+    """
+    Returns the collected stats of all operations that were called while the instrumentation was enabled.
+
+    :return: a dictionary with the operation name as key and a dictionary with the values `calls`, `total`, `mean`,
+             `p50`, `p99` and `max` (all durations in seconds) as value
+    """
+    with _STATE.lock:
+        return {cur_name: cur_stats.as_dict() for cur_name, cur_stats in _STATE.stats.items()}
+
+
+def format_report(limit: Optional[int] = None) -> str:
+    """
+    Creates a human-readable report of the collected stats, sorted by the total time (the most expensive operation
+    first).
+
+    :param limit: the maximum number of operations in the report (all if None)
+    :return: the report
+    """
+    stats = sorted(get_stats().items(), key=lambda elem: elem[1]['total'], reverse=True)
+    if limit is not None:
+        stats = stats[:limit]
+    if not stats:
+        return 'balderhub-data instrumentation: no instrumented operation was called'
+    name_width = max(len('operation'), *(len(cur_name) for cur_name, _ in stats))
+    lines = [
+        'balderhub-data instrumentation report (times in ms, total includes nested operations)',
+        f"{'operation':<{name_width}} {'calls':>10} {'total':>12} {'mean':>10} {'p50':>10} {'p99':>10} {'max':>10}"
+    ]
+    for cur_name, cur_stats in stats:
+        lines.append(
+            f"{cur_name:<{name_width}} {cur_stats['calls']:>10} {cur_stats['total'] * 1000:>12.3f} "
+            f"{cur_stats['mean'] * 1000:>10.3f} {cur_stats['p50'] * 1000:>10.3f} {cur_stats['p99'] * 1000:>10.3f} "
+            f"{cur_stats['max'] * 1000:>10.3f}"
+        )
+    return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def measure_operation(name: str) -> Iterator[None]:
+    """
+    Context manager that counts and times the enclosed block as one call of the operation `name` (only if the
+    instrumentation is enabled).
+
+    :param name: the name of the operation
+    """
+    if not _STATE.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _STATE.record(name, time.perf_counter() - start)
+
+
+def _create_wrapper(func: FuncT, operation_name: str) -> FuncT:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _STATE.record(operation_name, time.perf_counter() - start)
+    return wrapper
+
+
+def instrumented(name: Optional[str] = None) -> Callable[[FuncT], FuncT]:
+    """
+    Decorator that counts and times all calls of the decorated function while the instrumentation is enabled. The
+    decorator returns the function itself - the timing wrapper is only installed by :func:`enable` (and removed by
+    :func:`disable`), so the function has no overhead while the instrumentation is disabled.
+
+    .. code-block:: python
+
+        class MyDataItem(SingleDataItem):
+
+            @classmethod
+            @instrumented()
+            def get_something(cls):
+                ...
+
+    .. note::
+        The wrapper is installed into the class or module that defines the function. References to the function that
+        were taken before (f.e. bound methods) are not timed. Functions that are defined within other functions can
+        not be replaced later, they are always wrapped (with an enabled-check per call).
+
+    :param name: the name of the operation (the qualified name of the function if None)
+    :return: the decorator
+    """
+    def decorator(func: FuncT) -> FuncT:
+        operation_name = func.__qualname__ if name is None else name
+
+        if '<locals>' in func.__qualname__:
+
+            @functools.wraps(func)
+            def checking_wrapper(*args, **kwargs):
+                if not _STATE.enabled:
+                    return func(*args, **kwargs)
+                return instrumented_function.wrapper(*args, **kwargs)
+
+            instrumented_function = _InstrumentedFunction(func, operation_name)
+            return checking_wrapper
+
+        instrumented_function = _InstrumentedFunction(func, operation_name)
+        with _STATE.lock:
+            _STATE.functions.append(instrumented_function)
+            if _STATE.enabled:
+                # the owner does not exist yet -> return the wrapper directly, `disable()` restores the function
+                instrumented_function.installed = True
+                return instrumented_function.wrapper
+        return func
+    return decorator
@@ -0,0 +1,44 @@
+from __future__ import annotations
+from typing import List, Union, TYPE_CHECKING
+import argparse
+import pathlib
+
+import balder
+
+from . import instrumentation
+
+if TYPE_CHECKING:
+    from _balder.executor.executor_tree import ExecutorTree
+
+
+class InstrumentationReportPlugin(balder.BalderPlugin):
+    """
+    Balder plugin that prints the report of the :mod:`balderhub.data.lib.utils.instrumentation` at the end of the test
+    session. Import it in your `balderglob.py` file to activate it:
+
+    .. code-block:: python
+
+        # balderglob.py
+        from balderhub.data.lib.utils.instrumentation_plugin import InstrumentationReportPlugin
+
+    The instrumentation is enabled with the command line argument `--data-instrumentation` (or the environment
+    variable `BALDERHUB_DATA_INSTRUMENTATION=1`).
+    """
+
+    def addoption(self, argument_parser: argparse.ArgumentParser):
+        argument_parser.add_argument(
+            '--data-instrumentation', action='store_true',
+            help='counts and times the expensive operations of balderhub-data and prints a report at the end')
+        argument_parser.add_argument(
+            '--data-instrumentation-limit', type=int, default=None,
+            help='maximum number of operations in the balderhub-data instrumentation report')
+
+    def modify_collected_pyfiles(self, pyfiles: List[pathlib.Path]) -> List[pathlib.Path]:
+        # enable it before the test files are imported, because they often create feature classes at import time
+        if self.balder_session.parsed_args.data_instrumentation:
+            instrumentation.enable()
+        return pyfiles
+
+    def session_finished(self, executor_tree: Union[ExecutorTree, None]):
+        if instrumentation.is_enabled():
+            print(instrumentation.format_report(limit=self.balder_session.parsed_args.data_instrumentation_limit))
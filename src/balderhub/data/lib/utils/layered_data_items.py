@@ -0,0 +1,137 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterator, List, Mapping, MutableMapping, Optional, Tuple
+
+from .single_data_item import SingleDataItem
+
+
+class LayeredDataItems(MutableMapping):
+    """
+    Mapping of unique identifications to the data items of one type, that overlays additions, overrides and deletions
+    on top of a parent mapping without copying it. Lookups fall through to the parent, if the key is not part of this
+    layer. Data items of the parent are materialized lazily as snapshot (see :meth:`TrackedModel.snapshot`) on first
+    access, so changing them never changes the parent. Read-only consumers can use
+    :meth:`LayeredDataItems.read_only_items` and :meth:`LayeredDataItems.peek`, that never materialize data items.
+
+    The parent mapping is expected to be unchanged while layers exist on top of it.
+    """
+
+    def __init__(self, parent: Mapping[Any, SingleDataItem]):
+        #: the mapping of the layer below
+        self._parent = parent
+        #: the added, overridden and already materialized data items of this layer
+        self._own: Dict[Any, SingleDataItem] = {}
+        #: the keys of the parent that were deleted in this layer
+        self._deleted: set = set()
+        #: the number of keys in this layer that do not exist in the parent
+        self._num_added = 0
+        #: optional callback, that is called with the data item of the parent and its snapshot whenever a data item of
+        #: the parent is materialized in this layer
+        self.on_materialize: Optional[Callable[[SingleDataItem, SingleDataItem], None]] = None
+
+    def __getitem__(self, unique_identification: Any) -> SingleDataItem:
+        item = self._own.get(unique_identification)
+        if item is not None:
+            return item
+        if unique_identification in self._deleted:
+            raise KeyError(unique_identification)
+        # the data item is copied anyway -> do not materialize it in the layers below too
+        parent_item = self._parent.peek(unique_identification) if isinstance(self._parent, LayeredDataItems) \
+            else self._parent[unique_identification]
+        item = parent_item.snapshot()
+        self._own[unique_identification] = item
+        if self.on_materialize is not None:
+            self.on_materialize(parent_item, item)
+        return item
+
+    def __setitem__(self, unique_identification: Any, item: SingleDataItem) -> None:
+        if unique_identification not in self._own and unique_identification not in self._parent:
+            self._num_added += 1
+        self._deleted.discard(unique_identification)
+        self._own[unique_identification] = item
+
+    def __delitem__(self, unique_identification: Any) -> None:
+        if unique_identification not in self:
+            raise KeyError(unique_identification)
+        self._own.pop(unique_identification, None)
+        if unique_identification in self._parent:
+            self._deleted.add(unique_identification)
+        else:
+            self._num_added -= 1
+
+    def __contains__(self, unique_identification: Any) -> bool:
+        if unique_identification in self._own:
+            return True
+        return unique_identification not in self._deleted and unique_identification in self._parent
+
+    def __iter__(self) -> Iterator[Any]:
+        for cur_key in self._parent:
+            if cur_key not in self._deleted:
+                yield cur_key
+        for cur_key in self._own:
+            if cur_key not in self._parent:
+                yield cur_key
+
+    def __len__(self) -> int:
+        return len(self._parent) - len(self._deleted) + self._num_added
+
+    @property
+    def deleted(self) -> set:
+        """
+        :return: the keys of the parent that were deleted in this layer
+        """
+        return set(self._deleted)
+
+    def loaded_values(self) -> List[SingleDataItem]:
+        """
+        :return: all data items that are held by this layer (the data items of the parent that were never accessed
+                 can not have any changes)
+        """
+        return list(self._own.values())
+
+    def is_own(self, unique_identification: Any) -> bool:
+        """
+        :param unique_identification: the unique identification of the data item
+        :return: True if the data item is held by this layer (added, overridden or already materialized), False if it
+                 is shared with the parent (or does not exist)
+        """
+        return unique_identification in self._own
+
+    def own_items(self) -> Iterator[Tuple[Any, SingleDataItem]]:
+        """
+        :return: an iterator over the unique identifications and data items that are held by this layer (added,
+                 overridden and already materialized data items)
+        """
+        return iter(self._own.items())
+
+    def read_only_items(self) -> Iterator[Tuple[Any, SingleDataItem]]:
+        """
+        Iterates over the unique identifications and data items of all layers without materializing the data items of
+        the parent. The returned data items of the parent are shared with it and must not be changed.
+
+        :return: an iterator over the unique identifications and data items
+        """
+        parent_items = self._parent.read_only_items() if isinstance(self._parent, LayeredDataItems) \
+            else self._parent.items()
+        for cur_key, cur_parent_item in parent_items:
+            if cur_key not in self._deleted:
+                yield cur_key, self._own.get(cur_key, cur_parent_item)
+        for cur_key, cur_item in self._own.items():
+            if cur_key not in self._parent:
+                yield cur_key, cur_item
+
+    def peek(self, unique_identification: Any) -> SingleDataItem:
+        """
+        Returns a data item without materializing it. A data item of the parent is shared with it and must not be
+        changed.
+
+        :param unique_identification: the unique identification of the data item
+        :return: the data item
+        """
+        item = self._own.get(unique_identification)
+        if item is not None:
+            return item
+        if unique_identification in self._deleted:
+            raise KeyError(unique_identification)
+        if isinstance(self._parent, LayeredDataItems):
+            return self._parent.peek(unique_identification)
+        return self._parent[unique_identification]
@@ -0,0 +1,50 @@
+from __future__ import annotations
+from typing import Any, Optional
+import os
+import zlib
+
+#: environment variable that defines the number of partitions, if it is not defined by the data environment itself
+ENV_VARIABLE_PARTITION_COUNT = 'BALDERHUB_DATA_PARTITION_COUNT'
+
+#: environment variable that defines the partition (starting with 0) of the current worker process, if it is not
+#: defined by the data environment itself
+ENV_VARIABLE_PARTITION_INDEX = 'BALDERHUB_DATA_PARTITION_INDEX'
+
+
+def get_partition_for(partition_key: Any, partition_count: int) -> int:
+    """
+    Returns the partition a partition key belongs to. The result is deterministic across processes (it uses a CRC32
+    checksum of the `repr()` of the key instead of the randomized builtin `hash()`), so every worker process assigns
+    the same data items to the same partitions.
+
+    :param partition_key: the partition key (needs a deterministic `repr()`)
+    :param partition_count: the total number of partitions
+    :return: the index of the partition (between 0 and `partition_count - 1`)
+    """
+    return zlib.crc32(repr(partition_key).encode('utf-8')) % partition_count
+
+
+def resolve_partition(
+        partition_index: Optional[int],
+        partition_count: Optional[int]
+) -> Optional[tuple[int, int]]:
+    """
+    Resolves the partition of the current process. Values that are None are read from the environment variables
+    :data:`ENV_VARIABLE_PARTITION_INDEX` and :data:`ENV_VARIABLE_PARTITION_COUNT`.
+
+    :param partition_index: the configured partition index or None
+    :param partition_count: the configured number of partitions or None
+    :return: a tuple with the partition index and the number of partitions or None if no partitioning is configured
+    """
+    if partition_count is None and os.environ.get(ENV_VARIABLE_PARTITION_COUNT):
+        partition_count = int(os.environ[ENV_VARIABLE_PARTITION_COUNT])
+    if partition_index is None and os.environ.get(ENV_VARIABLE_PARTITION_INDEX):
+        partition_index = int(os.environ[ENV_VARIABLE_PARTITION_INDEX])
+    if partition_count is None or partition_count == 1:
+        return None
+    if partition_index is None:
+        raise ValueError(f'a partition count of {partition_count} is configured, but no partition index (set '
+                         f'`PARTITION_INDEX` or the environment variable `{ENV_VARIABLE_PARTITION_INDEX}`)')
+    if partition_count < 1 or not 0 <= partition_index < partition_count:
+        raise ValueError(f'invalid partition {partition_index} of {partition_count} partitions')
+    return partition_index, partition_count
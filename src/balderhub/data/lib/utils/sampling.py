@@ -0,0 +1,102 @@
+from __future__ import annotations
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+import itertools
+import math
+import random
+
+T = TypeVar('T')
+
+#: marker for an exhausted iterator within :func:`reservoir_sample`
+_EXHAUSTED = object()
+
+
+def iter_random_permutation(count: int, rng: random.Random) -> Iterator[int]:
+    """
+    Iterates over a random permutation of the numbers `0` to `count - 1`. The permutation is created lazily (by a
+    Fisher-Yates shuffle that only stores the swapped positions), so stopping the iteration early only costs the
+    steps that were really done.
+
+    :param count: the number of elements of the permutation
+    :param rng: the random number generator
+    :return: an iterator over the permutation
+    """
+    swapped = {}
+    for position in range(count):
+        target = rng.randrange(position, count)
+        value_at_position = swapped.pop(position, position)
+        if target == position:
+            yield value_at_position
+        else:
+            yield swapped.get(target, target)
+            swapped[target] = value_at_position
+
+
+def sample_indices(
+        count: int,
+        k: int,
+        rng: random.Random,
+        predicate: Optional[Callable[[int], bool]] = None
+) -> List[int]:
+    """
+    Returns `k` random indices (without repetition) between `0` and `count - 1` that fulfill the predicate. The
+    indices are checked in random order until `k` matching indices were found, so the predicate is only called for
+    all indices if less than `k` indices fulfill it.
+
+    :param count: the number of indices to choose from
+    :param k: the number of requested indices
+    :param rng: the random number generator
+    :param predicate: optional callable, that returns True for indices that can be part of the sample
+    :return: the sampled indices in random order (less than `k` if there are not enough matching indices)
+    """
+    if k < 0:
+        raise ValueError('the sample size needs to be positive')
+    if predicate is None:
+        return rng.sample(range(count), min(k, count))
+    result = []
+    if k == 0:
+        return result
+    for cur_index in iter_random_permutation(count, rng):
+        if predicate(cur_index):
+            result.append(cur_index)
+            if len(result) == k:
+                break
+    return result
+
+
+def _random_exclusive(rng: random.Random) -> float:
+    """
+    :return: a random number within the open interval `(0, 1)`
+    """
+    value = rng.random()
+    while value == 0.0:
+        value = rng.random()
+    return value
+
+
+def reservoir_sample(items: Iterable[T], k: int, rng: random.Random) -> List[T]:
+    """
+    Returns `k` random elements (without repetition) of an iterable with unknown length in one pass. Only the sample
+    itself is held in memory. The implementation skips elements in geometric distributed steps (Algorithm L), so the
+    number of random numbers depends on the sample size and not on the number of elements.
+
+    :param items: the iterable (f.e. a generator)
+    :param k: the number of requested elements
+    :param rng: the random number generator
+    :return: the sampled elements in random order (all elements if the iterable has less than `k` elements)
+    """
+    if k < 0:
+        raise ValueError('the sample size needs to be positive')
+    iterator = iter(items)
+    reservoir = list(itertools.islice(iterator, k))
+    if len(reservoir) == k > 0:
+        weight = math.exp(math.log(_random_exclusive(rng)) / k)
+        # a weight of 1.0 (only possible by rounding) means that no other element is taken anymore
+        while weight < 1.0:
+            skip = math.floor(math.log(_random_exclusive(rng)) / math.log1p(-weight))
+            next_item = next(itertools.islice(iterator, skip, None), _EXHAUSTED)
+            if next_item is _EXHAUSTED:
+                break
+            reservoir[rng.randrange(k)] = next_item
+            weight *= math.exp(math.log(_random_exclusive(rng)) / k)
+    rng.shuffle(reservoir)
+    return reservoir
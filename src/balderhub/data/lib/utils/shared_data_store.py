@@ -0,0 +1,200 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Type
+import pickle
+import zlib
+from multiprocessing import resource_tracker, shared_memory
+
+from .single_data_item import SingleDataItem
+
+#: environment variable that holds the name prefix of the shared data stores of a test session - every data
+#: environment class publishes its data in its own store (see :func:`get_shared_store_name`) and attaches to it instead
+#: of loading the data
+ENV_VARIABLE_SHARED_STORE = 'BALDERHUB_DATA_SHARED_STORE'
+
+#: the names of the shared memory blocks that were published by this process and are not released yet
+_PUBLISHED_NAMES: set[str] = set()
+
+#: number of bytes at the start of the shared memory block, that hold the size of the header
+_HEADER_SIZE_BYTES = 8
+
+
+def get_shared_store_name(prefix: str, owner: str) -> str:
+    """
+    Returns the name of the shared data store of one owner (f.e. a data environment class) within a test session. The
+    owner is appended as short checksum, so the name stays within the limits of all platforms if the prefix has at most
+    20 characters.
+
+    :param prefix: the name prefix of the test session (see :data:`ENV_VARIABLE_SHARED_STORE`)
+    :param owner: the qualified name of the owner
+    :return: the name of the shared memory block
+    """
+    return f'{prefix}-{zlib.crc32(owner.encode("utf-8")):08x}'
+
+
+class SharedDataItems(Mapping):
+    """
+    Read-only mapping of unique identifications to the data items of one type within a :class:`SharedDataStore`. The
+    data items are deserialized on first access and cached afterward.
+    """
+
+    def __init__(self, store: SharedDataStore, index: Dict[Any, tuple[int, int]]):
+        self._store = store
+        #: maps the unique identification to the position `(offset, length)` of the serialized data item
+        self._index = index
+        #: the data items that were already deserialized
+        self._loaded: Dict[Any, SingleDataItem] = {}
+
+    def __getitem__(self, unique_identification: Any) -> SingleDataItem:
+        item = self._loaded.get(unique_identification)
+        if item is None:
+            offset, length = self._index[unique_identification]
+            item = self._store._load_item(offset, length)  # pylint: disable=protected-access
+            self._loaded[unique_identification] = item
+        return item
+
+    def __contains__(self, unique_identification: Any) -> bool:
+        return unique_identification in self._index
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def loaded_values(self) -> List[SingleDataItem]:
+        """
+        :return: all data items that were already deserialized (only these ones can have changes)
+        """
+        return list(self._loaded.values())
+
+
+class SharedDataStore:
+    """
+    Holds the data items of a data environment in a `multiprocessing.shared_memory` block. One process publishes the
+    data with :meth:`SharedDataStore.publish`, other processes attach to it with :meth:`SharedDataStore.attach` and
+    deserialize only the data items they access - so the data exists only once in memory, independent of the number
+    of worker processes.
+
+    Every data item is serialized with `pickle`, so all data item types need to be importable in the attaching
+    processes.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, is_owner: bool):
+        self._memory = memory
+        self._is_owner = is_owner
+        header_size = int.from_bytes(memory.buf[:_HEADER_SIZE_BYTES], 'little')
+        with memory.buf[_HEADER_SIZE_BYTES:_HEADER_SIZE_BYTES + header_size] as header_view:
+            header = pickle.loads(header_view)
+        self._data_offset = _HEADER_SIZE_BYTES + header_size
+        #: the qualified name of the owner that published the data (None if no owner was provided)
+        self._owner: Optional[str] = header['owner']
+        #: the data items per type
+        self._items: Dict[Type[SingleDataItem], SharedDataItems] = {
+            cur_type: SharedDataItems(self, cur_index) for cur_type, cur_index in header['types']
+        }
+
+    @classmethod
+    def publish(cls, data: Mapping[Type[SingleDataItem], Mapping[Any, SingleDataItem]],
+                name: Optional[str] = None, owner: Optional[str] = None) -> SharedDataStore:
+        """
+        Serializes the data into a new shared memory block. The publishing process owns the block and needs to call
+        :meth:`SharedDataStore.unlink` if it is not used anymore.
+
+        :param data: the data items per type, keyed by their unique identification
+        :param name: the name of the shared memory block (a random name is used if it is None)
+        :param owner: the qualified name of the owner of the data (f.e. the data environment class), that is recorded
+                      in the store and checked by :meth:`SharedDataStore.attach`
+        :return: the store, that holds the published data
+        """
+        header = []
+        blocks = []
+        offset = 0
+        for cur_type, cur_items in data.items():
+            index = {}
+            for cur_identifier, cur_item in cur_items.items():
+                serialized = pickle.dumps(cur_item, protocol=pickle.HIGHEST_PROTOCOL)
+                index[cur_identifier] = (offset, len(serialized))
+                blocks.append(serialized)
+                offset += len(serialized)
+            header.append((cur_type, index))
+        serialized_header = pickle.dumps({'owner': owner, 'types': header}, protocol=pickle.HIGHEST_PROTOCOL)
+        data_offset = _HEADER_SIZE_BYTES + len(serialized_header)
+
+        memory = shared_memory.SharedMemory(name=name, create=True, size=max(data_offset + offset, 1))
+        memory.buf[:_HEADER_SIZE_BYTES] = len(serialized_header).to_bytes(_HEADER_SIZE_BYTES, 'little')
+        memory.buf[_HEADER_SIZE_BYTES:data_offset] = serialized_header
+        memory.buf[data_offset:data_offset + offset] = b''.join(blocks)
+        _PUBLISHED_NAMES.add(memory.name)
+        return cls(memory, is_owner=True)
+
+    @classmethod
+    def attach(cls, name: str, owner: Optional[str] = None) -> SharedDataStore:
+        """
+        Attaches to a shared data store that was published by another process.
+
+        :param name: the name of the published store (see :attr:`SharedDataStore.name`)
+        :param owner: the expected owner of the data (see :meth:`SharedDataStore.publish`) - None to skip this check
+        :return: the attached store
+        :raises FileNotFoundError: if no store with this name was published
+        :raises ValueError: if the store was published by another owner
+        """
+        memory = shared_memory.SharedMemory(name=name)
+        if memory.name not in _PUBLISHED_NAMES:
+            # only the publishing process is responsible for releasing the block - otherwise the resource tracker of
+            # this process would remove it when this process ends
+            resource_tracker.unregister(memory._name, 'shared_memory')  # pylint: disable=protected-access
+        store = cls(memory, is_owner=False)
+        if owner is not None and store.owner != owner:
+            store.close()
+            raise ValueError(f'the shared data store `{name}` was published by `{store.owner}` and can not be used by '
+                             f'`{owner}`')
+        return store
+
+    @property
+    def name(self) -> str:
+        """
+        :return: the name of the shared memory block, other processes can attach to
+        """
+        return self._memory.name
+
+    @property
+    def owner(self) -> Optional[str]:
+        """
+        :return: the qualified name of the owner that published the data (None if no owner was provided)
+        """
+        return self._owner
+
+    @property
+    def data_item_types(self) -> List[Type[SingleDataItem]]:
+        """
+        :return: all data item types within this store
+        """
+        return list(self._items.keys())
+
+    def get_items(self, data_item_type: Type[SingleDataItem]) -> SharedDataItems:
+        """
+        :param data_item_type: the data item type
+        :return: a read-only mapping of the unique identifications to the data items of this type
+        """
+        return self._items[data_item_type]
+
+    def _load_item(self, offset: int, length: int) -> SingleDataItem:
+        start = self._data_offset + offset
+        with self._memory.buf[start:start + length] as item_view:
+            return pickle.loads(item_view)
+
+    def close(self) -> None:
+        """
+        Closes the access to the shared memory block of this process (already deserialized data items stay usable).
+        """
+        self._memory.close()
+
+    def unlink(self) -> None:
+        """
+        Closes the store and releases the shared memory block. This can only be done by the publishing process.
+        """
+        if not self._is_owner:
+            raise PermissionError('only the publishing process can release the shared data store')
+        self.close()
+        self._memory.unlink()
+        _PUBLISHED_NAMES.discard(self._memory.name)
@@ -1,21 +1,40 @@
 from __future__ import annotations
 
+import contextlib
 import logging
 import types
 import typing
 from abc import ABC, abstractmethod
-from typing import List, TypeVar, Any, Union, get_args, get_origin, Optional
+from typing import List, TypeVar, Any, Union, get_args, get_origin, Optional, Iterable, Iterator
 
 import pydantic
 
-from .exceptions import MisconfiguredDataItemError
-from .functions import convert_field_lookups_to_dict_structure
+from .batch_update import batch_update_items, get_active_batch_updates
+from .exceptions import MisconfiguredDataItemError, MissingDataItemFieldsError
+from .functions import apply_lookup_key_shape, compile_lookup_key_shape, convert_field_lookups_to_dict_structure
+from .instrumentation import instrumented
 from .lookup_field_string import LookupFieldString
 from .not_definable import NOT_DEFINABLE
+from .tracked_model import TrackedModel
 from .unordered_list import UnorderedList
 
 logger = logging.getLogger(__name__)
 
+#: cache for :meth:`SingleDataItem.get_nested_data_item_fields` (data item class -> resolved nested fields)
+_NESTED_DATA_ITEM_FIELDS_CACHE: dict[type, dict[str, tuple[type, bool]]] = {}
+
+#: cache for :meth:`SingleDataItem.create_non_definable` (tuple of data item class and `nested` flag -> template item)
+_NON_DEFINABLE_TEMPLATE_CACHE: dict[tuple[type, bool], SingleDataItem] = {}
+
+#: cache for the compiled key shapes of :meth:`SingleDataItem.create_as_nested` (data item class -> (frozenset of
+#: lookup keys -> key shape or None if the keys can not be compiled))
+_KEY_SHAPE_CACHE: dict[type, dict[frozenset[str], Optional[dict[str, Any]]]] = {}
+#: maximum number of different key sets that are cached per data item class
+_MAX_KEY_SHAPES_PER_CLASS = 256
+
+#: cache for the names of the required fields of :meth:`SingleDataItem.create_trusted` (data item class -> field names)
+_REQUIRED_FIELDS_CACHE: dict[type, frozenset[str]] = {}
+
 
 class SingleDataItemMetaclass(type(pydantic.BaseModel)):
     """metaclass for data item"""
@@ -101,16 +120,39 @@ class SingleDataItemMetaclass(type(pydantic.BaseModel)):
                                              f'dataclasses')
 
 
-class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass):
+# pylint: disable-next=too-many-public-methods
+class SingleDataItem(TrackedModel, ABC, metaclass=SingleDataItemMetaclass):
     """
     This is a base class for data items. Data items are pydantic `BaseModel` classes that are used for defining the
-    model to test.
+    model to test. They support cheap snapshots and the tracking of changed fields (see
+    :class:`balderhub.data.lib.utils.tracked_model.TrackedModel`).
     """
     # make the whole model strict
     # do not allow non-declared data
     # do validate types also during assignment
     model_config = pydantic.ConfigDict(strict=True, extra='forbid', validate_assignment=True)
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        active_batch_updates = get_active_batch_updates()
+        if active_batch_updates and id(self) in active_batch_updates and name in self.__pydantic_fields__:
+            # we are within a `batch_update()` block -> validation will be done on exit
+            self._set_field_without_validation(name, value)
+            return
+        super().__setattr__(name, value)
+        if name in self.__pydantic_fields__:
+            self._mark_dirty(name)
+
+    def _set_field_without_validation(self, name: str, value: Any) -> None:
+        """
+        Internal helper that sets a field value without triggering the pydantic assignment validation.
+
+        :param name: the name of the (direct) field
+        :param value: the new value
+        """
+        self.__dict__[name] = value
+        self.__pydantic_fields_set__.add(name)
+        self._mark_dirty(name)
+
     @abstractmethod
     def get_unique_identification(self):
         """
@@ -119,6 +161,31 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
         """
         raise NotImplementedError
 
+    @classmethod
+    def get_indexed_fields(cls) -> list[str]:
+        """
+        Returns the field lookups (f.e. `author__last_name`) the :class:`DataEnvironmentFeature` maintains hash indexes
+        for. Collections that are returned by :meth:`DataEnvironmentFeature.get_all_for` use these indexes in
+        :meth:`SingleDataItemCollection.filter_by` and :meth:`SingleDataItemCollection.get_by` instead of scanning all
+        items. Overwrite this method to declare indexes - the values of the fields need to be hashable.
+
+        :return: a list with the indexed field lookups (no index per default)
+        """
+        return []
+
+    @classmethod
+    def get_sorted_indexed_fields(cls) -> list[str]:
+        """
+        Returns the field lookups the :class:`DataEnvironmentFeature` maintains sorted indexes for. Collections that
+        are returned by :meth:`DataEnvironmentFeature.get_all_for` use these indexes for range queries (f.e.
+        :meth:`SingleDataItemCollection.filter_range`), :meth:`SingleDataItemCollection.order_by` and top-k requests
+        (f.e. :meth:`SingleDataItemCollection.get_largest`). Overwrite this method to declare sorted indexes - the
+        values of the fields need to be comparable with each other.
+
+        :return: a list with the field lookups that have a sorted index (no index per default)
+        """
+        return []
+
     @classmethod
     def create_as_nested(cls, **kwargs):
         """
@@ -126,20 +193,146 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
         :param kwargs: the field lookups with its value
         :return: the instantiated data item
         """
-        json_dict = convert_field_lookups_to_dict_structure(kwargs, nested=True)
-        return cls(**json_dict)
+        return cls(**cls._convert_lookups_to_nested_kwargs(kwargs))
+
+    @classmethod
+    def create_many_as_nested(cls, data: Iterable[dict[str, Any]]) -> list[SingleDataItemTypeT]:
+        """
+        Bulk variant of :meth:`SingleDataItem.create_as_nested`. It creates one (validated) data item for every provided
+        dictionary with field lookups.
+
+        :param data: an iterable of dictionaries with the field lookups and its values
+        :return: a list with the instantiated data items (same order as the input)
+        """
+        return [cls(**cls._convert_lookups_to_nested_kwargs(cur_data)) for cur_data in data]
+
+    @classmethod
+    def _convert_lookups_to_nested_kwargs(cls, data: dict[str, Any]) -> dict[str, Any]:
+        """
+        Internal helper that converts field lookups into the nested constructor arguments. Data rows coming from the
+        same source normally have the same set of lookup keys, so the nested structure (key shape) is compiled once per
+        data item class and set of keys and reused for all following calls.
+
+        :param data: the field lookups with its value
+        :return: the nested dictionary structure that can be used as constructor arguments
+        """
+        key_shapes = _KEY_SHAPE_CACHE.get(cls)
+        if key_shapes is None:
+            key_shapes = _KEY_SHAPE_CACHE[cls] = {}
+        key_set = frozenset(data.keys())
+        if key_set in key_shapes:
+            key_shape = key_shapes[key_set]
+        else:
+            key_shape = compile_lookup_key_shape(data.keys())
+            if len(key_shapes) < _MAX_KEY_SHAPES_PER_CLASS:
+                key_shapes[key_set] = key_shape
+
+        if key_shape is None:
+            # keys can not be compiled (f.e. a key is a prefix of another key) -> use the generic conversion
+            return convert_field_lookups_to_dict_structure(data, nested=True)
+        return apply_lookup_key_shape(key_shape, data)
+
+    @classmethod
+    def create_trusted(cls, **kwargs) -> SingleDataItemTypeT:
+        """
+        Class method for creating a data item out of already validated data, without running the pydantic validation.
+        It accepts the same input as :meth:`SingleDataItem.create_as_nested` (field lookups and/or nested dictionaries)
+        and recursively creates nested data items and lists of data items. `NOT_DEFINABLE` and `None` values are taken
+        over as they are.
+
+        .. warning::
+            The provided data is not validated (no type checks, unknown fields are silently dropped). It is only checked
+            that all required fields are provided. Only use this method for data that was validated before, for example
+            snapshot files created from data items or device readbacks that were already parsed and checked.
+
+        :param kwargs: the field lookups (or nested dictionaries) with its value
+        :return: the instantiated data item
+        :raises MissingDataItemFieldsError: if a required field (of the item or of a nested item) is not provided
+        """
+        return cls._construct_trusted(kwargs)
+
+    @classmethod
+    def create_many_trusted(cls, data: Iterable[dict[str, Any]]) -> list[SingleDataItemTypeT]:
+        """
+        Bulk variant of :meth:`SingleDataItem.create_trusted`. It creates one data item for every provided dictionary
+        without running the pydantic validation.
+
+        :param data: an iterable of dictionaries (field lookups and/or nested dictionaries)
+        :return: a list with the instantiated data items (same order as the input)
+        """
+        return [cls._construct_trusted(cur_data) for cur_data in data]
+
+    @classmethod
+    def _construct_trusted(cls, data: dict[str, Any]) -> SingleDataItemTypeT:
+        """
+        Internal helper for :meth:`SingleDataItem.create_trusted` that recursively constructs the data item without
+        validation.
+
+        :param data: the field lookups (or nested dictionaries) with its value
+        :return: the instantiated data item
+        """
+        data = cls._convert_lookups_to_nested_kwargs(data)
+
+        required_fields = _REQUIRED_FIELDS_CACHE.get(cls)
+        if required_fields is None:
+            required_fields = frozenset(
+                cur_name for cur_name, cur_field in cls.model_fields.items() if cur_field.is_required()
+            )
+            _REQUIRED_FIELDS_CACHE[cls] = required_fields
+        if not required_fields.issubset(data.keys()):
+            missing_fields = sorted(required_fields.difference(data.keys()))
+            raise MissingDataItemFieldsError(
+                f'can not create `{cls.__name__}` without the required field(s) {", ".join(missing_fields)}'
+            )
+
+        for cur_field_name, (cur_data_item_type, is_list) in cls.get_nested_data_item_fields().items():
+            cur_value = data.get(cur_field_name)
+            # pylint: disable-next=protected-access
+            construct_nested = cur_data_item_type._construct_trusted
+            if is_list and isinstance(cur_value, list):
+                data[cur_field_name] = [
+                    construct_nested(cur_elem) if isinstance(cur_elem, dict) else cur_elem for cur_elem in cur_value
+                ]
+            elif not is_list and isinstance(cur_value, dict):
+                data[cur_field_name] = construct_nested(cur_value)
+        return cls.model_construct(**data)
 
     @classmethod
     def create_non_definable(cls, nested=True) -> SingleDataItemTypeT:
         """
+        .. note::
+            The item is validated only once per data item class (and `nested` value). This template is cached and every
+            call returns a structural copy of it (nested data items are copied too).
+
         :return: returns instance of this  data item with `NON_DEFINABLE` for every field
         """
-        data = {}
-        for cur_field in cls.get_all_fields_for(nested=nested):
-            data[cur_field] = NOT_DEFINABLE
-        return cls.create_as_nested(**data)
+        template = _NON_DEFINABLE_TEMPLATE_CACHE.get((cls, nested))
+        if template is None:
+            data = {}
+            for cur_field in cls.get_all_fields_for(nested=nested):
+                data[cur_field] = NOT_DEFINABLE
+            template = cls.create_as_nested(**data)
+            _NON_DEFINABLE_TEMPLATE_CACHE[(cls, nested)] = template
+        # pylint: disable-next=protected-access
+        return template._copy_nested_structure()
+
+    def _copy_nested_structure(self) -> SingleDataItemTypeT:
+        """
+        Internal helper that returns a shallow copy of this data item, where all directly nested data items are copied
+        recursively too. Lists and other values are shared between both items.
+
+        :return: the copied data item
+        """
+        new_item = self.model_copy()
+        for cur_field_name, (_, is_list) in self.__class__.get_nested_data_item_fields().items():
+            cur_value = new_item.__dict__.get(cur_field_name)
+            if not is_list and isinstance(cur_value, SingleDataItem):
+                # pylint: disable-next=protected-access
+                new_item.__dict__[cur_field_name] = cur_value._copy_nested_structure()
+        return new_item
 
     @classmethod
+    @instrumented()
     def get_field(cls, field_lookup: str | LookupFieldString) -> pydantic.fields.FieldInfo:
         """
         Returns the specific data class field by its field lookup name
@@ -167,6 +360,7 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
         return field_info
 
     @classmethod
+    @instrumented()
     def is_optional_field(cls, field_lookup: str | LookupFieldString, consider_upper_optionals_too=True) -> bool:
         """
         This method checks if the field is optional. If `consider_upper_optionals_too=True` it will check the type
@@ -195,6 +389,7 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
         return False
 
     @classmethod
+    @instrumented()
     def get_element_type_for_list(cls, field_lookup: str | LookupFieldString) -> type:
         """
         This method returns the inner element type for the requested field. It will recheck that the provided field
@@ -221,6 +416,7 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
         raise TypeError(f"list needs to have exactly one item type definition -> multiple detected: `{inner_args}`")
 
     @classmethod
+    @instrumented()
     def get_all_fields_for(
             cls,
             subkey: str | LookupFieldString | None = None,
@@ -295,6 +491,7 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
         return [str(f) for f in filtered_result]
 
     @classmethod
+    @instrumented()
     def get_cleaned_field_data_type(cls, field_lookup: LookupFieldString | str) -> type | types.GenericAlias:
         """
         This method returns the specific data type of a field. It automatically resolves subscripted type definitions.
@@ -345,6 +542,7 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
         return get_data_item_type(cls.get_field(field_lookup))
 
     @classmethod
+    @instrumented()
     def get_field_data_type(cls, field_lookup: LookupFieldString | str) -> type:
         """
         This method returns the specific data type of a field. It automatically resolves subscripted type definitions.
@@ -378,6 +576,30 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
 
         return get_data_type(cleaned_field_type)
 
+    @classmethod
+    @instrumented()
+    def get_nested_data_item_fields(cls) -> dict[str, tuple[type[SingleDataItem], bool]]:
+        """
+        This method returns all direct fields of this data item that hold other data items - either directly (also
+        optional) or as element type of a list. The result is cached per data item class.
+
+        :return: a dictionary with the field name as key and a tuple with the nested data item type and a boolean that
+                 is True if the field is a list of data items
+        """
+        result = _NESTED_DATA_ITEM_FIELDS_CACHE.get(cls)
+        if result is None:
+            result = {}
+            for cur_field_name in cls.__pydantic_fields__.keys():
+                cur_field_type = cls.get_field_data_type(cur_field_name)
+                if cur_field_type in [list, UnorderedList]:
+                    cur_elem_type = cls.get_element_type_for_list(cur_field_name)
+                    if isinstance(cur_elem_type, type) and issubclass(cur_elem_type, SingleDataItem):
+                        result[cur_field_name] = (cur_elem_type, True)
+                elif issubclass(cur_field_type, SingleDataItem):
+                    result[cur_field_name] = (cur_field_type, False)
+            _NESTED_DATA_ITEM_FIELDS_CACHE[cls] = result
+        return result
+
     def get_field_value(self, field_lookup: str):
         """
         This method returns the value of the provided field.
@@ -385,9 +607,19 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
         :param field_lookup: the field lookup string
         :return: the field value
         """
+        return self._get_field_value_by_keys(LookupFieldString(field_lookup).split_field_keys)
+
+    def _get_field_value_by_keys(self, field_keys: List[str]) -> Any:
+        """
+        Internal helper of :meth:`SingleDataItem.get_field_value` for callers that resolve the same field lookup for
+        many data items and split it only once (f.e. indexes).
+
+        :param field_keys: the split field lookup (see :meth:`LookupFieldString.split_field_keys`)
+        :return: the field value
+        """
         item = self
-        for cur_splitted_name in LookupFieldString(field_lookup).split_field_keys:
-            if item == NOT_DEFINABLE:
+        for cur_splitted_name in field_keys:
+            if item is NOT_DEFINABLE:
                 return NOT_DEFINABLE
             if not hasattr(item, cur_splitted_name):
                 raise KeyError(f'can not find field `{cur_splitted_name}` in `{item}`')
@@ -408,6 +640,16 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
                                        items and set their undefined values to `NOT_DEFINABLE`
         """
         item = self
+        batch_update_state = get_active_batch_updates().get(id(self))
+
+        def set_value(of_item: SingleDataItem, field_name: str, new_value: Any):
+            if batch_update_state is None:
+                setattr(of_item, field_name, new_value)
+            else:
+                # defer the validation till the end of the `batch_update()` block
+                batch_update_state.register(of_item)
+                # pylint: disable-next=protected-access
+                of_item._set_field_without_validation(field_name, new_value)
 
         # first resolve all nested lookup fields
         split_field_name = LookupFieldString(field_lookup).split_field_keys
@@ -424,10 +666,38 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
             # always create new object for nested value (if `only_change_this_value is False` or if field is empty)!
             if not only_change_this_value or new_item in [None, NOT_DEFINABLE]:
                 new_item = new_item_type.create_non_definable(nested=False)
-                setattr(item, cur_field_name, new_item)
+                set_value(item, cur_field_name, new_item)
+            else:
+                # the existing item will be changed -> make sure that it is not shared with a snapshot
+                # pylint: disable-next=protected-access
+                new_item = item._unshare_field(cur_field_name, batch_update_state)
             item = new_item
 
-        setattr(item, split_field_name[-1], value)
+        set_value(item, split_field_name[-1], value)
+
+    @contextlib.contextmanager
+    def batch_update(self) -> Iterator[SingleDataItemTypeT]:
+        """
+        Returns a context manager that defers the pydantic assignment validation for all writes on this data item
+        (attribute assignments and :meth:`SingleDataItem.set_field_value`) till the end of the block. The final state
+        is validated once when leaving the block. If this validation fails (or the block raises an exception), the data
+        item is restored to the state it had before entering the block.
+
+        .. code-block:: python
+
+            with item.batch_update():
+                item.name = 'new name'
+                item.set_field_value('author__last_name', 'Smith')
+
+        .. note::
+            Only writes on this data item (and writes through :meth:`SingleDataItem.set_field_value`) are deferred.
+            Direct attribute assignments on nested data items are still validated immediately. The block is bound to
+            the thread (and async task) it was entered in - writes of other threads are validated immediately.
+
+        :return: the context manager that returns this data item on enter
+        """
+        with batch_update_items([self]):
+            yield self
 
     def all_fields_are_not_definable(self) -> bool:
         """
@@ -506,6 +776,7 @@ class SingleDataItem(pydantic.BaseModel, ABC, metaclass=SingleDataItemMetaclass)
             validate_unique_identification_separately=validate_unique_identification_separately)
         return len(error_msgs) == 0
 
+    @instrumented()
     # pylint: disable-next=too-many-locals,too-many-branches,too-many-statements
     def get_difference_error_messages(
             self,
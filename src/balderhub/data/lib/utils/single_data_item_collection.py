@@ -1,12 +1,22 @@
 from __future__ import annotations
-from typing import List, Any, Callable, TYPE_CHECKING
+from typing import List, Any, Callable, Iterable, Iterator, Optional, TYPE_CHECKING
+import contextlib
+import heapq
 import random
 
+from .instrumentation import instrumented
+from .batch_update import batch_update_items
+from .data_item_index import DataItemIndexes
+from .not_definable import NOT_DEFINABLE
+from .sampling import reservoir_sample, sample_indices
+
 if TYPE_CHECKING:
+    from .data_item_index import SortedIndex
     from .filter import Filter
     from .single_data_item import SingleDataItem
 
 
+# pylint: disable-next=too-many-public-methods,too-many-instance-attributes
 class SingleDataItemCollection:
     """
     helper class to manage a collection of SingleDateItems
@@ -22,8 +32,40 @@ class SingleDataItemCollection:
         raised in case there are more than one matching elements in the list
         """
 
-    def __init__(self, items: List[SingleDataItem] = None):
+    def __init__(
+            self,
+            items: List[SingleDataItem] = None,
+            indexes: DataItemIndexes | None = None,
+            borrowed_item_ids: set[int] | None = None,
+            materialize_borrowed: Callable[[SingleDataItem], SingleDataItem] | None = None
+    ):
+        """
+        :param items: the items of the collection
+        :param indexes: optional indexes that hold exactly the provided items (used by
+                        :meth:`SingleDataItemCollection.filter_by` - set by the :class:`DataEnvironmentFeature`)
+        :param borrowed_item_ids: optional ids of the provided items that belong to another owner (f.e. the base
+                                  environment of a :class:`LayeredDataItems` mapping) and must not be changed - they
+                                  are only read until they are handed out
+        :param materialize_borrowed: optional callable that returns the own copy of a borrowed item, that replaces it
+                                     when it is handed out (a snapshot of the item if it is not set)
+        """
         self._items = items if items is not None else []
+        #: the indexes of the items (removed as soon as the items of this collection or of the indexes are changed)
+        self._indexes = indexes
+        #: the version of the indexes, when they held exactly the items of this collection
+        self._indexes_version = None if indexes is None else indexes.version
+        #: the indexes that were added to this collection (see :meth:`SingleDataItemCollection.add_index`), they are
+        #: maintained on changes of the collection
+        self._own_indexes: Optional[DataItemIndexes] = None
+        #: ids of the items that are shared with a snapshot of this collection (see
+        #: :meth:`SingleDataItemCollection.snapshot`) - they are replaced by own copies before they are handed out
+        self._shared_item_ids: set[int] = set()
+        #: ids of the items that belong to another owner - they are replaced by `_materialize_borrowed()` before they
+        #: are handed out
+        self._borrowed_item_ids: set[int] = set() if borrowed_item_ids is None else borrowed_item_ids
+        self._materialize_borrowed = materialize_borrowed
+        #: the positions of the borrowed items (id of item -> index in `_items`), created on demand
+        self._borrowed_positions: Optional[dict[int, int]] = None
 
     def __repr__(self):
         return str(f"{self.__class__.__name__}(items={self._items.__repr__()})")
@@ -35,14 +77,114 @@ class SingleDataItemCollection:
         return len(self._items)
 
     def __iter__(self):
+        if self._shared_item_ids or self._borrowed_item_ids:
+            self._materialize_items(range(len(self._items)))
         return iter(self._items)
 
     def __getitem__(self, index):
+        if self._shared_item_ids or self._borrowed_item_ids:
+            if isinstance(index, slice):
+                self._materialize_items(range(*index.indices(len(self._items))))
+            else:
+                self._materialize_items([index])
         return self._items[index]
 
+    def _materialize_items(self, indices: Iterable[int]) -> None:
+        """
+        Internal helper that replaces all shared items at the provided indices by own snapshots, so that they can be
+        handed out and changed without affecting other collections.
+
+        :param indices: the indices of the items
+        """
+        for cur_index in indices:
+            cur_item = self._items[cur_index]
+            if id(cur_item) in self._borrowed_item_ids:
+                self._replace_borrowed_item(cur_index, cur_item)
+            elif id(cur_item) in self._shared_item_ids:
+                self._shared_item_ids.discard(id(cur_item))
+                self._items[cur_index] = cur_item.snapshot()
+                self._indexes = None
+                if self._own_indexes is not None:
+                    self._own_indexes.invalidate()
+
+    def _replace_borrowed_item(self, index: int, item: SingleDataItem) -> SingleDataItem:
+        """
+        Internal helper that replaces a borrowed item by its own copy.
+
+        :param index: the index of the borrowed item
+        :param item: the borrowed item
+        :return: the own copy
+        """
+        self._borrowed_item_ids.discard(id(item))
+        # the borrowed item is never changed, so it does not need to be copied for snapshots of this collection anymore
+        self._shared_item_ids.discard(id(item))
+        own_item = item.snapshot() if self._materialize_borrowed is None else self._materialize_borrowed(item)
+        self._items[index] = own_item
+        if self._materialize_borrowed is None:
+            self._indexes = None
+        if self._own_indexes is not None:
+            self._own_indexes.invalidate()
+        return own_item
+
+    def _hand_out_indexed(self, items: Iterable[SingleDataItem]) -> List[SingleDataItem]:
+        """
+        Internal helper that returns the provided items of the indexes. Borrowed items are replaced by own copies
+        first.
+
+        :param items: the items that were received from the indexes
+        :return: the items
+        """
+        items = list(items)
+        if not self._borrowed_item_ids:
+            return items
+        if self._borrowed_positions is None:
+            self._borrowed_positions = {
+                id(cur_item): cur_index for cur_index, cur_item in enumerate(self._items)
+                if id(cur_item) in self._borrowed_item_ids
+            }
+        for cur_position, cur_item in enumerate(items):
+            if id(cur_item) in self._borrowed_item_ids:
+                items[cur_position] = self._replace_borrowed_item(self._borrowed_positions[id(cur_item)], cur_item)
+        return items
+
+    def _hand_out(self, indices: List[int]) -> List[SingleDataItem]:
+        """
+        Internal helper that returns the items at the provided indices. Shared items are replaced by own copies first
+        (see :meth:`SingleDataItemCollection.snapshot`), so that changes on the returned items stay within this
+        collection.
+
+        :param indices: the indices of the items
+        :return: the items
+        """
+        if self._shared_item_ids or self._borrowed_item_ids:
+            self._materialize_items(indices)
+        return [self._items[cur_index] for cur_index in indices]
+
+    def snapshot(self) -> SingleDataItemCollection:
+        """
+        Returns a cheap copy of this collection. Both collections share their items until an item is handed out (f.e.
+        by indexing, iterating, filtering or a getter method) - then the handed out item is replaced by its snapshot
+        (see :meth:`SingleDataItem.snapshot`) within the collection it was requested from. Items that are never
+        requested are never copied, and read-only methods like :meth:`SingleDataItemCollection.compare` do not copy
+        any item.
+
+        .. note::
+            Changes on items that were received from the collection before the snapshot was created are visible in
+            both collections.
+
+        :return: the snapshot of this collection
+        """
+        item_ids = {id(cur_item) for cur_item in self._items}
+        self._shared_item_ids |= item_ids
+        new_collection = self.__class__([*self._items])
+        # pylint: disable-next=protected-access
+        new_collection._shared_item_ids = item_ids
+        return new_collection
+
     def __eq__(self, other):
         return self.compare(other, ignore_order=False, ignore_field_lookups=None, allow_non_definable=False)
 
+    @instrumented()
     def filter(self, filter_obj: Filter | None) -> SingleDataItemCollection:
         """
         This method applies a filter to all items in the collection
@@ -50,13 +192,15 @@ class SingleDataItemCollection:
         :return:
         """
         if filter_obj is None:
+            if self._shared_item_ids or self._borrowed_item_ids:
+                self._materialize_items(range(len(self._items)))
             return self.__class__(self._items)
 
-        remaining_items = []
-        for item in self._items:
+        remaining_indices = []
+        for idx, item in enumerate(self._items):
             if filter_obj.apply(item):
-                remaining_items.append(item)
-        return self.__class__(remaining_items)
+                remaining_indices.append(idx)
+        return self.__class__(self._hand_out(remaining_indices))
 
     def sort(self, key: Callable = None, reverse: bool = False) -> SingleDataItemCollection:
         """
@@ -65,7 +209,7 @@ class SingleDataItemCollection:
         :param reverse: True if the order should be reversed, otherwise False
         :return: a new SingleDataItemCollection instance with the sorted items
         """
-        items = self._items.copy()
+        items = self._hand_out(list(range(len(self._items))))
         items.sort(key=key, reverse=reverse)
         return SingleDataItemCollection(items)
 
@@ -78,7 +222,7 @@ class SingleDataItemCollection:
 
         :return: the copied SingleDataItemCollection instance
         """
-        return SingleDataItemCollection([*self._items])
+        return SingleDataItemCollection(self._hand_out(list(range(len(self._items)))))
 
     def get_all_unique_identifier(self):
         """
@@ -96,6 +240,7 @@ class SingleDataItemCollection:
         """
         return len(self._items) == len(set(self.get_all_unique_identifier()))
 
+    @instrumented()
     def get_by_identifier(self, identifier: Any):
         """
         This method returns a specific element by its unique identifier. It throws an error in case there are more than
@@ -104,13 +249,14 @@ class SingleDataItemCollection:
         :param identifier: the unique identifier
         :return: the determined object
         """
-        remaining = [item for item in self._items if item.get_unique_identification() == identifier]
+        remaining = [idx for idx, item in enumerate(self._items) if item.get_unique_identification() == identifier]
         if len(remaining) == 0:
             raise KeyError(f'no items with identifier `{identifier}` exists')
         if len(remaining) > 1:
             raise KeyError(f'multiple items with identifier `{identifier}` exists')
-        return remaining[0]
+        return self[remaining[0]]
 
+    @instrumented()
     def filter_by(self, **kwargs) -> SingleDataItemCollection:
         """
         This method returns a new collection with the applied filters. You can use lookup-field syntax for defining
@@ -119,17 +265,27 @@ class SingleDataItemCollection:
         :param kwargs: the filter variables
         :return: a new collection that holds the filtered subset
         """
+        for cur_indexes in self._get_usable_indexes():
+            index_result = cur_indexes.find_candidates(kwargs)
+            if index_result is not None:
+                candidates, matched_lookup = index_result
+                return SingleDataItemCollection(self._hand_out_indexed(
+                    cur_elem for cur_elem in candidates
+                    if all(cur_elem.get_field_value(cur_lookup) == cur_value
+                           for cur_lookup, cur_value in kwargs.items() if cur_lookup != matched_lookup)
+                ))
         result = []
-        for cur_elem in self._items:
+        for idx, cur_elem in enumerate(self._items):
             match = True
             for field_lookup_str, value in kwargs.items():
                 if cur_elem.get_field_value(field_lookup_str) != value:
                     match = False
                     break
             if match:
-                result.append(cur_elem)
-        return SingleDataItemCollection(result)
+                result.append(idx)
+        return SingleDataItemCollection(self._hand_out(result))
 
+    @instrumented()
     def get_by(self, **kwargs) -> SingleDataItem:
         """
         This method returns a single element defined by the provided filters. You can use lookup-field syntax for
@@ -153,22 +309,297 @@ class SingleDataItemCollection:
         """
         :return: returns a random element
         """
-        return random.choice(self._items)
+        return self[random.choice(range(len(self._items)))]
+
+    @instrumented()
+    def sample(self, k: int, filter_obj: Filter | None = None, seed: Any = None) -> SingleDataItemCollection:
+        """
+        This method returns a new collection with `k` random items (without repetition) that match the filter. The
+        items are checked in random order until `k` matching items were found, so the filtered subset is never built
+        (the filter is only applied to all items, if less than `k` items match it).
+
+        :param k: the number of requested items
+        :param filter_obj: optional filter the sampled items need to match
+        :param seed: optional seed to get a reproducible sample
+        :return: a new collection with the sampled items in random order (it holds less than `k` items if there are not
+                 enough matching items)
+        """
+        predicate = None if filter_obj is None else lambda idx: filter_obj.apply(self._items[idx])
+        return SingleDataItemCollection(self._hand_out(
+            sample_indices(len(self._items), k, random.Random(seed), predicate=predicate)
+        ))
+
+    @instrumented()
+    def sample_stratified(
+            self,
+            field_lookup: str,
+            k: int,
+            filter_obj: Filter | None = None,
+            seed: Any = None
+    ) -> SingleDataItemCollection:
+        """
+        This method returns a new collection with `k` random items for every value of the field lookup (f.e. some books
+        of every category). It needs one pass over the items and only holds the sampled items of every value (reservoir
+        sampling), the groups themselves are never built.
+
+        :param field_lookup: the field lookup whose values define the groups (the values need to be hashable)
+        :param k: the number of requested items per value
+        :param filter_obj: optional filter the sampled items need to match
+        :param seed: optional seed to get a reproducible sample
+        :return: a new collection with the sampled items, grouped by the values (in the order of their first
+                 occurrence) and in the order of this collection within a group
+        """
+        if k < 0:
+            raise ValueError('the sample size needs to be positive')
+        rng = random.Random(seed)
+        reservoirs = {}
+        num_seen = {}
+        for idx, item in enumerate(self._items):
+            if filter_obj is not None and not filter_obj.apply(item):
+                continue
+            value = item.get_field_value(field_lookup)
+            reservoir = reservoirs.setdefault(value, [])
+            num_seen[value] = num_seen.get(value, 0) + 1
+            if len(reservoir) < k:
+                reservoir.append(idx)
+            else:
+                position = rng.randrange(num_seen[value])
+                if position < k:
+                    reservoir[position] = idx
+        return SingleDataItemCollection(self._hand_out(
+            [cur_index for cur_reservoir in reservoirs.values() for cur_index in sorted(cur_reservoir)]
+        ))
+
+    @staticmethod
+    @instrumented()
+    def sample_iterable(
+            iterable: Iterable[SingleDataItem],
+            k: int,
+            filter_obj: Filter | None = None,
+            seed: Any = None
+    ) -> SingleDataItemCollection:
+        """
+        This method returns a new collection with `k` random items (without repetition) of an iterable with unknown
+        length (f.e. a generator that streams data items) that match the filter. It needs one pass over the iterable
+        and only holds the sampled items in memory (reservoir sampling, see
+        :func:`balderhub.data.lib.utils.sampling.reservoir_sample`).
+
+        :param iterable: the iterable that yields the data items
+        :param k: the number of requested items
+        :param filter_obj: optional filter the sampled items need to match
+        :param seed: optional seed to get a reproducible sample
+        :return: a new collection with the sampled items in random order (it holds less than `k` items if there are not
+                 enough matching items)
+        """
+        if filter_obj is not None:
+            iterable = (cur_item for cur_item in iterable if filter_obj.apply(cur_item))
+        return SingleDataItemCollection(reservoir_sample(iterable, k, random.Random(seed)))
 
     def append(self, item: SingleDataItem) -> None:
         """
         This method adds an item to the collection.
         :param item: the item that should be added
         """
+        self._indexes = None
+        self._borrowed_positions = None
         self._items.append(item)
+        if self._own_indexes is not None:
+            self._own_indexes.add(item)
 
     def remove(self, item: SingleDataItem) -> None:
         """
         This method removes an item from the collection.
         :param item: the item that should be removed
         """
-        self._items.remove(item)
+        self._indexes = None
+        self._borrowed_positions = None
+        removed_item = self._items.pop(self._items.index(item))
+        if self._own_indexes is not None:
+            self._own_indexes.remove(removed_item)
+
+    def add_index(self, field_lookup: str, ordered: bool = False) -> None:
+        """
+        This method adds an index to this collection, that is maintained on :meth:`SingleDataItemCollection.append`
+        and :meth:`SingleDataItemCollection.remove` (and updated if an item was changed). Hash indexes are used by
+        :meth:`SingleDataItemCollection.filter_by` and :meth:`SingleDataItemCollection.get_by`. Sorted indexes are used
+        by range queries, :meth:`SingleDataItemCollection.order_by` and top-k requests.
+
+        .. note::
+            Collections returned by :meth:`DataEnvironmentFeature.get_all_for` already use the indexes, that are
+            declared by the data item class (see :meth:`SingleDataItem.get_indexed_fields` and
+            :meth:`SingleDataItem.get_sorted_indexed_fields`).
+
+        :param field_lookup: the field lookup that should be indexed
+        :param ordered: True for a sorted index, False for a hash index
+        """
+        if self._own_indexes is None:
+            self._own_indexes = DataItemIndexes([], source=lambda: self._items)
+        self._own_indexes.add_index(field_lookup, ordered=ordered)
+
+    def _get_usable_indexes(self) -> List[DataItemIndexes]:
+        """
+        :return: the indexes that hold exactly the items of this collection
+        """
+        if self._shared_item_ids:
+            # the indexes hold items that need to be materialized before they can be handed out
+            return []
+        if self._indexes is not None and self._indexes.version != self._indexes_version:
+            # data items were added to or removed from the indexes (f.e. of the environment) since this collection was
+            # created -> they can not be used anymore
+            self._indexes = None
+        return [cur_indexes for cur_indexes in (self._indexes, self._own_indexes) if cur_indexes is not None]
+
+    def _get_sorted_index(self, field_lookup: str) -> Optional[SortedIndex]:
+        for cur_indexes in self._get_usable_indexes():
+            sorted_index = cur_indexes.get_sorted_index(field_lookup)
+            if sorted_index is not None:
+                return sorted_index
+        return None
+
+    @instrumented()
+    def filter_range(  # pylint: disable=too-many-arguments
+            self,
+            field_lookup: str,
+            *,
+            gt: Any = None,
+            gte: Any = None,
+            lt: Any = None,
+            lte: Any = None
+    ) -> SingleDataItemCollection:
+        """
+        This method returns a new collection with all items whose field value is within the range. Items without a
+        value (None or `NOT_DEFINABLE`) are not part of the result. A sorted index of the field lookup is used if one
+        exists, the result is ordered by the field value then. Otherwise, all items are scanned and the result has the
+        order of this collection. Limits that can not be compared with the values raise a `TypeError` in both cases.
+
+        :param field_lookup: the field lookup
+        :param gt: the value needs to be greater than this value
+        :param gte: the value needs to be greater than or equal to this value
+        :param lt: the value needs to be lower than this value
+        :param lte: the value needs to be lower than or equal to this value
+        :return: a new collection that holds the filtered subset
+        """
+        if gt is not None and gte is not None or lt is not None and lte is not None:
+            raise ValueError('only one lower limit (`gt` or `gte`) and one upper limit (`lt` or `lte`) can be used')
+        lower, include_lower = (gt, False) if gt is not None else (gte, True)
+        upper, include_upper = (lt, False) if lt is not None else (lte, True)
+
+        sorted_index = self._get_sorted_index(field_lookup)
+        if sorted_index is not None:
+            return SingleDataItemCollection(self._hand_out_indexed(
+                sorted_index.get_range(lower, upper, include_lower, include_upper)
+            ))
+
+        def in_range(value) -> bool:
+            if value is None or value is NOT_DEFINABLE:
+                return False
+            if lower is not None and (value < lower if include_lower else value <= lower):
+                return False
+            return upper is None or (value <= upper if include_upper else value < upper)
+
+        return SingleDataItemCollection(self._hand_out(
+            [idx for idx, item in enumerate(self._items) if in_range(item.get_field_value(field_lookup))]
+        ))
+
+    def filter_between(self, field_lookup: str, lower: Any, upper: Any) -> SingleDataItemCollection:
+        """
+        This method returns a new collection with all items whose field value is between both limits (including the
+        limits). See :meth:`SingleDataItemCollection.filter_range` for more details.
+
+        :param field_lookup: the field lookup
+        :param lower: the lower limit
+        :param upper: the upper limit
+        :return: a new collection that holds the filtered subset
+        """
+        return self.filter_range(field_lookup, gte=lower, lte=upper)
+
+    @instrumented()
+    def order_by(self, field_lookup: str, reverse: bool = False) -> SingleDataItemCollection:
+        """
+        This method returns a new collection with the items ordered by the value of the field lookup. Items with equal
+        values keep their order. A sorted index of the field lookup is used if one exists, so the items do not need to
+        be sorted again.
+
+        :param field_lookup: the field lookup
+        :param reverse: True for a descending order
+        :return: a new SingleDataItemCollection instance with the ordered items
+        """
+        sorted_index = self._get_sorted_index(field_lookup)
+        if sorted_index is not None:
+            return SingleDataItemCollection(self._hand_out_indexed(sorted_index.iter_ordered(reverse=reverse)))
+        return self.sort(key=lambda item: item.get_field_value(field_lookup), reverse=reverse)
+
+    def _get_top(self, field_lookup: str, count: int, largest: bool) -> SingleDataItemCollection:
+        sorted_index = self._get_sorted_index(field_lookup)
+        if sorted_index is not None:
+            ordered_items = sorted_index.iter_ordered(reverse=largest)
+            return SingleDataItemCollection(self._hand_out_indexed(
+                [next(ordered_items) for _ in range(min(count, len(sorted_index)))]
+            ))
+        select = heapq.nlargest if largest else heapq.nsmallest
+        indices = select(count, range(len(self._items)), key=lambda idx: self._items[idx].get_field_value(field_lookup))
+        return SingleDataItemCollection(self._hand_out(indices))
+
+    @instrumented()
+    def get_largest(self, field_lookup: str, count: int) -> SingleDataItemCollection:
+        """
+        This method returns the items with the largest values of the field lookup (f.e. "the N newest items"), in
+        descending order. It uses a sorted index of the field lookup if one exists, otherwise a heap - the collection is
+        never sorted completely.
+
+        :param field_lookup: the field lookup
+        :param count: the number of requested items
+        :return: a new collection with at most `count` items
+        """
+        return self._get_top(field_lookup, count, largest=True)
+
+    @instrumented()
+    def get_smallest(self, field_lookup: str, count: int) -> SingleDataItemCollection:
+        """
+        This method returns the items with the smallest values of the field lookup, in ascending order. It uses a
+        sorted index of the field lookup if one exists, otherwise a heap - the collection is never sorted completely.
+
+        :param field_lookup: the field lookup
+        :param count: the number of requested items
+        :return: a new collection with at most `count` items
+        """
+        return self._get_top(field_lookup, count, largest=False)
+
+    def get_dirty_items(self) -> SingleDataItemCollection:
+        """
+        This method returns a new collection with all items that have changed fields (see
+        :meth:`SingleDataItem.get_dirty_fields`).
+
+        :return: a new collection that holds the changed items
+        """
+        return SingleDataItemCollection(
+            self._hand_out([idx for idx, item in enumerate(self._items) if item.is_dirty()])
+        )
+
+    def clear_dirty(self) -> None:
+        """
+        This method marks all items of the collection as unchanged (see :meth:`SingleDataItem.clear_dirty`).
+        """
+        for item in self:
+            item.clear_dirty()
+
+    @contextlib.contextmanager
+    def batch_update(self) -> Iterator[SingleDataItemCollection]:
+        """
+        Returns a context manager that defers the pydantic assignment validation of all items in this collection till
+        the end of the block (see :meth:`SingleDataItem.batch_update`). The final state of all items is validated once
+        when leaving the block. If the validation of any item fails, all items are restored to the state they had
+        before entering the block.
+
+        .. note::
+            Items that are added to the collection within the block are not part of the batch update.
+
+        :return: the context manager that returns this collection on enter
+        """
+        with batch_update_items(self):
+            yield self
 
+    @instrumented()
     def get_difference_error_messages(
             self,
             other_collection: SingleDataItemCollection,
@@ -190,17 +621,17 @@ class SingleDataItemCollection:
         """
         if len(self) != len(other_collection):
             return [f'list have different lengths (self: {len(self)} | other: {len(other_collection)})']
+        # use the internal lists, because a pure comparison does not need own copies of shared items (see `snapshot()`)
+        self_items = self._items
+        other_items = other_collection._items  # pylint: disable=protected-access
         if ignore_order:
-            self_copy = self.sort(key=lambda e: e.get_unique_identification())
-            other_copy = other_collection.sort(key=lambda e: e.get_unique_identification())
-        else:
-            self_copy = self.copy()
-            other_copy = other_collection.copy()
+            self_items = sorted(self_items, key=lambda e: e.get_unique_identification())
+            other_items = sorted(other_items, key=lambda e: e.get_unique_identification())
 
         result = []
         for idx in range(len(self)):
-            cur_self = self_copy[idx]
-            cur_other = other_copy[idx]
+            cur_self = self_items[idx]
+            cur_other = other_items[idx]
             result.extend(cur_self.get_difference_error_messages(
                 cur_other,
                 ignore_field_lookups,
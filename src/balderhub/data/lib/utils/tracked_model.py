@@ -0,0 +1,382 @@
+from __future__ import annotations
+from typing import Any, Iterator, Optional, TypeVar, TYPE_CHECKING
+import copy
+import hashlib
+import weakref
+
+import pydantic
+
+from .batch_update import get_active_batch_updates
+from .lookup_field_string import LookupFieldString
+from .not_definable import NOT_DEFINABLE
+from .unordered_list import UnorderedList
+
+if TYPE_CHECKING:
+    from .batch_update import BatchUpdateState
+    from .data_item_index import DataItemIndexes
+
+TrackedModelTypeT = TypeVar("TrackedModelTypeT", bound="TrackedModel")
+
+#: mutable container types that are copied if they are shared with a snapshot (see :meth:`TrackedModel.snapshot`)
+_SHAREABLE_CONTAINER_TYPES = (list, dict, set)
+#: value types that can neither hold nested models nor be changed in-place (skipped quickly by the dirty tracking)
+_IMMUTABLE_TYPES = frozenset({str, int, float, bool, bytes, type(None)})
+
+
+class _TrackingState:
+    """
+    Internal state of a :class:`TrackedModel` instance.
+    """
+    __slots__ = ('shared_fields', 'dirty_fields', 'list_baselines', 'observers')
+
+    def __init__(
+            self,
+            shared_fields: frozenset[str] = frozenset(),
+            dirty_fields: Optional[set[str]] = None,
+            list_baselines: Optional[dict[str, tuple]] = None
+    ):
+        #: the names of the fields whose values are (possibly) shared with snapshots
+        self.shared_fields = shared_fields
+        #: the names of the fields that were set since the last :meth:`TrackedModel.clear_dirty` call
+        self.dirty_fields: set[str] = set() if dirty_fields is None else dirty_fields
+        #: the elements of all list fields at the last :meth:`TrackedModel.clear_dirty` call (never changed in-place,
+        #: so it can be shared between snapshots)
+        self.list_baselines: dict[str, tuple] = {} if list_baselines is None else list_baselines
+        #: weak references to the indexes that are notified about field changes, keyed by their `id()` (see
+        #: :meth:`TrackedModel._add_observer`)
+        self.observers: Optional[dict[int, weakref.ref[DataItemIndexes]]] = None
+
+    def copy(self) -> _TrackingState:
+        """
+        :return: an independent copy of this state (without the observers, they belong to the model instance)
+        """
+        return _TrackingState(self.shared_fields, set(self.dirty_fields), self.list_baselines)
+
+
+class TrackedModel(pydantic.BaseModel):
+    """
+    Base class of :class:`balderhub.data.lib.utils.SingleDataItem` that provides cheap copy-on-write snapshots and the
+    tracking of changed (dirty) fields.
+    """
+    # holds the :class:`_TrackingState` - a slot is not copied by pydantic and not part of the comparison or
+    # serialization of the model
+    __slots__ = ('__balderhub_tracking__',)
+
+    def model_post_init(self, context: Any, /) -> None:
+        # a new model has no tracking state - the slot is initialized, so that reading it does not raise
+        _TRACKING_SLOT.__set__(self, None)  # pylint: disable=unnecessary-dunder-call
+        super().model_post_init(context)
+
+    def __copy__(self: TrackedModelTypeT) -> TrackedModelTypeT:
+        new_item = super().__copy__()
+        _TRACKING_SLOT.__set__(new_item, None)  # pylint: disable=unnecessary-dunder-call
+        return new_item
+
+    def __deepcopy__(self: TrackedModelTypeT, memo: Optional[dict[int, Any]] = None) -> TrackedModelTypeT:
+        new_item = super().__deepcopy__(memo)
+        _TRACKING_SLOT.__set__(new_item, None)  # pylint: disable=unnecessary-dunder-call
+        return new_item
+
+    def __setstate__(self, state: dict[Any, Any]) -> None:
+        super().__setstate__(state)
+        _TRACKING_SLOT.__set__(self, None)  # pylint: disable=unnecessary-dunder-call
+
+    def _get_tracking_state(self, create: bool = False) -> Optional[_TrackingState]:
+        """
+        :param create: True if the state should be created if it does not exist yet
+        :return: the tracking state of this item (None if it does not exist and `create` is False)
+        """
+        try:
+            # access the slot directly, because a missing attribute would be resolved by pydantic's `__getattr__`
+            state = _TRACKING_SLOT.__get__(self)  # pylint: disable=unnecessary-dunder-call
+        except AttributeError:
+            # the slot was not initialized (f.e. a subclass overwrites `model_post_init()` without calling it)
+            state = None
+        if state is None and create:
+            state = _TrackingState()
+            _TRACKING_SLOT.__set__(self, state)  # pylint: disable=unnecessary-dunder-call
+        return state
+
+    def _get_tracking_backup(self) -> Optional[_TrackingState]:
+        """
+        :return: a copy of the tracking state that can be restored with :meth:`TrackedModel._restore_tracking_backup`
+        """
+        state = self._get_tracking_state()
+        return None if state is None else state.copy()
+
+    def _restore_tracking_backup(self, backup: Optional[_TrackingState]) -> None:
+        """
+        Restores a tracking state that was returned by :meth:`TrackedModel._get_tracking_backup`.
+
+        :param backup: the backup of the tracking state
+        """
+        state = _TrackingState() if backup is None else backup.copy()
+        current_state = self._get_tracking_state()
+        if current_state is not None:
+            state.observers = current_state.observers
+        _TRACKING_SLOT.__set__(self, state)  # pylint: disable=unnecessary-dunder-call
+        # the field values are restored too
+        self._notify_observers()
+
+    def _add_observer(self, observer: DataItemIndexes) -> None:
+        """
+        Registers indexes that are notified about all field changes of this model (assignments, changes with
+        :meth:`SingleDataItem.set_field_value`, unshared values and restored batch updates) by calling their
+        `item_changed()` method. The observer is only weakly referenced.
+
+        .. note::
+            In-place changes of lists are not notified.
+
+        :param observer: the indexes that should be notified
+        """
+        state = self._get_tracking_state(create=True)
+        if state.observers is None:
+            state.observers = {}
+        state.observers[id(observer)] = weakref.ref(observer)
+
+    def _remove_observer(self, observer: DataItemIndexes) -> None:
+        """
+        Removes indexes that were registered with :meth:`TrackedModel._add_observer`.
+
+        :param observer: the indexes that should not be notified anymore
+        """
+        state = self._get_tracking_state()
+        if state is not None and state.observers is not None:
+            state.observers.pop(id(observer), None)
+
+    def _notify_observers(self) -> None:
+        """
+        Notifies all registered observers (see :meth:`TrackedModel._add_observer`) that this model was changed.
+        """
+        state = self._get_tracking_state()
+        if state is not None and state.observers:
+            for cur_observer_id, cur_observer_ref in list(state.observers.items()):
+                cur_observer = cur_observer_ref()
+                if cur_observer is None:
+                    del state.observers[cur_observer_id]
+                else:
+                    cur_observer.item_changed(self)
+
+    def snapshot(self: TrackedModelTypeT) -> TrackedModelTypeT:
+        """
+        Returns a cheap copy of this data item. In contrast to a deep copy, the snapshot shares all nested data items,
+        lists, dictionaries and sets with this data item (structural sharing). A shared value is copied (one level)
+        as soon as it is changed over :meth:`SingleDataItem.set_field_value` (with `only_change_this_value=True`) or
+        requested with :meth:`TrackedModel.get_mutable` - on any of both items. Replacing a field value (f.e. with
+        an assignment) never affects the other item. The snapshot takes over the dirty fields of this data item (see
+        :meth:`TrackedModel.get_dirty_fields`).
+
+        .. code-block:: python
+
+            expected = actual.snapshot()
+            expected.set_field_value('author__last_name', 'Smith', only_change_this_value=True)
+            # `actual.author` is unchanged
+
+        .. note::
+            In-place changes of a shared value that bypass these methods (f.e. `expected.author.last_name = 'Smith'`
+            or `expected.tags.append('new')`) are visible in both items. Use `expected.get_mutable('author')` or
+            `expected.get_mutable('tags')` to receive an own copy first.
+
+        :return: the snapshot of this data item
+        """
+        new_item = self.model_copy()
+        state = self._get_tracking_state(create=True)
+        # mark all fields as shared - it is cheaper to check the value type on the first change than on every snapshot
+        state.shared_fields = frozenset(self.__dict__)
+        _TRACKING_SLOT.__set__(new_item, state.copy())  # pylint: disable=unnecessary-dunder-call
+        return new_item
+
+    def get_mutable(self, field_lookup: str | LookupFieldString) -> Any:
+        """
+        Returns the value of the provided field, that can be changed in-place safely. If the value (or one of the
+        nested data items on the way to it) is shared with a snapshot (see :meth:`TrackedModel.snapshot`), it is
+        copied first and the copy is set for this data item.
+
+        :param field_lookup: the field lookup string
+        :return: the field value (`NOT_DEFINABLE` if one nested data item on the way is not definable)
+        """
+        batch_update_state = get_active_batch_updates().get(id(self))
+        item = self
+        for cur_splitted_name in LookupFieldString(field_lookup).split_field_keys:
+            if item == NOT_DEFINABLE:
+                return NOT_DEFINABLE
+            if not isinstance(item, TrackedModel) or cur_splitted_name not in item.__pydantic_fields__:
+                raise KeyError(f'can not find field `{cur_splitted_name}` in `{item}`')
+            # pylint: disable-next=protected-access
+            item = item._unshare_field(cur_splitted_name, batch_update_state)
+        return item
+
+    def _unshare_field(self, field_name: str, batch_update_state: Optional[BatchUpdateState] = None) -> Any:
+        """
+        Internal helper that makes sure that the value of the provided (direct) field is not shared with a snapshot.
+        A shared value is replaced by a copy: data items by its snapshot, lists by a new list with snapshots of the
+        contained data items and dictionaries / sets by a shallow copy.
+
+        :param field_name: the name of the direct field
+        :param batch_update_state: the state of the active batch update the data item belongs to (if there is one)
+        :return: the (unshared) field value
+        """
+        value = self.__dict__.get(field_name)
+        if isinstance(value, list):
+            # the list is probably changed in-place next
+            self._record_list_baseline(field_name, value)
+        state = self._get_tracking_state()
+        if state is None or field_name not in state.shared_fields:
+            return value
+        if isinstance(value, _SHAREABLE_CONTAINER_TYPES):
+            value = copy.copy(value)
+            if isinstance(value, list):
+                for cur_idx, cur_elem in enumerate(value):
+                    if isinstance(cur_elem, TrackedModel):
+                        value[cur_idx] = cur_elem.snapshot()
+        elif isinstance(value, TrackedModel):
+            value = value.snapshot()
+        else:
+            # immutable value (or `None` / `NOT_DEFINABLE`) - nothing to copy
+            state.shared_fields = state.shared_fields - {field_name}
+            return value
+        if batch_update_state is not None:
+            batch_update_state.register(self)
+        # the copy is valid, because it is a copy of the valid value
+        self.__dict__[field_name] = value
+        state.shared_fields = state.shared_fields - {field_name}
+        # the value is equal, but observers could track the replaced nested data items
+        self._notify_observers()
+        return value
+
+    def _record_list_baseline(self, field_name: str, value: list) -> None:
+        """
+        Internal helper that remembers the current elements of a list field to detect later in-place changes, if they
+        were not remembered since the last change of the field (see :meth:`TrackedModel.clear_dirty`).
+
+        :param field_name: the name of the direct list field
+        :param value: the current list
+        """
+        state = self._get_tracking_state(create=True)
+        if field_name not in state.list_baselines and field_name not in state.dirty_fields:
+            # the mapping is shared with snapshots -> never change it in-place
+            state.list_baselines = {**state.list_baselines, field_name: tuple(value)}
+
+    def _mark_dirty(self, field_name: str) -> None:
+        """
+        Marks a direct field as changed.
+
+        :param field_name: the name of the direct field
+        """
+        state = self._get_tracking_state(create=True)
+        state.dirty_fields.add(field_name)
+        if state.observers:
+            self._notify_observers()
+
+    def get_dirty_fields(self) -> set[str]:
+        """
+        Returns the lookup paths of all fields that were changed since this data item was created or since the last
+        call of :meth:`TrackedModel.clear_dirty`. A field is changed if it was set (by an assignment or
+        :meth:`SingleDataItem.set_field_value`), if one of its nested data items has a changed field (reported as
+        nested lookup path, f.e. `author__last_name`) or - for lists - if the elements of the list were changed
+        in-place or one of the contained data items has a changed field (reported as the list field itself).
+
+        .. note::
+            In-place changes of lists are detected in relation to the elements the list had at the last
+            :meth:`TrackedModel.clear_dirty` call or when it was requested with :meth:`TrackedModel.get_mutable`
+            afterwards. Other in-place changes can not be detected before :meth:`TrackedModel.clear_dirty` was called
+            once.
+
+        :return: a set with the lookup paths of all changed fields
+        """
+        return set(self._iter_dirty_fields())
+
+    def _iter_dirty_fields(self) -> Iterator[str]:
+        """
+        Internal helper that yields the lookup paths of all changed fields (see :meth:`TrackedModel.get_dirty_fields`).
+        The direct fields are yielded first, so that :meth:`TrackedModel.is_dirty` can stop early.
+
+        :return: an iterator over the lookup paths
+        """
+        state = self._get_tracking_state()
+        dirty_fields = frozenset() if state is None else frozenset(state.dirty_fields)
+        yield from dirty_fields
+        list_baselines = {} if state is None else state.list_baselines
+        for cur_name, cur_value in self.__dict__.items():
+            if cur_name in dirty_fields or type(cur_value) in _IMMUTABLE_TYPES:
+                continue
+            if isinstance(cur_value, TrackedModel):
+                # pylint: disable-next=protected-access
+                for cur_sub_path in cur_value._iter_dirty_fields():
+                    yield f'{cur_name}__{cur_sub_path}'
+            elif isinstance(cur_value, list):
+                baseline = list_baselines.get(cur_name)
+                if baseline is not None and _list_was_changed(cur_value, baseline):
+                    yield cur_name
+                elif any(isinstance(cur_elem, TrackedModel) and cur_elem.is_dirty() for cur_elem in cur_value):
+                    yield cur_name
+
+    def is_dirty(self) -> bool:
+        """
+        :return: True if at least one field was changed (see :meth:`TrackedModel.get_dirty_fields`)
+        """
+        return next(self._iter_dirty_fields(), None) is not None
+
+    def clear_dirty(self) -> None:
+        """
+        Marks this data item (including all nested data items) as unchanged. The current elements of all list fields
+        are remembered to detect later in-place changes.
+        """
+        list_baselines = {}
+        for cur_name, cur_value in self.__dict__.items():
+            if type(cur_value) in _IMMUTABLE_TYPES:
+                continue
+            if isinstance(cur_value, TrackedModel):
+                cur_value.clear_dirty()
+            elif isinstance(cur_value, list):
+                list_baselines[cur_name] = tuple(cur_value)
+                for cur_elem in cur_value:
+                    if isinstance(cur_elem, TrackedModel):
+                        cur_elem.clear_dirty()
+        state = self._get_tracking_state(create=True)
+        state.dirty_fields.clear()
+        state.list_baselines = list_baselines
+
+    def get_digest(self) -> str:
+        """
+        Returns a digest of the current values of this data item (including all nested data items). Two data items
+        with equal values have the same digest - also in different python processes, as long as all values have a
+        deterministic `repr()`. The order of :class:`UnorderedList` values does not influence the digest.
+
+        :return: the digest as hex string
+        """
+        return hashlib.blake2b(repr(_to_canonical(self)).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _list_was_changed(value: list, baseline: tuple) -> bool:
+    if len(value) != len(baseline):
+        return True
+    # elements that are no longer identical could be copies (see `TrackedModel.snapshot()`) -> compare them
+    return any(cur_elem is not cur_base and cur_elem != cur_base for cur_elem, cur_base in zip(value, baseline))
+
+
+def _to_canonical(value: Any) -> Any:  # pylint: disable=too-many-return-statements
+    """
+    Converts a value into a canonical structure of tuples and plain values, whose `repr()` is used for the digest.
+    """
+    if type(value) in _IMMUTABLE_TYPES:
+        return value
+    if isinstance(value, pydantic.BaseModel):
+        return (
+            value.__class__.__qualname__,
+            tuple((cur_name, _to_canonical(cur_value)) for cur_name, cur_value in value.__dict__.items())
+        )
+    if isinstance(value, UnorderedList):
+        return 'unordered', tuple(sorted((_to_canonical(cur_elem) for cur_elem in value), key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(_to_canonical(cur_elem) for cur_elem in value)
+    if isinstance(value, dict):
+        return 'dict', tuple(sorted(((repr(cur_key), _to_canonical(cur_value)) for cur_key, cur_value in value.items()),
+                                    key=lambda elem: elem[0]))
+    if isinstance(value, (set, frozenset)):
+        return 'set', tuple(sorted(repr(_to_canonical(cur_elem)) for cur_elem in value))
+    return value
+
+
+#: the slot descriptor that holds the :class:`_TrackingState` of a :class:`TrackedModel`
+_TRACKING_SLOT = TrackedModel.__dict__['__balderhub_tracking__']
@@ -1 +1,2 @@
 from balderplugin.junit import JunitPlugin
+from balderhub.data.lib.utils.instrumentation_plugin import InstrumentationReportPlugin
@@ -0,0 +1,183 @@
+from balderhub.unit.scenarios import ScenarioUnit
+from balderhub.auth.lib.utils import ResourceRule
+
+from balderhub.data.contrib.auth.setup_features.data_item_param_provider import DataItemParamProvider
+from balderhub.data.contrib.auth.utils import ResourceForSpecificDataItem
+from balderhub.data.lib.scenario_features import InitialDataConfig
+from balderhub.data.lib.scenario_features.data_environment_feature import DataEnvironmentFeature
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+from balderhub.data.lib.utils.single_data_item_collection import SingleDataItemCollection
+
+
+class ProviderItem(SingleDataItem):
+    id: int
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class ProviderEnvironment(DataEnvironmentFeature):
+    """environment that holds ten items"""
+
+    def load_data(self):
+        self._add_data([ProviderItem(id=idx) for idx in range(10)])
+
+    def sync_environment(self):
+        pass
+
+
+PROVIDER_ENVIRONMENT = ProviderEnvironment()
+
+
+class ProviderInitialDataConfig(InitialDataConfig):
+    """initial data config that returns a new collection of the environment items on every access"""
+
+    @property
+    def data_list(self):
+        return PROVIDER_ENVIRONMENT.get_all_for(ProviderItem)
+
+
+class FreshInitialDataConfig(InitialDataConfig):
+    """initial data config that creates new items on every access"""
+
+    @property
+    def data_list(self):
+        return SingleDataItemCollection([ProviderItem(id=idx) for idx in range(10)])
+
+
+class ProviderResource(ResourceForSpecificDataItem):
+    """resource for the provider items"""
+
+    def get_resolved_resource(self, param):
+        return None
+
+
+class AllParamProvider(DataItemParamProvider):
+    """provider that returns all matching parameters"""
+
+    class Server(DataItemParamProvider.Server):
+        """server with the provider items"""
+        all_data = ProviderInitialDataConfig()
+
+
+class FreshParamProvider(DataItemParamProvider):
+    """provider whose server returns new items on every access"""
+
+    class Server(DataItemParamProvider.Server):
+        """server with new items on every access"""
+        all_data = FreshInitialDataConfig()
+
+
+class MinimumParamProvider(AllParamProvider):
+    """provider that returns two matching parameters"""
+    RESOLVING_MODE = DataItemParamProvider.ResolvingMode.MINIMUM
+    ENFORCING_PARAMETERS = 2
+
+
+def create_rule(cb_rule=None):
+    return ResourceRule(ProviderResource(ProviderItem), [], rule=cb_rule)
+
+
+class ScenarioContribAuthDataItemParamProvider(ScenarioUnit):
+    """Unit-like tests for the DataItemParamProvider class."""
+
+    def test_get_parameters_for(self):
+        provider = AllParamProvider()
+        parameters = provider.get_parameters_for(create_rule(lambda param: param.data_item.id % 3 == 0))
+        assert [param.data_item.id for param in parameters] == [0, 3, 6, 9]
+        assert len(provider.get_parameters_for(create_rule())) == 10
+
+    def test_parameters_are_reused_across_rules(self):
+        provider = AllParamProvider()
+        first = provider.get_parameters_for(create_rule())
+        second = provider.get_parameters_for(create_rule(lambda param: param.data_item.id < 5))
+        assert all(first_param is second_param for first_param, second_param in zip(first, second))
+
+    def test_parameters_of_fresh_items_are_not_cached(self):
+        provider = FreshParamProvider()
+        first = provider.get_parameters_for(create_rule())
+        for _ in range(5):
+            second = provider.get_parameters_for(create_rule())
+        assert [param.data_item.id for param in second] == list(range(10))
+        assert all(first_param.data_item is not second_param.data_item
+                   for first_param, second_param in zip(first, second))
+        # only the parameters of the last data list are held
+        assert len(provider._parameters) == 10
+
+    def test_parameters_follow_the_environment(self):
+        environment = ProviderEnvironment()
+
+        class EnvironmentInitialDataConfig(InitialDataConfig):
+            @property
+            def data_list(self):
+                return environment.get_all_for(ProviderItem)
+
+        class EnvironmentParamProvider(DataItemParamProvider):
+            class Server(DataItemParamProvider.Server):
+                all_data = EnvironmentInitialDataConfig()
+
+        provider = EnvironmentParamProvider()
+        first = provider.get_parameters_for(create_rule())
+        second = provider.get_parameters_for(create_rule())
+        assert all(first_param is second_param for first_param, second_param in zip(first, second))
+
+        environment._override_data(ProviderItem(id=3))
+        environment._remove_data(ProviderItem, 7)
+        third = provider.get_parameters_for(create_rule())
+        assert [param.data_item.id for param in third] == [0, 1, 2, 4, 5, 6, 8, 9, 3]
+        assert third[0] is first[0]
+        assert third[-1] is not first[3] and third[-1].data_item is environment.get(ProviderItem, 3)
+        assert len(provider._parameters) == 9
+
+    def test_minimum_mode_stops_after_enough_parameters(self):
+        provider = MinimumParamProvider()
+        checked = []
+
+        def cb_rule(param):
+            checked.append(param.data_item.id)
+            return param.data_item.id % 2 == 1
+
+        parameters = provider.get_parameters_for(create_rule(cb_rule))
+        assert [param.data_item.id for param in parameters] == [1, 3]
+        assert checked == [0, 1, 2, 3]
+
+    def test_minimum_mode_raises_without_enough_parameters(self):
+        provider = MinimumParamProvider()
+        try:
+            provider.get_parameters_for(create_rule(lambda param: param.data_item.id == 4))
+            assert False, 'ValueError expected'
+        except ValueError:
+            pass
+
+    def test_minimum_mode_raises_without_enforcing_parameters(self):
+
+        class InvalidParamProvider(AllParamProvider):
+            """provider without the required ENFORCING_PARAMETERS"""
+            RESOLVING_MODE = DataItemParamProvider.ResolvingMode.MINIMUM
+
+        try:
+            InvalidParamProvider().get_parameters_for(create_rule())
+            assert False, 'ValueError expected'
+        except ValueError:
+            pass
+
+    def test_get_parameters_for_rules(self):
+        provider = MinimumParamProvider()
+        checked = {'even': [], 'large': []}
+
+        def even_rule(param):
+            checked['even'].append(param.data_item.id)
+            return param.data_item.id % 2 == 0
+
+        def large_rule(param):
+            checked['large'].append(param.data_item.id)
+            return param.data_item.id >= 6
+
+        rules = [create_rule(even_rule), create_rule(large_rule), create_rule()]
+        result = provider.get_parameters_for_rules(rules)
+        assert [[param.data_item.id for param in cur_params] for cur_params in result] == [[0, 2], [6, 7], [0, 1]]
+        # every rule is only evaluated until it has enough parameters
+        assert checked == {'even': [0, 1, 2], 'large': [0, 1, 2, 3, 4, 5, 6, 7]}
+        assert result[0][0] is result[2][0]
+        assert [[param.data_item.id for param in provider.get_parameters_for(cur_rule)] for cur_rule in rules] == \
+            [[0, 2], [6, 7], [0, 1]]
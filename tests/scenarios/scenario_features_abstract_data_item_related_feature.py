@@ -0,0 +1,91 @@
+from balderhub.unit.scenarios import ScenarioUnit
+
+from balderhub.data import register_for_data_item
+from balderhub.data.lib.scenario_features.abstract_data_item_related_feature import AbstractDataItemRelatedFeature
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+
+
+class BookItem(SingleDataItem):
+    title: str
+
+    def get_unique_identification(self):
+        return self.title
+
+
+class AuthorItem(SingleDataItem):
+    name: str
+
+    def get_unique_identification(self):
+        return self.name
+
+
+class BaseTestFeature(AbstractDataItemRelatedFeature):
+    pass
+
+
+class OtherBaseTestFeature(AbstractDataItemRelatedFeature):
+    pass
+
+
+@register_for_data_item(BookItem)
+class BookTestFeature(BaseTestFeature):
+    pass
+
+
+class IntermediateTestFeature(BaseTestFeature):
+    pass
+
+
+@register_for_data_item(AuthorItem)
+class AuthorTestFeature(IntermediateTestFeature):
+    pass
+
+
+class ScenarioFeaturesAbstractDataItemRelatedFeature(ScenarioUnit):
+    """Unit-like tests for the registry of AbstractDataItemRelatedFeature."""
+
+    def test_get_specific_feature_for_direct_registration(self):
+        assert isinstance(BookTestFeature.get_specific_feature_for(BookItem), BookTestFeature)
+
+    def test_get_specific_feature_for_parent_classes(self):
+        assert isinstance(BaseTestFeature.get_specific_feature_for(BookItem), BookTestFeature)
+        assert isinstance(BaseTestFeature.get_specific_feature_for(AuthorItem), AuthorTestFeature)
+        assert isinstance(IntermediateTestFeature.get_specific_feature_for(AuthorItem), AuthorTestFeature)
+
+    def test_get_specific_feature_for_unrelated_class_raises_key_error(self):
+        try:
+            OtherBaseTestFeature.get_specific_feature_for(BookItem)
+            assert False, "KeyError expected"
+        except KeyError as exc:
+            assert exc.args[0] == (f"can not find a registered feature for data item `{BookItem}` in "
+                                   f"`OtherBaseTestFeature`"), exc
+        try:
+            IntermediateTestFeature.get_specific_feature_for(BookItem)
+            assert False, "KeyError expected"
+        except KeyError:
+            pass
+
+    def test_new_registration_invalidates_index(self):
+        class MagazineItem(SingleDataItem):
+            title: str
+
+            def get_unique_identification(self):
+                return self.title
+
+        class MagazineTestFeature(OtherBaseTestFeature):
+            pass
+
+        class SecondMagazineTestFeature(OtherBaseTestFeature):
+            pass
+
+        register_for_data_item(MagazineItem)(MagazineTestFeature)
+        assert isinstance(OtherBaseTestFeature.get_specific_feature_for(MagazineItem), MagazineTestFeature)
+
+        register_for_data_item(MagazineItem)(SecondMagazineTestFeature)
+        assert isinstance(SecondMagazineTestFeature.get_specific_feature_for(MagazineItem), SecondMagazineTestFeature)
+        try:
+            OtherBaseTestFeature.get_specific_feature_for(MagazineItem)
+            assert False, "KeyError expected"
+        except KeyError as exc:
+            assert exc.args[0] == (f"found more than one possible features for data item `{MagazineItem}` in "
+                                   f"`OtherBaseTestFeature`"), exc
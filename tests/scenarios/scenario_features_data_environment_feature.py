@@ -0,0 +1,658 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from balderhub.unit.scenarios import ScenarioUnit
+
+from balderhub.data.lib.scenario_features.data_environment_feature import DataEnvironmentFeature
+from balderhub.data.lib.utils.exceptions import DuplicateDataObjectError, ReferentialIntegrityError
+from balderhub.data.lib.utils.filter import Filter
+from balderhub.data.lib.utils import partitioning
+from balderhub.data.lib.utils.shared_data_store import ENV_VARIABLE_SHARED_STORE, SharedDataItems, get_shared_store_name
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+
+
+class EnvironmentAuthor(SingleDataItem):
+    id: int
+    name: str
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class IndexedEnvironmentBook(SingleDataItem):
+    id: int
+    title: str
+    author: EnvironmentAuthor
+
+    def get_unique_identification(self):
+        return self.id
+
+    @classmethod
+    def get_indexed_fields(cls):
+        return ['author__name', 'title']
+
+    @classmethod
+    def get_sorted_indexed_fields(cls):
+        return ['id']
+
+
+class EnvironmentBook(SingleDataItem):
+    id: int
+    title: str
+    author: EnvironmentAuthor
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class LibraryEnvironment(DataEnvironmentFeature):
+    """environment with some authors and books"""
+
+    def load_data(self):
+        authors = [EnvironmentAuthor(id=idx, name=f'author {idx}') for idx in range(3)]
+        self._add_data(authors)
+        self._add_data([
+            EnvironmentBook(id=idx, title=f'book {idx}', author=authors[idx % 3].snapshot()) for idx in range(5)
+        ])
+
+    def sync_environment(self):
+        pass
+
+
+class PartitionedLibraryEnvironment(LibraryEnvironment):
+    """environment that is sharded into three partitions"""
+    PARTITION_COUNT = 3
+
+    def load_foreign_item(self, data_obj_type, unique_identification):
+        return LibraryEnvironment().get(data_obj_type, unique_identification)
+
+
+class ExtendedLibraryEnvironment(DataEnvironmentFeature):
+    """environment that is based on the :class:`LibraryEnvironment`"""
+    BASE_ENVIRONMENT = LibraryEnvironment
+
+    def load_data(self):
+        self._add_data(EnvironmentAuthor(id=3, name='author 3'))
+        self._add_data(EnvironmentBook(id=5, title='book 5', author=EnvironmentAuthor(id=3, name='author 3')))
+        self._override_data(EnvironmentBook(id=1, title='new book 1', author=EnvironmentAuthor(id=3, name='author 3')))
+        self._remove_data(EnvironmentBook, [0, 4])
+
+    def sync_environment(self):
+        pass
+
+
+class IndexedLibraryEnvironment(DataEnvironmentFeature):
+    """environment with indexed books"""
+
+    def load_data(self):
+        authors = [EnvironmentAuthor(id=idx, name=f'author {idx}') for idx in range(3)]
+        self._add_data(authors)
+        self._add_data([
+            IndexedEnvironmentBook(id=idx, title=f'book {idx % 4}', author=authors[idx % 3].snapshot())
+            for idx in range(12)
+        ])
+
+    def sync_environment(self):
+        pass
+
+
+class BrokenLibraryEnvironment(DataEnvironmentFeature):
+    """environment with books that reference authors, which do not exist"""
+
+    def load_data(self):
+        self._add_data(EnvironmentAuthor(id=0, name='author 0'))
+        self._add_data([
+            EnvironmentBook(id=idx, title=f'book {idx}', author=EnvironmentAuthor(id=idx, name=f'author {idx}'))
+            for idx in range(3)
+        ])
+
+    def sync_environment(self):
+        pass
+
+
+class SyncingLibraryEnvironment(LibraryEnvironment):
+    """environment that records the calls of the incremental sync hooks"""
+
+    def __init__(self, **kwargs):
+        self.calls = []
+        super().__init__(**kwargs)
+
+    sync_environment = DataEnvironmentFeature.sync_environment
+
+    def sync_create(self, data_obj_type, items):
+        self.calls.append(('create', data_obj_type.__name__, [cur_item.id for cur_item in items]))
+
+    def sync_update(self, data_obj_type, items):
+        self.calls.append(('update', data_obj_type.__name__, [cur_item.id for cur_item in items]))
+
+    def sync_delete(self, data_obj_type, identifiers):
+        self.calls.append(('delete', data_obj_type.__name__, list(identifiers)))
+
+
+class FakeDevice:
+    """local fake of a network device, that handles concurrent requests"""
+
+    def __init__(self, failures_per_type=None):
+        self.items = {}
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.failures_per_type = dict(failures_per_type or {})
+
+    async def request(self, operation, data_obj_type, elements):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.01)
+            if self.failures_per_type.get(data_obj_type, 0) > 0:
+                self.failures_per_type[data_obj_type] -= 1
+                raise ConnectionError('temporary failure')
+            if operation == 'create':
+                assert all(cur_nested.get_unique_identification() in self.items.get(cur_nested.__class__, {})
+                           for cur_elem in elements for cur_nested in cur_elem.__dict__.values()
+                           if isinstance(cur_nested, SingleDataItem)), 'referenced item does not exist'
+            for cur_elem in elements:
+                if operation == 'delete':
+                    del self.items[data_obj_type][cur_elem]
+                else:
+                    self.items.setdefault(data_obj_type, {})[cur_elem.get_unique_identification()] = cur_elem
+            self.calls.append((operation, data_obj_type.__name__, len(elements)))
+        finally:
+            self.running -= 1
+
+
+class AsyncLibraryEnvironment(LibraryEnvironment):
+    """environment that syncs into a :class:`FakeDevice` with the async hooks"""
+    SYNC_CONCURRENCY = 2
+    SYNC_BATCH_SIZE = 2
+    SYNC_RETRY_DELAY = 0
+
+    def __init__(self, device, **kwargs):
+        self.device = device
+        super().__init__(**kwargs)
+
+    def load_data(self):
+        # add the books first - the sync needs to create the authors before
+        authors = [EnvironmentAuthor(id=idx, name=f'author {idx}') for idx in range(3)]
+        self._add_data([
+            EnvironmentBook(id=idx, title=f'book {idx}', author=authors[idx % 3].snapshot()) for idx in range(5)
+        ])
+        self._add_data(authors)
+
+    async def async_sync_create(self, data_obj_type, items):
+        await self.device.request('create', data_obj_type, items)
+
+    async def async_sync_update(self, data_obj_type, items):
+        await self.device.request('update', data_obj_type, items)
+
+    async def async_sync_delete(self, data_obj_type, identifiers):
+        await self.device.request('delete', data_obj_type, identifiers)
+
+
+class ScenarioFeaturesDataEnvironmentFeature(ScenarioUnit):
+    """Unit-like tests for the DataEnvironmentFeature class."""
+
+    def test_get_and_get_all_for(self):
+        environment = LibraryEnvironment()
+        assert len(environment.get_all_for(EnvironmentAuthor)) == 3
+        assert len(environment.get_all_for(EnvironmentBook)) == 5
+        assert environment.get(EnvironmentBook, 2).title == 'book 2'
+        try:
+            environment.get(EnvironmentBook, 10)
+            assert False, 'DoesNotExist expected'
+        except DataEnvironmentFeature.DoesNotExist:
+            pass
+
+    def test_add_duplicate_raises(self):
+        environment = LibraryEnvironment()
+        try:
+            environment._add_data(EnvironmentAuthor(id=1, name='duplicate'))
+            assert False, 'DuplicateDataObjectError expected'
+        except DuplicateDataObjectError:
+            pass
+
+    def test_dirty_items(self):
+        environment = LibraryEnvironment()
+        assert len(environment.get_dirty_items()) == 0
+        environment.get(EnvironmentBook, 1).title = 'changed'
+        environment.get(EnvironmentBook, 3).set_field_value('author__name', 'changed', only_change_this_value=True)
+        environment.get(EnvironmentAuthor, 0).name = 'changed'
+        assert len(environment.get_dirty_items()) == 3
+        assert environment.get_dirty_items(EnvironmentBook).get_all_unique_identifier() == [1, 3]
+        assert environment.get(EnvironmentBook, 3).get_dirty_fields() == {'author__name'}
+        environment.clear_dirty(EnvironmentBook)
+        assert environment.get_dirty_items().get_all_unique_identifier() == [0]
+        environment.clear_dirty()
+        assert len(environment.get_dirty_items()) == 0
+
+    def test_incremental_sync(self):
+        environment = SyncingLibraryEnvironment()
+        assert len(environment.compute_change_set()) == 8
+        environment.sync_environment()
+        assert environment.calls == [('create', 'EnvironmentAuthor', [0, 1, 2]),
+                                     ('create', 'EnvironmentBook', [0, 1, 2, 3, 4])]
+        assert environment.compute_change_set().is_empty()
+
+        environment.calls.clear()
+        environment.get(EnvironmentBook, 2).title = 'changed'
+        environment.get(EnvironmentBook, 4).title = 'book 4'  # same value -> nothing to sync
+        del environment._data[EnvironmentAuthor][2]
+        environment.sync_environment()
+        assert environment.calls == [('update', 'EnvironmentBook', [2]), ('delete', 'EnvironmentAuthor', [2])]
+
+        environment.calls.clear()
+        environment.sync_environment()
+        assert environment.calls == []
+
+    def test_incremental_sync_of_replaced_items(self):
+        environment = SyncingLibraryEnvironment()
+        environment.sync_environment()
+        environment.calls.clear()
+        environment._override_data(
+            EnvironmentBook(id=1, title='CHANGED', author=EnvironmentAuthor(id=0, name='author 0'))
+        )
+        environment._remove_data(EnvironmentBook, 3)
+        author = EnvironmentAuthor(id=0, name='author 0')
+        environment._add_data(EnvironmentBook(id=3, title='new book 3', author=author))
+        # same state as the synced one -> nothing to sync
+        environment._override_data(
+            EnvironmentBook(id=4, title='book 4', author=EnvironmentAuthor(id=1, name='author 1'))
+        )
+        assert [cur_item.id for cur_item in environment.compute_change_set().updated[EnvironmentBook]] == [1, 3]
+        environment.sync_environment()
+        assert environment.calls == [('update', 'EnvironmentBook', [1, 3])]
+
+        environment.calls.clear()
+        environment.sync_environment()
+        assert environment.calls == []
+
+    def test_incremental_sync_with_persisted_state(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            class PersistedEnvironment(SyncingLibraryEnvironment):
+                SYNC_STATE_PATH = os.path.join(tmp_dir, 'sync_state.json')
+
+            PersistedEnvironment().sync_environment()
+            assert os.path.isfile(PersistedEnvironment.SYNC_STATE_PATH)
+
+            environment = PersistedEnvironment()
+            environment.get(EnvironmentAuthor, 1).name = 'changed'
+            environment.sync_environment()
+            assert environment.calls == [('update', 'EnvironmentAuthor', [1])]
+
+            environment = PersistedEnvironment()
+            environment.sync_environment()
+            # the change is not part of the loaded data anymore
+            assert environment.calls == [('update', 'EnvironmentAuthor', [1])]
+
+            environment.reset_sync_state()
+            assert not os.path.isfile(PersistedEnvironment.SYNC_STATE_PATH)
+            assert len(environment.compute_change_set().created) == 2
+
+    def test_failed_sync_continues_with_remaining_changes(self):
+        class FailingEnvironment(SyncingLibraryEnvironment):
+            fail = True
+
+            def sync_create(self, data_obj_type, items):
+                if self.fail and data_obj_type is EnvironmentBook:
+                    raise ConnectionError('system not reachable')
+                super().sync_create(data_obj_type, items)
+
+        environment = FailingEnvironment()
+        try:
+            environment.sync_environment()
+            assert False, 'ConnectionError expected'
+        except ConnectionError:
+            pass
+        environment.fail = False
+        environment.sync_environment()
+        assert environment.calls == [('create', 'EnvironmentAuthor', [0, 1, 2]),
+                                     ('create', 'EnvironmentBook', [0, 1, 2, 3, 4])]
+
+    def test_async_sync(self):
+        device = FakeDevice()
+        environment = AsyncLibraryEnvironment(device)
+        asyncio.run(environment.async_sync_environment())
+        assert device.calls == [('create', 'EnvironmentAuthor', 2), ('create', 'EnvironmentAuthor', 1),
+                                ('create', 'EnvironmentBook', 2), ('create', 'EnvironmentBook', 2),
+                                ('create', 'EnvironmentBook', 1)]
+        assert device.max_running == 2
+        assert len(device.items[EnvironmentBook]) == 5
+
+        device.calls.clear()
+        environment.get(EnvironmentBook, 0).title = 'changed'
+        del environment._data[EnvironmentBook][4]
+        asyncio.run(environment.async_sync_environment())
+        assert device.calls == [('update', 'EnvironmentBook', 1), ('delete', 'EnvironmentBook', 1)]
+        assert device.items[EnvironmentBook][0].title == 'changed'
+
+    def test_async_sync_retries(self):
+        device = FakeDevice(failures_per_type={EnvironmentAuthor: 2})
+        environment = AsyncLibraryEnvironment(device)
+        try:
+            asyncio.run(environment.async_sync_environment())
+            assert False, 'ConnectionError expected'
+        except ConnectionError:
+            pass
+        assert EnvironmentBook not in device.items
+
+        device = FakeDevice(failures_per_type={EnvironmentAuthor: 2})
+        environment = AsyncLibraryEnvironment(device)
+        environment.SYNC_MAX_RETRIES = 1
+        asyncio.run(environment.async_sync_environment())
+        assert len(device.items[EnvironmentAuthor]) == 3
+        assert len(device.items[EnvironmentBook]) == 5
+
+    def test_async_sync_runs_synchronous_hooks_one_after_another(self):
+
+        class SlowSyncingLibraryEnvironment(SyncingLibraryEnvironment):
+            """environment with synchronous hooks, that are not thread-safe"""
+            SYNC_BATCH_SIZE = 1
+
+            def __init__(self, **kwargs):
+                self.running = 0
+                self.max_running = 0
+                super().__init__(**kwargs)
+
+            def sync_create(self, data_obj_type, items):
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+                time.sleep(0.005)
+                super().sync_create(data_obj_type, items)
+                self.running -= 1
+
+        environment = SlowSyncingLibraryEnvironment()
+        threads_before = threading.active_count()
+        asyncio.run(environment.async_sync_environment())
+        assert environment.max_running == 1
+        assert len(environment.calls) == 8
+        # the worker thread is shut down after the sync
+        for _ in range(100):
+            if threading.active_count() == threads_before:
+                break
+            time.sleep(0.01)
+        assert threading.active_count() == threads_before
+
+    def test_dependency_graph(self):
+        environment = AsyncLibraryEnvironment(FakeDevice())
+        assert environment.get_dependency_graph().get_layers() == [[EnvironmentAuthor], [EnvironmentBook]]
+
+    def test_validate_references(self):
+        environment = LibraryEnvironment()
+        assert environment.validate_references() == []
+        environment.get(EnvironmentAuthor, 2).id = 7
+        assert environment.validate_references() == [
+            "EnvironmentAuthor(2) was added with this unique identification, but has the unique identification 7 now"
+        ]
+
+    def test_broken_references_raise_all_violations(self):
+
+        class ValidatedEnvironment(BrokenLibraryEnvironment):
+            VALIDATE_REFERENCES = True
+
+        try:
+            ValidatedEnvironment()
+            assert False, 'ReferentialIntegrityError expected'
+        except ReferentialIntegrityError as exc:
+            assert exc.violations == [
+                'EnvironmentBook(1).author references EnvironmentAuthor(1), which does not exist in the environment',
+                'EnvironmentBook(2).author references EnvironmentAuthor(2), which does not exist in the environment',
+            ]
+
+    def test_references_are_not_validated_by_default(self):
+        environment = BrokenLibraryEnvironment()
+        assert len(environment.get_all_for(EnvironmentBook)) == 3
+        assert len(environment.validate_references()) == 2
+
+    def test_partitions(self):
+        partitions = []
+        for cur_index in range(3):
+            class CurrentPartition(PartitionedLibraryEnvironment):
+                PARTITION_INDEX = cur_index
+            partitions.append(CurrentPartition())
+        for cur_type, cur_count in [(EnvironmentAuthor, 3), (EnvironmentBook, 5)]:
+            all_identifiers = [cur_id for cur_partition in partitions
+                               for cur_id in cur_partition.get_all_for(cur_type).get_all_unique_identifier()]
+            assert sorted(all_identifiers) == list(range(cur_count))
+        assert [cur_partition.partition for cur_partition in partitions] == [(0, 3), (1, 3), (2, 3)]
+        # items are assigned deterministically (independent of the hash seed of the process)
+        assert [partitioning.get_partition_for(cur_id, 3) for cur_id in range(5)] == [2, 2, 1, 1, 1]
+
+        # references to other partitions are resolved lazily
+        for cur_partition in partitions:
+            for cur_book in cur_partition.get_all_for(EnvironmentBook):
+                assert cur_partition.get(EnvironmentAuthor, cur_book.author.id) == cur_book.author
+
+    def test_partition_from_environment_variables(self):
+        os.environ[partitioning.ENV_VARIABLE_PARTITION_COUNT] = '2'
+        os.environ[partitioning.ENV_VARIABLE_PARTITION_INDEX] = '1'
+        try:
+            environment = LibraryEnvironment()
+            assert environment.partition == (1, 2)
+            assert 0 < len(environment.get_all_for(EnvironmentBook)) < 5
+            try:
+                environment.get(EnvironmentBook, [cur_id for cur_id in range(5)
+                                                  if partitioning.get_partition_for(cur_id, 2) == 0][0])
+                assert False, 'DoesNotExist expected'
+            except DataEnvironmentFeature.DoesNotExist:
+                pass
+        finally:
+            del os.environ[partitioning.ENV_VARIABLE_PARTITION_COUNT]
+            del os.environ[partitioning.ENV_VARIABLE_PARTITION_INDEX]
+        assert LibraryEnvironment().partition is None
+
+    def test_shared_data(self):
+        os.environ[ENV_VARIABLE_SHARED_STORE] = 'bhd-test'
+        try:
+            environment = LibraryEnvironment()
+            name = environment.publish_shared_data()
+            try:
+                assert name == get_shared_store_name('bhd-test', f'{__name__}.LibraryEnvironment')
+                attached = LibraryEnvironment()
+                assert isinstance(attached._data[EnvironmentBook], SharedDataItems)
+                assert attached.get(EnvironmentBook, 3) == environment.get(EnvironmentBook, 3)
+                assert len(attached.get_all_for(EnvironmentAuthor)) == 3
+                attached.get(EnvironmentBook, 3).title = 'changed'
+                assert attached.get_dirty_items().get_all_unique_identifier() == [3]
+                assert environment.get(EnvironmentBook, 3).title == 'book 3'
+            finally:
+                environment.unpublish_shared_data()
+        finally:
+            del os.environ[ENV_VARIABLE_SHARED_STORE]
+
+    def test_shared_data_is_only_attached_by_the_publishing_class(self):
+        os.environ[ENV_VARIABLE_SHARED_STORE] = 'bhd-test'
+        try:
+            environment = LibraryEnvironment()
+            name = environment.publish_shared_data()
+            try:
+                class ChildEnvironment(LibraryEnvironment):
+                    pass
+
+                # the store of the child class was not published - it loads its own data
+                child = ChildEnvironment()
+                assert not isinstance(child._data[EnvironmentBook], SharedDataItems)
+                assert len(child.get_all_for(EnvironmentBook)) == 5
+
+                class AttachedEnvironment(LibraryEnvironment):
+                    SHARED_DATA_STORE_NAME = name
+
+                try:
+                    AttachedEnvironment()
+                    assert False, 'ValueError expected'
+                except ValueError:
+                    pass
+            finally:
+                environment.unpublish_shared_data()
+        finally:
+            del os.environ[ENV_VARIABLE_SHARED_STORE]
+
+    def test_base_environment(self):
+        environment = ExtendedLibraryEnvironment()
+        base = LibraryEnvironment.get_base_instance()
+        assert environment.get_all_for(EnvironmentBook).get_all_unique_identifier() == [1, 2, 3, 5]
+        assert len(environment.get_all_for(EnvironmentAuthor)) == 4
+        assert environment.get(EnvironmentBook, 1).title == 'new book 1'
+        try:
+            environment.get(EnvironmentBook, 0)
+            assert False, 'DoesNotExist expected'
+        except DataEnvironmentFeature.DoesNotExist:
+            pass
+        # the base environment is loaded once and never changed by its layers
+        assert ExtendedLibraryEnvironment()._data[EnvironmentBook]._parent is base._data[EnvironmentBook]
+        environment.get(EnvironmentBook, 2).title = 'changed'
+        assert base.get(EnvironmentBook, 2).title == 'book 2'
+        assert len(base.get_all_for(EnvironmentBook)) == 5
+        assert environment.get_dirty_items().get_all_unique_identifier() == [2]
+
+    def test_remove_data_of_unknown_item_raises(self):
+        environment = LibraryEnvironment()
+        try:
+            environment._remove_data(EnvironmentBook, 10)
+            assert False, 'DoesNotExist expected'
+        except DataEnvironmentFeature.DoesNotExist:
+            pass
+
+    def test_indexed_queries(self):
+        environment = IndexedLibraryEnvironment()
+        books = environment.get_all_for(IndexedEnvironmentBook)
+        assert books.filter_by(author__name='author 1').get_all_unique_identifier() == [1, 4, 7, 10]
+        assert books.filter_by(author__name='author 1', title='book 0').get_all_unique_identifier() == [4]
+        assert books.get_by(title='book 3', author__name='author 2').id == 11
+        assert len(books.filter_by(author__name='unknown')) == 0
+        # changed items are found with their new values
+        environment.get(IndexedEnvironmentBook, 2).author.name = 'author 1'
+        assert environment.get_all_for(IndexedEnvironmentBook).filter_by(author__name='author 1') \
+            .get_all_unique_identifier() == [1, 2, 4, 7, 10]
+
+    def test_indexes_follow_removed_and_overridden_items(self):
+        environment = IndexedLibraryEnvironment()
+        environment._remove_data(IndexedEnvironmentBook, 4)
+        environment._override_data(
+            IndexedEnvironmentBook(id=7, title='new', author=EnvironmentAuthor(id=0, name='author 0'))
+        )
+        books = environment.get_all_for(IndexedEnvironmentBook)
+        assert books.filter_by(author__name='author 1').get_all_unique_identifier() == [1, 10]
+        assert books.filter_by(title='new').get_all_unique_identifier() == [7]
+        # a changed collection does not use the indexes anymore
+        books.remove(books.get_by(title='new'))
+        assert len(books.filter_by(title='new')) == 0
+
+    def test_collections_only_return_their_own_items(self):
+        environment = IndexedLibraryEnvironment()
+        books = environment.get_all_for(IndexedEnvironmentBook)
+        environment._add_data(
+            IndexedEnvironmentBook(id=20, title='book 1', author=EnvironmentAuthor(id=0, name='author 0'))
+        )
+        environment._remove_data(IndexedEnvironmentBook, 5)
+        assert books.filter_by(title='book 1').get_all_unique_identifier() == [1, 5, 9]
+        assert books.filter_range('id', gte=9).get_all_unique_identifier() == [9, 10, 11]
+        assert environment.get_all_for(IndexedEnvironmentBook).filter_by(title='book 1') \
+            .get_all_unique_identifier() == [1, 9, 20]
+
+    def test_sample_for(self):
+        environment = IndexedLibraryEnvironment()
+        sampled = environment.sample_for(IndexedEnvironmentBook, 4, seed=1)
+        assert len(sampled) == 4
+        assert sampled.has_unique_elements()
+        assert sampled.get_all_unique_identifier() == \
+            environment.sample_for(IndexedEnvironmentBook, 4, seed=1).get_all_unique_identifier()
+        assert len(environment.sample_for(EnvironmentBook, 4)) == 0
+
+        class AuthorFilter(Filter):
+            def apply(self, item):
+                return item.author.name == 'author 2'
+
+        sampled = environment.sample_for(IndexedEnvironmentBook, 10, filter_obj=AuthorFilter())
+        assert sorted(sampled.get_all_unique_identifier()) == [2, 5, 8, 11]
+
+    def test_sample_for_only_copies_sampled_items_of_base_environment(self):
+        environment = ExtendedLibraryEnvironment()
+        sampled = environment.sample_for(EnvironmentAuthor, 1, seed=5)
+        assert len(sampled) == 1
+        # the own author 3 and at most the sampled author of the base environment
+        assert len(environment._data[EnvironmentAuthor].loaded_values()) <= 2
+
+    def test_get_all_for_only_copies_handed_out_items_of_base_environment(self):
+        environment = ExtendedLibraryEnvironment()
+        authors = environment.get_all_for(EnvironmentAuthor)
+        assert authors.get_all_unique_identifier() == [0, 1, 2, 3]
+        assert [cur_item.id for cur_item in environment._data[EnvironmentAuthor].loaded_values()] == [3]
+        author = authors.get_by(id=1)
+        author.name = 'changed'
+        # the handed out author is the one of the environment, the base environment is unchanged
+        assert environment.get(EnvironmentAuthor, 1) is author
+        assert authors[1] is author
+        assert LibraryEnvironment.get_base_instance().get(EnvironmentAuthor, 1).name == 'author 1'
+        assert [cur_item.id for cur_item in environment._data[EnvironmentAuthor].loaded_values()] == [3, 1]
+
+    def test_read_only_operations_do_not_copy_items_of_base_environment(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            class ValidatedEnvironment(DataEnvironmentFeature):
+                BASE_ENVIRONMENT = LibraryEnvironment
+                VALIDATE_REFERENCES = True
+                SYNC_STATE_PATH = os.path.join(tmp_dir, 'sync_state.json')
+
+                def load_data(self):
+                    self._add_data(
+                        EnvironmentBook(id=5, title='book 5', author=EnvironmentAuthor(id=0, name='author 0'))
+                    )
+
+                def sync_create(self, data_obj_type, items):
+                    pass
+
+            ValidatedEnvironment().sync_environment()
+            environment = ValidatedEnvironment()
+            assert environment.validate_references() == []
+            environment.get(EnvironmentBook, 2).title = 'changed'
+            change_set = environment.compute_change_set()
+            assert change_set.updated[EnvironmentBook] == [environment.get(EnvironmentBook, 2)]
+            assert not change_set.created
+            # only the own book and the changed book of the base environment were materialized
+            assert [cur_item.id for cur_item in environment._data[EnvironmentBook].loaded_values()] == [5, 2]
+            assert environment._data[EnvironmentAuthor].loaded_values() == []
+
+    def test_indexes_of_base_environment_items(self):
+        class ExtendedIndexedEnvironment(DataEnvironmentFeature):
+            BASE_ENVIRONMENT = IndexedLibraryEnvironment
+
+        environment = ExtendedIndexedEnvironment()
+        book = environment.get(IndexedEnvironmentBook, 1)
+        candidates, _ = environment._get_indexes(IndexedEnvironmentBook).find_candidates({'title': 'book 1'})
+        assert [cur_item.id for cur_item in candidates] == [1, 5, 9]
+        assert candidates[0] is book
+        assert environment._data[IndexedEnvironmentBook].loaded_values() == [book]
+        books = environment.get_all_for(IndexedEnvironmentBook).filter_by(title='book 1')
+        assert all(cur_item is environment.get(IndexedEnvironmentBook, cur_item.id) for cur_item in books)
+        books[1].title = 'changed'
+        assert IndexedLibraryEnvironment.get_base_instance().get(IndexedEnvironmentBook, 5).title == 'book 1'
+
+    def test_indexed_queries_on_base_environment_items(self):
+        class ExtendedIndexedEnvironment(DataEnvironmentFeature):
+            BASE_ENVIRONMENT = IndexedLibraryEnvironment
+
+        environment = ExtendedIndexedEnvironment()
+        books = environment.get_all_for(IndexedEnvironmentBook)
+        assert environment._data[IndexedEnvironmentBook].loaded_values() == []
+        largest = books.get_largest('id', 2)
+        assert largest.get_all_unique_identifier() == [11, 10]
+        assert [cur_item.id for cur_item in environment._data[IndexedEnvironmentBook].loaded_values()] == [11, 10]
+        assert largest[0] is environment.get(IndexedEnvironmentBook, 11)
+        assert books[11] is largest[0]
+        largest[0].title = 'changed'
+        assert books.filter_by(title='changed').get_all_unique_identifier() == [11]
+        assert IndexedLibraryEnvironment.get_base_instance().get(IndexedEnvironmentBook, 11).title == 'book 3'
+
+    def test_sorted_indexes_answer_range_queries(self):
+        environment = IndexedLibraryEnvironment()
+        environment._remove_data(IndexedEnvironmentBook, 9)
+        books = environment.get_all_for(IndexedEnvironmentBook)
+        assert books.filter_range('id', gte=7).get_all_unique_identifier() == [7, 8, 10, 11]
+        assert books.get_largest('id', 2).get_all_unique_identifier() == [11, 10]
+        assert books.order_by('id', reverse=True)[0].id == 11
+        environment._add_data(
+            IndexedEnvironmentBook(id=20, title='new', author=EnvironmentAuthor(id=0, name='author 0'))
+        )
+        assert environment.get_all_for(IndexedEnvironmentBook).get_largest('id', 1)[0].id == 20
@@ -0,0 +1,66 @@
+import json
+import subprocess
+import sys
+
+from balderhub.unit.scenarios import ScenarioUnit
+
+import balderhub.data
+from balderhub.data.lib import scenario_features, setup_features, utils
+from balderhub.data.lib.scenario_features.data_environment_feature import DataEnvironmentFeature
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+
+#: submodules that need to be loaded lazily on first access (the import time itself is measured by the `startup`
+#: benchmarks)
+HEAVY_SUBMODULES = [
+    'balderhub.data.lib.utils.single_data_item',
+    'balderhub.data.lib.utils.single_data_item_collection',
+    'balderhub.data.lib.scenario_features.data_environment_feature',
+    'balderhub.data.lib.setup_features.factories',
+]
+
+
+def _run_import_in_subprocess(statement: str) -> dict:
+    code = (
+        "import json, sys\n"
+        f"{statement}\n"
+        "print(json.dumps({'pydantic': 'pydantic' in sys.modules, 'balder': 'balder' in sys.modules, "
+        "'modules': sorted(sys.modules.keys())}))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class ScenarioLazyImports(ScenarioUnit):
+    """Unit-like tests for the lazy loading of the package attributes"""
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        for statement in ['import balderhub.data',
+                          'import balderhub.data.lib.utils',
+                          'import balderhub.data.lib.scenario_features',
+                          'import balderhub.data.lib.setup_features',
+                          'from balderhub.data.lib.utils import LookupFieldString']:
+            result = _run_import_in_subprocess(statement)
+            assert not result['pydantic'], f'`{statement}` imports pydantic'
+            assert not result['balder'], f'`{statement}` imports balder'
+
+    def test_import_does_not_load_heavy_submodules(self):
+        result = _run_import_in_subprocess('import balderhub.data')
+        for cur_module in HEAVY_SUBMODULES:
+            assert cur_module not in result['modules'], f'`import balderhub.data` imports `{cur_module}`'
+
+    def test_lazy_attributes_resolve(self):
+        assert utils.SingleDataItem is SingleDataItem
+        assert scenario_features.DataEnvironmentFeature is DataEnvironmentFeature
+        assert setup_features.factories.AutoInitialDataConfigFactory.__name__ == 'AutoInitialDataConfigFactory'
+        assert callable(balderhub.data.register_for_data_item)
+        for module in [balderhub.data, utils, scenario_features, setup_features]:
+            for name in module.__all__:
+                assert name in dir(module)
+                getattr(module, name)
+
+    def test_unknown_attribute_raises_attribute_error(self):
+        try:
+            getattr(utils, 'UnknownAttribute')
+            assert False, 'no AttributeError was raised'
+        except AttributeError:
+            pass
@@ -0,0 +1,177 @@
+import threading
+
+from balderhub.unit.scenarios import ScenarioUnit
+
+from balderhub.data import register_for_data_item
+from balderhub.data.lib import scenario_features, setup_features
+from balderhub.data.lib.scenario_features import AbstractDataItemRelatedFeature
+from balderhub.data.lib.utils.auto_feature_factory import (
+    AutoFeatureFactory,
+    get_default_factories,
+    pregenerate_factory_classes,
+)
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+
+
+class FactoryItem(SingleDataItem):
+    name: str
+
+    def get_unique_identification(self):
+        return self.name
+
+
+class OtherFactoryItem(SingleDataItem):
+    name: str
+
+    def get_unique_identification(self):
+        return self.name
+
+
+class ThirdFactoryItem(SingleDataItem):
+    name: str
+
+    def get_unique_identification(self):
+        return self.name
+
+
+class CountingFactory(AutoFeatureFactory):
+    """factory that only creates plain classes and counts the definitions"""
+    defined_classes = []
+
+    @classmethod
+    def _define_class(cls, data_item_cls, **kwargs):
+        new_cls = type(f'Generated{data_item_cls.__name__}', (), {'kwargs': kwargs})
+        cls.defined_classes.append(new_cls)
+        return new_cls
+
+
+class OtherCountingFactory(CountingFactory):
+    """second factory to validate the separation of the caches"""
+    defined_classes = []
+
+
+class ScenarioUtilsAutoFeatureFactory(ScenarioUnit):
+    """Unit-like tests for AutoFeatureFactory class."""
+
+    def test_get_for_returns_cached_class(self):
+        CountingFactory.clear_cache()
+        feature_cls = CountingFactory.get_for(FactoryItem)
+        assert CountingFactory.get_for(FactoryItem) is feature_cls
+        assert CountingFactory.get_for(OtherFactoryItem) is not feature_cls
+
+    def test_get_for_uses_kwargs_as_cache_key(self):
+        CountingFactory.clear_cache()
+
+        def filter_a(item):
+            return item.name == 'a'
+
+        def filter_b(item):
+            return item.name == 'b'
+
+        feature_cls_a = CountingFactory.get_for(FactoryItem, filter_func=filter_a)
+        feature_cls_b = CountingFactory.get_for(FactoryItem, filter_func=filter_b)
+        assert feature_cls_a is not feature_cls_b
+        assert feature_cls_a.kwargs == {'filter_func': filter_a}
+        assert feature_cls_b.kwargs == {'filter_func': filter_b}
+        assert CountingFactory.get_for(FactoryItem, filter_func=filter_a) is feature_cls_a
+        # order of kwargs and unhashable values are normalized
+        feature_cls_c = CountingFactory.get_for(FactoryItem, a=[1, 2], b={'x': 1})
+        assert CountingFactory.get_for(FactoryItem, b={'x': 1}, a=[1, 2]) is feature_cls_c
+
+    def test_get_cached_classes_and_clear_cache(self):
+        CountingFactory.clear_cache()
+        OtherCountingFactory.clear_cache()
+        feature_cls = CountingFactory.get_for(FactoryItem)
+        other_feature_cls = OtherCountingFactory.get_for(FactoryItem)
+        assert CountingFactory.get_cached_classes() == {(CountingFactory, FactoryItem, ()): feature_cls}
+        all_cached = AutoFeatureFactory.get_cached_classes()
+        assert all_cached[(OtherCountingFactory, FactoryItem, ())] is other_feature_cls
+
+        CountingFactory.clear_cache()
+        assert not CountingFactory.get_cached_classes()
+        assert OtherCountingFactory.get_cached_classes() == {(OtherCountingFactory, FactoryItem, ()): other_feature_cls}
+        assert CountingFactory.get_for(FactoryItem) is not feature_cls
+
+    def test_max_cached_classes(self):
+        class BoundedFactory(CountingFactory):
+            MAX_CACHED_CLASSES = 1
+            defined_classes = []
+
+        feature_cls = BoundedFactory.get_for(FactoryItem)
+        BoundedFactory.get_for(OtherFactoryItem)
+        assert len(BoundedFactory.get_cached_classes()) == 1
+        assert BoundedFactory.get_for(FactoryItem) is not feature_cls
+        BoundedFactory.clear_cache()
+
+    def test_max_cached_classes_keeps_registered_classes(self):
+        class RegisteringFactory(AutoFeatureFactory):
+            MAX_CACHED_CLASSES = 1
+
+            @classmethod
+            def _define_class(cls, data_item_cls, **kwargs):
+                return type(f'Generated{data_item_cls.__name__}Feature', (AbstractDataItemRelatedFeature,), {})
+
+        feature_cls = RegisteringFactory.get_for(FactoryItem)
+
+        @register_for_data_item(FactoryItem)
+        class RegisteredFeature(feature_cls):  # pylint: disable=unused-variable
+            pass
+
+        RegisteringFactory.get_for(OtherFactoryItem)
+        RegisteringFactory.get_for(ThirdFactoryItem)
+        assert RegisteringFactory.get_for(FactoryItem) is feature_cls
+        assert isinstance(feature_cls.get_specific_feature_for(FactoryItem), RegisteredFeature)
+        # unregistered classes are still evicted
+        assert len(RegisteringFactory.get_cached_classes()) == 2
+        RegisteringFactory.clear_cache()
+
+    def test_get_for_is_thread_safe(self):
+        class SlowFactory(CountingFactory):
+            defined_classes = []
+
+        results = []
+        start_event = threading.Event()
+
+        def worker():
+            start_event.wait()
+            results.append(SlowFactory.get_for(FactoryItem))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for cur_thread in threads:
+            cur_thread.start()
+        start_event.set()
+        for cur_thread in threads:
+            cur_thread.join()
+        assert len(SlowFactory.defined_classes) == 1
+        assert all(cur_result is SlowFactory.defined_classes[0] for cur_result in results)
+        SlowFactory.clear_cache()
+
+    def test_pregenerate(self):
+        CountingFactory.clear_cache()
+        durations = CountingFactory.pregenerate([FactoryItem, OtherFactoryItem])
+        assert list(durations.keys()) == [FactoryItem, OtherFactoryItem]
+        assert all(cur_duration >= 0 for cur_duration in durations.values())
+        assert {cur_key[1] for cur_key in CountingFactory.get_cached_classes()} == {FactoryItem, OtherFactoryItem}
+
+    def test_get_default_factories(self):
+        factories = get_default_factories()
+        assert factories[:4] == [
+            scenario_features.factories.AutoInitialDataConfigFactory,
+            scenario_features.factories.AutoAccessibleInitialDataConfigFactory,
+            setup_features.factories.AutoInitialDataConfigFactory,
+            setup_features.factories.AutoAccessibleInitialDataConfigFactory,
+        ]
+
+    def test_pregenerate_factory_classes(self):
+        class PregeneratedItem(SingleDataItem):
+            name: str
+
+            def get_unique_identification(self):
+                return self.name
+
+        durations = pregenerate_factory_classes([PregeneratedItem])
+        assert set(durations.keys()) == {(cur_factory, PregeneratedItem) for cur_factory in get_default_factories()}
+        setup_feature_cls = setup_features.factories.AutoInitialDataConfigFactory.get_for(PregeneratedItem)
+        assert issubclass(
+            setup_feature_cls, scenario_features.factories.AutoInitialDataConfigFactory.get_for(PregeneratedItem)
+        )
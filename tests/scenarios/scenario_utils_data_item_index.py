@@ -0,0 +1,168 @@
+from typing import Optional
+
+from balderhub.unit.scenarios import ScenarioUnit
+
+from balderhub.data.lib.utils.data_item_index import DataItemIndexes, HashIndex, SortedIndex
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+
+
+class IndexedShape(SingleDataItem):
+    id: int
+    kind: str
+    corners: list[int]
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class RatedShape(SingleDataItem):
+    id: int
+    rating: Optional[int]
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class ShapeGroup(SingleDataItem):
+    id: int
+    name: str
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class GroupedShape(SingleDataItem):
+    id: int
+    group: ShapeGroup
+
+    def get_unique_identification(self):
+        return self.id
+
+
+def create_shapes():
+    return [IndexedShape(id=idx, kind=['circle', 'square', 'triangle'][idx % 3], corners=[idx]) for idx in range(9)]
+
+
+class ScenarioUtilsDataItemIndex(ScenarioUnit):
+    """Unit-like tests for the HashIndex and DataItemIndexes classes."""
+
+    def test_hash_index(self):
+        shapes = create_shapes()
+        index = HashIndex('kind')
+        for cur_shape in shapes:
+            index.add(cur_shape)
+        assert [cur_shape.id for cur_shape in index.lookup('square')] == [1, 4, 7]
+        index.remove(shapes[4])
+        assert [cur_shape.id for cur_shape in index.lookup('square')] == [1, 7]
+        assert index.lookup('hexagon') == []
+        assert index.lookup(['unhashable']) is None
+
+    def test_hash_index_with_unhashable_values_is_not_usable(self):
+        index = HashIndex('corners')
+        index.add(create_shapes()[0])
+        assert not index.usable
+        assert index.lookup([0]) is None
+
+    def test_indexes_are_updated_after_changes(self):
+        shapes = create_shapes()
+        indexes = DataItemIndexes(['kind'], source=lambda: shapes)
+        for cur_shape in shapes:
+            indexes.add(cur_shape)
+        candidates, lookup = indexes.find_candidates({'kind': 'circle', 'id': 3})
+        assert lookup == 'kind'
+        assert [cur_shape.id for cur_shape in candidates] == [0, 3, 6]
+        assert indexes.find_candidates({'id': 3}) is None
+
+        shapes[1].kind = 'circle'
+        candidates, _ = indexes.find_candidates({'kind': 'circle'})
+        assert [cur_shape.id for cur_shape in candidates] == [0, 1, 3, 6]
+
+    def test_sorted_index(self):
+        shapes = create_shapes()
+        index = SortedIndex('kind')
+        for cur_shape in shapes:
+            index.add(cur_shape)
+        assert [cur_shape.id for cur_shape in index.iter_ordered()] == [0, 3, 6, 1, 4, 7, 2, 5, 8]
+        # equal values keep the order they were added
+        assert [cur_shape.id for cur_shape in index.iter_ordered(reverse=True)] == [2, 5, 8, 1, 4, 7, 0, 3, 6]
+        assert [cur_shape.id for cur_shape in index.get_range('circle', 'square')] == [0, 3, 6, 1, 4, 7]
+        assert [cur_shape.id for cur_shape in index.get_range('circle', 'square', include_lower=False)] == [1, 4, 7]
+        assert [cur_shape.id for cur_shape in index.get_range(upper='square', include_upper=False)] == [0, 3, 6]
+        assert index.get_range('x', 'a') == []
+        index.remove(shapes[4])
+        assert len(index) == 8
+        assert [cur_shape.id for cur_shape in index.get_range('square', 'square')] == [1, 7]
+
+    def test_sorted_index_build_matches_added_items(self):
+        shapes = create_shapes()
+        added_index = SortedIndex('kind')
+        for cur_shape in shapes:
+            added_index.add(cur_shape)
+        built_index = SortedIndex('kind')
+        built_index.build(shapes)
+        assert list(built_index.iter_ordered()) == list(added_index.iter_ordered())
+        built_index.remove(shapes[4])
+        assert [cur_shape.id for cur_shape in built_index.get_range('square', 'square')] == [1, 7]
+        built_index.build([RatedShape(id=0, rating=3), RatedShape(id=1, rating=None)])
+        assert not built_index.usable
+
+    def test_sorted_index_with_incomparable_values_is_not_usable(self):
+        index = SortedIndex('rating')
+        index.add(RatedShape(id=0, rating=3))
+        assert index.usable
+        index.add(RatedShape(id=1, rating=None))
+        assert not index.usable
+        assert len(index) == 0
+
+    def test_sorted_indexes_are_updated_after_changes(self):
+        shapes = create_shapes()
+        indexes = DataItemIndexes([], source=lambda: shapes, sorted_field_lookups=['kind'])
+        for cur_shape in shapes:
+            indexes.add(cur_shape)
+        assert indexes.get_sorted_index('id') is None
+        assert [cur_shape.id for cur_shape in indexes.get_sorted_index('kind').get_range('circle', 'circle')] == \
+            [0, 3, 6]
+        shapes[2].kind = 'circle'
+        assert [cur_shape.id for cur_shape in indexes.get_sorted_index('kind').get_range('circle', 'circle')] == \
+            [0, 2, 3, 6]
+        indexes.add_index('id', ordered=True)
+        assert [cur_shape.id for cur_shape in indexes.get_sorted_index('id').iter_ordered(reverse=True)][:2] == [8, 7]
+
+    def test_only_changed_items_are_updated(self):
+        shapes = create_shapes()
+        source_calls = []
+
+        def source():
+            source_calls.append(len(shapes))
+            return shapes
+
+        indexes = DataItemIndexes(['kind'], source=source, sorted_field_lookups=['id'])
+        indexes.invalidate()
+        assert [cur_shape.id for cur_shape in indexes.find_candidates({'kind': 'circle'})[0]] == [0, 3, 6]
+        create_shapes()[0].kind = 'square'
+        shapes[7].kind = 'circle'
+        shapes[3].id = 20
+        assert [cur_shape.id for cur_shape in indexes.find_candidates({'kind': 'circle'})[0]] == [0, 20, 6, 7]
+        assert [cur_shape.id for cur_shape in indexes.get_sorted_index('id').iter_ordered(reverse=True)][:2] == [20, 8]
+        assert source_calls == [9]
+
+        indexes.remove(shapes[7])
+        shapes[7].kind = 'square'
+        assert [cur_shape.id for cur_shape in indexes.find_candidates({'kind': 'square'})[0]] == [1, 4]
+
+    def test_indexes_are_updated_after_changes_of_nested_items(self):
+        groups = [ShapeGroup(id=idx, name=f'group {idx}') for idx in range(2)]
+        shapes = [GroupedShape(id=idx, group=groups[idx % 2]) for idx in range(4)]
+        indexes = DataItemIndexes(['group__name'], source=lambda: shapes)
+        for cur_shape in shapes:
+            indexes.add(cur_shape)
+        groups[1].name = 'renamed'
+        assert [cur_shape.id for cur_shape in indexes.find_candidates({'group__name': 'renamed'})[0]] == [1, 3]
+
+        new_group = ShapeGroup(id=2, name='group 2')
+        shapes[3].group = new_group
+        assert [cur_shape.id for cur_shape in indexes.find_candidates({'group__name': 'group 2'})[0]] == [3]
+        new_group.name = 'new'
+        groups[1].name = 'other'
+        assert [cur_shape.id for cur_shape in indexes.find_candidates({'group__name': 'new'})[0]] == [3]
+        assert [cur_shape.id for cur_shape in indexes.find_candidates({'group__name': 'other'})[0]] == [1]
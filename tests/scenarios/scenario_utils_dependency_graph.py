@@ -0,0 +1,97 @@
+from typing import Optional
+
+from balderhub.unit.scenarios import ScenarioUnit
+
+from balderhub.data.lib.utils.dependency_graph import DataItemDependencyGraph
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+
+
+class GraphCountry(SingleDataItem):
+    id: int
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class GraphPublisher(SingleDataItem):
+    id: int
+    country: GraphCountry
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class GraphAuthor(SingleDataItem):
+    id: int
+    country: Optional[GraphCountry]
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class GraphBook(SingleDataItem):
+    id: int
+    authors: list[GraphAuthor]
+    publisher: GraphPublisher
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class GraphCyclicA(SingleDataItem):
+    id: int
+
+    def get_unique_identification(self):
+        return self.id
+
+    @classmethod
+    def get_nested_data_item_fields(cls):
+        return {'b': (GraphCyclicB, False)}
+
+
+class GraphCyclicB(SingleDataItem):
+    id: int
+    a: GraphCyclicA
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class GraphCyclicUser(SingleDataItem):
+    id: int
+    a: GraphCyclicA
+    country: GraphCountry
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class ScenarioUtilsDependencyGraph(ScenarioUnit):
+    """Unit-like tests for the DataItemDependencyGraph class."""
+
+    def test_dependencies_and_dependents(self):
+        graph = DataItemDependencyGraph([GraphBook, GraphAuthor, GraphPublisher, GraphCountry])
+        assert graph.get_dependencies(GraphBook) == [GraphAuthor, GraphPublisher]
+        assert graph.get_dependencies(GraphCountry) == []
+        assert graph.get_dependents(GraphCountry) == [GraphAuthor, GraphPublisher]
+
+    def test_layers_and_topological_order(self):
+        graph = DataItemDependencyGraph([GraphBook, GraphAuthor, GraphPublisher, GraphCountry])
+        assert graph.get_layers() == [[GraphCountry], [GraphAuthor, GraphPublisher], [GraphBook]]
+        assert graph.get_topological_order() == [GraphCountry, GraphAuthor, GraphPublisher, GraphBook]
+
+    def test_references_to_other_types(self):
+        graph = DataItemDependencyGraph([GraphBook, GraphAuthor])
+        assert graph.get_layers() == [[GraphAuthor], [GraphBook]]
+
+        graph = DataItemDependencyGraph([GraphBook], include_referenced_types=True)
+        assert set(graph.data_item_types) == {GraphBook, GraphAuthor, GraphPublisher, GraphCountry}
+        assert graph.get_layers()[0] == [GraphCountry]
+
+    def test_cycles_are_processed_one_after_another(self):
+        graph = DataItemDependencyGraph([GraphCyclicB, GraphCountry, GraphCyclicA])
+        assert graph.get_layers() == [[GraphCyclicB, GraphCountry], [GraphCyclicA]]
+
+        graph = DataItemDependencyGraph([GraphCyclicUser, GraphCyclicB, GraphCyclicA, GraphCountry])
+        assert graph.get_layers() == [[GraphCyclicB, GraphCountry], [GraphCyclicA], [GraphCyclicUser]]
+        assert graph.get_topological_order() == [GraphCyclicB, GraphCountry, GraphCyclicA, GraphCyclicUser]
@@ -8,6 +8,7 @@ from balderhub.unit.scenarios import ScenarioUnit
 
 from balderhub.data.lib.utils.functions import (
     convert_field_lookups_to_dict_structure,
+    convert_many_field_lookups_to_dict_structure,
     convert_dict_structure_to_field_lookups,
     set_lookup_field_in_data_dict,
     full_dictionary_is_not_definable,
@@ -52,6 +53,54 @@ class ScenarioUtilsFunctions(ScenarioUnit):
         assert first_level["a"]["d"] == 1
         assert first_level["a"]["b__c"] == 2
 
+    def test_convert_field_lookups_converts_nested_dict_values(self):
+        flat = {
+            "a": {"b__c": 1, "d": {"e__f": 2}},
+            "a__x": 3,
+            "g__h": None,
+        }
+        nested = convert_field_lookups_to_dict_structure(flat)
+        assert nested == {"a": {"b": {"c": 1}, "d": {"e": {"f": 2}}, "x": 3}, "g": {"h": None}}
+        # source dictionaries are not modified
+        assert flat["a"] == {"b__c": 1, "d": {"e__f": 2}}
+
+    def test_convert_field_lookups_replaces_none_with_nested_dict(self):
+        nested = convert_field_lookups_to_dict_structure({"a": None, "a__b": 1})
+        assert nested == {"a": {"b": 1}}
+
+    def test_convert_field_lookups_conflicting_keys_raise_type_error(self):
+        try:
+            convert_field_lookups_to_dict_structure({"a": 1, "a__b": 2})
+            assert False, "TypeError expected"
+        except TypeError as exc:
+            assert exc.args[0] == ("can not add lookup field `a__b`, because the nested element `a` is not a "
+                                   "dictionary (is: `<class 'int'>`)"), exc
+
+    def test_convert_many_field_lookups_to_dict_structure(self):
+        records = [
+            {"a__b": 1, "a__c": 2, "d": 3},
+            {"a__b": 4, "a__c": 5, "d": 6},
+        ]
+        assert convert_many_field_lookups_to_dict_structure(records) == [
+            {"a": {"b": 1, "c": 2}, "d": 3},
+            {"a": {"b": 4, "c": 5}, "d": 6},
+        ]
+        assert convert_many_field_lookups_to_dict_structure(records, nested=False) == [
+            {"a": {"b": 1, "c": 2}, "d": 3},
+            {"a": {"b": 4, "c": 5}, "d": 6},
+        ]
+        # list input is handled as batch too
+        assert convert_field_lookups_to_dict_structure(records) == convert_many_field_lookups_to_dict_structure(records)
+
+    def test_convert_dict_structure_keeps_key_order(self):
+        data = {"a": {"b": {"c": 1}, "d": 2}, "e": 3, "f": {"g": 4}}
+        flat = convert_dict_structure_to_field_lookups(data)
+        assert list(flat.items()) == [("a__b__c", 1), ("a__d", 2), ("e", 3), ("f__g", 4)]
+
+    def test_convert_dict_structure_handles_lists_of_scalars(self):
+        flat = convert_dict_structure_to_field_lookups({"a": {"b": [1, 2]}, "c": [{"d": {"e": 1}}, 3]})
+        assert flat == {"a__b": [1, 2], "c": [{"d__e": 1}, 3]}
+
     def test_convert_dict_structure_handles_lists(self):
         data = {
             "a": [
@@ -0,0 +1,122 @@
+import os
+import subprocess
+import sys
+
+from balderhub.unit.scenarios import ScenarioUnit
+
+from balderhub.data.lib.utils import instrumentation
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+from balderhub.data.lib.utils.single_data_item_collection import SingleDataItemCollection
+
+
+class InstrumentedItem(SingleDataItem):
+    name: str
+
+    def get_unique_identification(self):
+        return self.name
+
+
+@instrumentation.instrumented('test.instrumented_function')
+def instrumented_function(value):
+    return value * 2
+
+
+class ScenarioUtilsInstrumentation(ScenarioUnit):
+    """Unit-like tests for the instrumentation module (the tests only check their own operations, because the
+    instrumentation could be enabled for the whole session)"""
+
+    def test_disabled_instrumentation_does_not_record(self):
+        was_enabled = instrumentation.is_enabled()
+        instrumentation.disable()
+        try:
+            assert instrumented_function(3) == 6
+            with instrumentation.measure_operation('test.disabled_block'):
+                pass
+            stats = instrumentation.get_stats()
+            assert 'test.disabled_block' not in stats
+        finally:
+            if was_enabled:
+                instrumentation.enable()
+
+    def test_enabled_instrumentation_records_calls(self):
+        was_enabled = instrumentation.is_enabled()
+        calls_before = instrumentation.get_stats().get('test.instrumented_function', {}).get('calls', 0)
+        instrumentation.enable()
+        try:
+            for cur_value in range(5):
+                assert instrumented_function(cur_value) == cur_value * 2
+            with instrumentation.measure_operation('test.enabled_block'):
+                pass
+        finally:
+            if not was_enabled:
+                instrumentation.disable()
+        stats = instrumentation.get_stats()
+        assert stats['test.instrumented_function']['calls'] == calls_before + 5
+        assert stats['test.enabled_block']['calls'] >= 1
+        for cur_key in ['total', 'mean', 'p50', 'p99', 'max']:
+            assert stats['test.instrumented_function'][cur_key] >= 0
+        assert stats['test.instrumented_function']['p50'] <= stats['test.instrumented_function']['max']
+        report = instrumentation.format_report()
+        assert 'test.instrumented_function' in report
+        assert len(instrumentation.format_report(limit=1).splitlines()) == 3
+
+    def test_instrumented_package_operations(self):
+        was_enabled = instrumentation.is_enabled()
+        stats_before = instrumentation.get_stats()
+        instrumentation.enable()
+        try:
+            InstrumentedItem.get_all_fields_for()
+            collection = SingleDataItemCollection([InstrumentedItem(name='a'), InstrumentedItem(name='b')])
+            assert collection.get_by(name='a').name == 'a'
+            assert len(collection.filter_by(name='b')) == 1
+        finally:
+            if not was_enabled:
+                instrumentation.disable()
+        stats = instrumentation.get_stats()
+        for cur_operation in ['SingleDataItem.get_all_fields_for', 'SingleDataItemCollection.get_by',
+                              'SingleDataItemCollection.filter_by']:
+            assert stats[cur_operation]['calls'] > stats_before.get(cur_operation, {}).get('calls', 0)
+
+    def test_exceptions_are_recorded_and_raised(self):
+        was_enabled = instrumentation.is_enabled()
+        instrumentation.enable()
+
+        @instrumentation.instrumented('test.raising_function')
+        def raising_function():
+            raise ValueError('expected')
+
+        try:
+            raising_function()
+            assert False, 'no exception was raised'
+        except ValueError:
+            pass
+        finally:
+            if not was_enabled:
+                instrumentation.disable()
+        assert instrumentation.get_stats()['test.raising_function']['calls'] >= 1
+
+    def test_disabled_instrumentation_uses_the_original_functions(self):
+        was_enabled = instrumentation.is_enabled()
+        instrumentation.disable()
+        try:
+            assert not hasattr(SingleDataItem.__dict__['get_all_fields_for'].__func__, '__wrapped__')
+            assert not hasattr(SingleDataItemCollection.__dict__['filter_by'], '__wrapped__')
+            assert not hasattr(instrumented_function, '__wrapped__')
+            instrumentation.enable()
+            assert SingleDataItem.__dict__['get_all_fields_for'].__func__.__wrapped__ is not None
+            assert isinstance(SingleDataItem.__dict__['get_all_fields_for'], classmethod)
+            assert SingleDataItemCollection.__dict__['filter_by'].__wrapped__ is not None
+        finally:
+            if not was_enabled:
+                instrumentation.disable()
+
+    def test_enabled_at_import_time(self):
+        code = (
+            "from balderhub.data.lib.utils import instrumentation\n"
+            "from balderhub.data.lib.utils.single_data_item import SingleDataItem\n"
+            "assert hasattr(SingleDataItem.__dict__['get_all_fields_for'].__func__, '__wrapped__')\n"
+            "instrumentation.disable()\n"
+            "assert not hasattr(SingleDataItem.__dict__['get_all_fields_for'].__func__, '__wrapped__')\n"
+        )
+        env = {**os.environ, instrumentation.ENV_VARIABLE: '1'}
+        subprocess.run([sys.executable, '-c', code], check=True, env=env)
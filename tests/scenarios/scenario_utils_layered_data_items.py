@@ -0,0 +1,107 @@
+from balderhub.unit.scenarios import ScenarioUnit
+
+from balderhub.data.lib.utils.layered_data_items import LayeredDataItems
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+
+
+class LayeredColor(SingleDataItem):
+    id: int
+    name: str
+
+    def get_unique_identification(self):
+        return self.id
+
+
+def create_parent():
+    return {idx: LayeredColor(id=idx, name=f'color {idx}') for idx in range(4)}
+
+
+class ScenarioUtilsLayeredDataItems(ScenarioUnit):
+    """Unit-like tests for the LayeredDataItems class."""
+
+    def test_lookups_fall_through(self):
+        parent = create_parent()
+        layer = LayeredDataItems(parent)
+        assert len(layer) == 4
+        assert list(layer) == [0, 1, 2, 3]
+        assert 2 in layer and 4 not in layer
+        assert layer[2] == parent[2]
+        assert layer.loaded_values() == [layer[2]]
+
+    def test_materialized_items_do_not_change_the_parent(self):
+        parent = create_parent()
+        layer = LayeredDataItems(parent)
+        layer[1].name = 'changed'
+        assert layer[1].name == 'changed'
+        assert parent[1].name == 'color 1'
+        assert layer[1].is_dirty()
+
+    def test_additions_overrides_and_deletions(self):
+        parent = create_parent()
+        layer = LayeredDataItems(parent)
+        layer[7] = LayeredColor(id=7, name='color 7')
+        layer[0] = LayeredColor(id=0, name='new color 0')
+        del layer[3]
+        del layer[7]
+        layer[8] = LayeredColor(id=8, name='color 8')
+        assert list(layer) == [0, 1, 2, 8]
+        assert len(layer) == 4
+        assert layer[0].name == 'new color 0'
+        assert 3 not in layer and 7 not in layer
+        assert layer.deleted == {3}
+        assert len(parent) == 4
+        try:
+            del layer[3]
+            assert False, 'KeyError expected'
+        except KeyError:
+            pass
+
+    def test_nested_layers(self):
+        parent = create_parent()
+        middle = LayeredDataItems(parent)
+        del middle[0]
+        top = LayeredDataItems(middle)
+        top[0] = LayeredColor(id=0, name='back again')
+        del top[1]
+        assert list(top) == [2, 3, 0]
+        assert len(top) == 3
+        assert len(middle) == 3
+
+    def test_read_only_access_does_not_materialize_items(self):
+        parent = create_parent()
+        middle = LayeredDataItems(parent)
+        middle[1] = LayeredColor(id=1, name='new color 1')
+        top = LayeredDataItems(middle)
+        del top[2]
+        top[5] = LayeredColor(id=5, name='color 5')
+        assert [(cur_key, cur_item.name) for cur_key, cur_item in top.read_only_items()] == \
+            [(0, 'color 0'), (1, 'new color 1'), (3, 'color 3'), (5, 'color 5')]
+        assert top.peek(0) is parent[0]
+        assert top.peek(1) is middle.peek(1)
+        assert [cur_key for cur_key, _ in top.own_items()] == [5]
+        assert middle.loaded_values() == [middle[1]]
+        try:
+            top.peek(2)
+            assert False, 'KeyError expected'
+        except KeyError:
+            pass
+
+    def test_materializing_does_not_write_into_the_layers_below(self):
+        parent = create_parent()
+        middle = LayeredDataItems(parent)
+        top = LayeredDataItems(middle)
+        top[2].name = 'changed'
+        assert not top.is_own(1) and top.is_own(2)
+        assert middle.loaded_values() == []
+        assert middle.peek(2) is parent[2]
+        assert parent[2].name == 'color 2'
+
+    def test_on_materialize(self):
+        parent = create_parent()
+        layer = LayeredDataItems(parent)
+        materialized = []
+        layer.on_materialize = lambda parent_item, item: materialized.append((parent_item, item))
+        item = layer[3]
+        assert layer[3] is item
+        assert materialized == [(parent[3], item)]
+        assert materialized[0][0] is parent[3]
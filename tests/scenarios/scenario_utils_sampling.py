@@ -0,0 +1,66 @@
+import random
+
+from balderhub.unit.scenarios import ScenarioUnit
+
+from balderhub.data.lib.utils.sampling import iter_random_permutation, reservoir_sample, sample_indices
+
+
+class ScenarioUtilsSampling(ScenarioUnit):
+    """Unit-like tests for the sampling helper functions."""
+
+    def test_iter_random_permutation(self):
+        for cur_count in [0, 1, 2, 10, 100]:
+            permutation = list(iter_random_permutation(cur_count, random.Random(cur_count)))
+            assert sorted(permutation) == list(range(cur_count))
+
+    def test_iter_random_permutation_is_reproducible(self):
+        assert list(iter_random_permutation(50, random.Random(3))) == \
+            list(iter_random_permutation(50, random.Random(3)))
+
+    def test_sample_indices(self):
+        sampled = sample_indices(100, 10, random.Random(1))
+        assert len(sampled) == 10
+        assert len(set(sampled)) == 10
+        assert sample_indices(5, 10, random.Random(1), predicate=lambda idx: True) != []
+        assert sorted(sample_indices(5, 10, random.Random(1))) == [0, 1, 2, 3, 4]
+
+    def test_sample_indices_with_predicate_stops_early(self):
+        checked = []
+
+        def predicate(idx):
+            checked.append(idx)
+            return idx % 2 == 0
+
+        sampled = sample_indices(1000, 5, random.Random(2), predicate=predicate)
+        assert len(sampled) == 5
+        assert all(idx % 2 == 0 for idx in sampled)
+        assert len(checked) < 1000
+        assert sample_indices(10, 0, random.Random(2), predicate=predicate) == []
+
+    def test_sample_indices_with_rare_matches(self):
+        sampled = sample_indices(100, 5, random.Random(4), predicate=lambda idx: idx in (3, 50))
+        assert sorted(sampled) == [3, 50]
+
+    def test_sample_indices_raises_for_negative_size(self):
+        try:
+            sample_indices(10, -1, random.Random())
+            assert False, "ValueError should be raised"
+        except ValueError:
+            pass
+
+    def test_reservoir_sample(self):
+        sampled = reservoir_sample((idx for idx in range(10000)), 20, random.Random(5))
+        assert len(sampled) == 20
+        assert len(set(sampled)) == 20
+        assert all(0 <= value < 10000 for value in sampled)
+        assert sorted(reservoir_sample(iter(range(3)), 5, random.Random(5))) == [0, 1, 2]
+        assert reservoir_sample(iter(range(3)), 0, random.Random(5)) == []
+
+    def test_reservoir_sample_is_uniform(self):
+        counts = [0] * 10
+        rng = random.Random(6)
+        for _ in range(5000):
+            for cur_value in reservoir_sample(iter(range(10)), 3, rng):
+                counts[cur_value] += 1
+        # every element is expected 1500 times
+        assert all(1300 < cur_count < 1700 for cur_count in counts), counts
@@ -0,0 +1,81 @@
+from balderhub.unit.scenarios import ScenarioUnit
+
+from balderhub.data.lib.utils.shared_data_store import SharedDataStore
+from balderhub.data.lib.utils.single_data_item import SingleDataItem
+
+
+class SharedCity(SingleDataItem):
+    id: int
+    name: str
+
+    def get_unique_identification(self):
+        return self.id
+
+
+class SharedPerson(SingleDataItem):
+    id: str
+    city: SharedCity
+    nicknames: list[str]
+
+    def get_unique_identification(self):
+        return self.id
+
+
+def create_data():
+    cities = {idx: SharedCity(id=idx, name=f'city {idx}') for idx in range(3)}
+    persons = {f'p{idx}': SharedPerson(id=f'p{idx}', city=cities[idx % 3].snapshot(), nicknames=[f'nick {idx}'])
+               for idx in range(10)}
+    return {SharedCity: cities, SharedPerson: persons}
+
+
+class ScenarioUtilsSharedDataStore(ScenarioUnit):
+    """Unit-like tests for the SharedDataStore class."""
+
+    def test_publish_and_attach(self):
+        data = create_data()
+        store = SharedDataStore.publish(data)
+        try:
+            attached = SharedDataStore.attach(store.name)
+            assert attached.data_item_types == [SharedCity, SharedPerson]
+            persons = attached.get_items(SharedPerson)
+            assert len(persons) == 10
+            assert 'p4' in persons and 'p10' not in persons
+            assert persons.loaded_values() == []
+            assert persons['p4'] == data[SharedPerson]['p4']
+            assert persons['p4'] is persons['p4']
+            assert len(persons.loaded_values()) == 1
+            assert list(attached.get_items(SharedCity).values()) == list(data[SharedCity].values())
+            attached.close()
+        finally:
+            store.unlink()
+
+    def test_attached_store_is_read_only(self):
+        store = SharedDataStore.publish(create_data())
+        try:
+            attached = SharedDataStore.attach(store.name)
+            try:
+                attached.get_items(SharedCity)[5] = SharedCity(id=5, name='new')
+                assert False, 'TypeError expected'
+            except TypeError:
+                pass
+            try:
+                attached.unlink()
+                assert False, 'PermissionError expected'
+            except PermissionError:
+                pass
+        finally:
+            store.unlink()
+
+    def test_attach_checks_the_owner(self):
+        store = SharedDataStore.publish(create_data(), owner='tests.OwnerEnvironment')
+        try:
+            attached = SharedDataStore.attach(store.name, owner='tests.OwnerEnvironment')
+            assert attached.owner == 'tests.OwnerEnvironment'
+            attached.close()
+            try:
+                SharedDataStore.attach(store.name, owner='tests.OtherEnvironment')
+                assert False, 'ValueError expected'
+            except ValueError:
+                pass
+        finally:
+            store.unlink()
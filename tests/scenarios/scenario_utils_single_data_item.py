@@ -1,12 +1,16 @@
 from typing import Optional, Union
+import copy
+import pickle
+import threading
 
 import pydantic
 from balderhub.unit.scenarios import ScenarioUnit
 
+from balderhub.data.lib.utils.batch_update import get_active_batch_updates
 from balderhub.data.lib.utils.single_data_item import SingleDataItem
 from balderhub.data.lib.utils.not_definable import NOT_DEFINABLE
 from balderhub.data.lib.utils.lookup_field_string import LookupFieldString
-from balderhub.data.lib.utils.exceptions import MisconfiguredDataItemError
+from balderhub.data.lib.utils.exceptions import MisconfiguredDataItemError, MissingDataItemFieldsError
 
 
 # Test data item classes for testing purposes
@@ -66,6 +70,32 @@ class ScenarioUtilsSingleDataItem(ScenarioUnit):
         assert item.simple.name == "test"
         assert item.simple.value == 99
 
+    def test_create_as_nested_with_same_keys_in_different_order(self):
+        item1 = NestedDataItem.create_as_nested(id=1, simple__name="a", simple__value=1)
+        item2 = NestedDataItem.create_as_nested(simple__value=2, id=2, simple__name="b")
+        assert item1.simple == SimpleDataItem(name="a", value=1)
+        assert item2.simple == SimpleDataItem(name="b", value=2)
+
+    def test_create_as_nested_with_nested_dict_and_lookup_for_same_field(self):
+        item = NestedDataItem.create_as_nested(id=1, simple={"name": "a"}, simple__value=1)
+        assert item.simple == SimpleDataItem(name="a", value=1)
+
+    def test_create_many_as_nested(self):
+        items = ComplexDataItem.create_many_as_nested([
+            {"title": f"t{idx}", "count": idx, "optional_field": None, "nested__id": idx,
+             "nested__simple__name": f"n{idx}", "nested__simple__value": idx}
+            for idx in range(3)
+        ])
+        assert [item.title for item in items] == ["t0", "t1", "t2"]
+        assert items[2].nested.simple == SimpleDataItem(name="n2", value=2)
+
+    def test_create_many_as_nested_validates(self):
+        try:
+            SimpleDataItem.create_many_as_nested([{"name": "a", "value": 1}, {"name": "b", "value": "invalid"}])
+            assert False, "ValidationError expected"
+        except pydantic.ValidationError:
+            pass
+
     def test_create_non_definable_nested_true(self):
         item = SimpleDataItem.create_non_definable(nested=True)
         assert item.name == NOT_DEFINABLE
@@ -84,6 +114,68 @@ class ScenarioUtilsSingleDataItem(ScenarioUnit):
         # Nested field should be NOT_DEFINABLE, not a nested non-definable object
         assert item.simple == NOT_DEFINABLE
 
+    def test_create_non_definable_returns_independent_items(self):
+        item1 = NestedDataItem.create_non_definable(nested=True)
+        item2 = NestedDataItem.create_non_definable(nested=True)
+        assert item1 == item2
+        assert item1 is not item2
+        assert item1.simple is not item2.simple
+
+        item1.id = 1
+        item1.simple.name = "changed"
+        assert item2.id == NOT_DEFINABLE
+        assert item2.simple.name == NOT_DEFINABLE
+        assert NestedDataItem.create_non_definable(nested=True).simple.name == NOT_DEFINABLE
+
+    def test_create_trusted_with_lookup_fields(self):
+        item = NestedDataItem.create_trusted(id=1, simple__name="test", simple__value=99)
+        assert isinstance(item.simple, SimpleDataItem)
+        assert item == NestedDataItem.create_as_nested(id=1, simple__name="test", simple__value=99)
+
+    def test_create_trusted_with_nested_dicts_and_lists(self):
+        item = ListDataItem.create_trusted(items=[1, 2], nested_items=[{"name": "a", "value": 1}, NOT_DEFINABLE])
+        assert item.items == [1, 2]
+        assert isinstance(item.nested_items[0], SimpleDataItem)
+        assert item.nested_items[0].name == "a"
+        assert item.nested_items[1] == NOT_DEFINABLE
+
+    def test_create_trusted_keeps_not_definable_and_none(self):
+        item = OptionalNestedSingleRef.create_trusted(name=NOT_DEFINABLE, optional_single_data_item=None)
+        assert item.name == NOT_DEFINABLE
+        assert item.optional_single_data_item is None
+
+    def test_create_trusted_skips_validation(self):
+        item = SimpleDataItem.create_trusted(name="test", value="not_an_int")
+        assert item.value == "not_an_int"
+
+    def test_create_trusted_raises_for_missing_required_fields(self):
+        try:
+            SimpleDataItem.create_trusted(name="test")
+            assert False, "MissingDataItemFieldsError should be raised"
+        except MissingDataItemFieldsError as exc:
+            assert "value" in str(exc)
+        try:
+            NestedDataItem.create_trusted(id=1, simple__name="test")
+            assert False, "MissingDataItemFieldsError should be raised for the nested item"
+        except MissingDataItemFieldsError as exc:
+            assert "SimpleDataItem" in str(exc)
+
+    def test_create_many_trusted(self):
+        items = NestedDataItem.create_many_trusted([
+            {"id": 1, "simple": {"name": "a", "value": 1}},
+            {"id": 2, "simple__name": "b", "simple__value": 2},
+        ])
+        assert [item.id for item in items] == [1, 2]
+        assert items[1].simple == SimpleDataItem.create_as_nested(name="b", value=2)
+
+    def test_get_nested_data_item_fields(self):
+        assert NestedDataItem.get_nested_data_item_fields() == {"simple": (SimpleDataItem, False)}
+        assert ListDataItem.get_nested_data_item_fields() == {"nested_items": (SimpleDataItem, True)}
+        assert OptionalNestedSingleRef.get_nested_data_item_fields() == {
+            "optional_single_data_item": (SimpleDataItem, False)
+        }
+        assert SimpleDataItem.get_nested_data_item_fields() == {}
+
     def test_get_field_simple(self):
         field_info = SimpleDataItem.get_field("name")
         assert field_info is not None
@@ -269,6 +361,244 @@ class ScenarioUtilsSingleDataItem(ScenarioUnit):
         # Other fields should remain unchanged
         assert item.simple.name == "test"
 
+    def test_batch_update_defers_validation(self):
+        item = SimpleDataItem.create_as_nested(name="old", value=1)
+        with item.batch_update() as updated_item:
+            assert updated_item is item
+            item.value = "temporary"
+            assert item.value == "temporary"
+            item.value = 2
+            item.set_field_value("name", "new")
+        assert item == SimpleDataItem.create_as_nested(name="new", value=2)
+
+    def test_batch_update_with_nested_set_field_value(self):
+        item = NestedDataItem.create_as_nested(id=1, simple__name="test", simple__value=42)
+        with item.batch_update():
+            item.set_field_value("simple__name", "changed")
+            item.set_field_value("simple__value", 3, only_change_this_value=True)
+        assert item.simple == SimpleDataItem.create_as_nested(name="changed", value=3)
+
+    def test_batch_update_converts_nested_dicts_on_exit(self):
+        item = NestedDataItem.create_as_nested(id=1, simple__name="test", simple__value=42)
+        with item.batch_update():
+            item.simple = {"name": "other", "value": 1}
+        assert isinstance(item.simple, SimpleDataItem)
+        assert item.simple.name == "other"
+
+    def test_batch_update_invalid_state_is_rolled_back(self):
+        item = NestedDataItem.create_as_nested(id=1, simple__name="test", simple__value=42)
+        try:
+            with item.batch_update():
+                item.id = 2
+                item.set_field_value("simple__value", "invalid", only_change_this_value=True)
+            assert False, "ValidationError expected"
+        except pydantic.ValidationError:
+            pass
+        assert item == NestedDataItem.create_as_nested(id=1, simple__name="test", simple__value=42)
+
+    def test_batch_update_exception_within_block_is_rolled_back(self):
+        item = SimpleDataItem.create_as_nested(name="old", value=1)
+        try:
+            with item.batch_update():
+                item.name = "new"
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        assert item.name == "old"
+
+    def test_batch_update_nested_blocks_validate_on_outer_exit(self):
+        item = SimpleDataItem.create_as_nested(name="old", value=1)
+        with item.batch_update():
+            with item.batch_update():
+                item.value = "temporary"
+            # still deferred
+            item.value = 5
+        assert item.value == 5
+        try:
+            item.value = "invalid"
+            assert False, "ValidationError expected after leaving the block"
+        except pydantic.ValidationError:
+            pass
+
+    def test_batch_update_is_bound_to_its_thread(self):
+        item = SimpleDataItem.create_as_nested(name="old", value=1)
+        errors = []
+
+        def write_from_other_thread():
+            try:
+                item.value = "invalid"
+            except pydantic.ValidationError as exc:
+                errors.append(exc)
+            item.name = "other thread"
+
+        with item.batch_update():
+            item.value = "temporary"
+            thread = threading.Thread(target=write_from_other_thread)
+            thread.start()
+            thread.join()
+            item.value = 2
+        # the write of the other thread was validated and is not rolled back with the block
+        assert len(errors) == 1
+        assert item.name == "other thread"
+        assert item.value == 2
+
+    def test_batch_update_blocks_are_closed_after_exceptions(self):
+        item = SimpleDataItem.create_as_nested(name="old", value=1)
+        try:
+            with item.batch_update():
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        assert get_active_batch_updates() == {}
+        try:
+            item.value = "invalid"
+            assert False, "ValidationError expected outside of the block"
+        except pydantic.ValidationError:
+            pass
+
+    def test_snapshot_shares_nested_values(self):
+        item = ComplexDataItem.create_as_nested(
+            title="t", count=1, optional_field=None, nested__id=1, nested__simple__name="n", nested__simple__value=2)
+        snapshot = item.snapshot()
+        assert snapshot == item
+        assert snapshot is not item
+        assert snapshot.nested is item.nested
+
+    def test_snapshot_copy_on_write_with_set_field_value(self):
+        item = ComplexDataItem.create_as_nested(
+            title="t", count=1, optional_field=None, nested__id=1, nested__simple__name="n", nested__simple__value=2)
+        snapshot = item.snapshot()
+        snapshot.set_field_value("nested__simple__name", "changed", only_change_this_value=True)
+        assert snapshot.nested.simple.name == "changed"
+        assert snapshot.nested.id == 1
+        assert item.nested.simple.name == "n"
+        # the other side is protected too
+        item.set_field_value("nested__id", 5, only_change_this_value=True)
+        assert item.nested.id == 5
+        assert snapshot.nested.id == 1
+        # replacing values never affects the other item
+        snapshot.title = "other"
+        assert item.title == "t"
+
+    def test_snapshot_get_mutable_list(self):
+        item = ListDataItem.create_as_nested(items=[1, 2], nested_items=[SimpleDataItem(name="a", value=1)])
+        snapshot = item.snapshot()
+        assert snapshot.items is item.items
+        snapshot.get_mutable("items").append(3)
+        snapshot.get_mutable("nested_items")[0].value = 10
+        assert snapshot.items == [1, 2, 3]
+        assert snapshot.nested_items[0].value == 10
+        assert item.items == [1, 2]
+        assert item.nested_items[0].value == 1
+        # once unshared, the value is returned directly
+        assert snapshot.get_mutable("items") is snapshot.items
+
+    def test_snapshot_get_mutable_nested_lookup(self):
+        item = ComplexDataItem.create_as_nested(
+            title="t", count=1, optional_field=None, nested__id=1, nested__simple__name="n", nested__simple__value=2)
+        snapshot = item.snapshot()
+        snapshot.get_mutable("nested__simple").name = "changed"
+        assert item.nested.simple.name == "n"
+        assert snapshot.get_mutable("title") == "t"
+        try:
+            snapshot.get_mutable("nested__unknown")
+            assert False, "KeyError expected"
+        except KeyError:
+            pass
+
+    def test_snapshot_batch_rollback_keeps_sharing(self):
+        item = ComplexDataItem.create_as_nested(
+            title="t", count=1, optional_field=None, nested__id=1, nested__simple__name="n", nested__simple__value=2)
+        snapshot = item.snapshot()
+        try:
+            with snapshot.batch_update():
+                snapshot.set_field_value("nested__id", "invalid", only_change_this_value=True)
+            assert False, "ValidationError expected"
+        except pydantic.ValidationError:
+            pass
+        assert snapshot.nested is item.nested
+        snapshot.set_field_value("nested__id", 7, only_change_this_value=True)
+        assert item.nested.id == 1
+        assert snapshot.nested.id == 7
+
+    def test_dirty_tracking_direct_and_nested_fields(self):
+        item = ComplexDataItem.create_as_nested(
+            title="t", count=1, optional_field=None, nested__id=1, nested__simple__name="n", nested__simple__value=2)
+        item.clear_dirty()
+        assert not item.is_dirty()
+        assert item.get_dirty_fields() == set()
+        item.count = 2
+        item.nested.simple.name = "changed"
+        assert item.is_dirty()
+        assert item.get_dirty_fields() == {"count", "nested__simple__name"}
+        item.clear_dirty()
+        assert item.get_dirty_fields() == set()
+        assert not item.nested.simple.is_dirty()
+
+    def test_dirty_tracking_set_field_value(self):
+        item = ComplexDataItem.create_as_nested(
+            title="t", count=1, optional_field=None, nested__id=1, nested__simple__name="n", nested__simple__value=2)
+        item.clear_dirty()
+        item.set_field_value("nested__simple__value", 5, only_change_this_value=True)
+        assert item.get_dirty_fields() == {"nested__simple__value"}
+        item.clear_dirty()
+        # without `only_change_this_value` the nested items are replaced
+        item.set_field_value("nested__id", 3)
+        assert item.get_dirty_fields() == {"nested"}
+
+    def test_dirty_tracking_list_fields(self):
+        item = ListDataItem.create_as_nested(items=[1, 2], nested_items=[SimpleDataItem(name="a", value=1)])
+        item.clear_dirty()
+        item.items.append(3)
+        assert item.get_dirty_fields() == {"items"}
+        item.clear_dirty()
+        item.nested_items[0].value = 10
+        assert item.get_dirty_fields() == {"nested_items"}
+        item.clear_dirty()
+        # copies of unchanged elements (f.e. by a snapshot) are not reported
+        snapshot = item.snapshot()
+        snapshot.get_mutable("nested_items")
+        assert not snapshot.is_dirty()
+
+    def test_dirty_tracking_list_fields_without_clear_dirty(self):
+        item = ListDataItem.create_as_nested(items=[1, 2], nested_items=[])
+        assert not item.is_dirty()
+        # the elements are remembered when the list is requested for in-place changes
+        item.get_mutable("items").append(3)
+        assert item.get_dirty_fields() == {"items"}
+
+    def test_dirty_tracking_of_copies(self):
+        item = SimpleDataItem.create_as_nested(name="old", value=1)
+        item.name = "new"
+        for cur_copy in [copy.copy(item), copy.deepcopy(item), pickle.loads(pickle.dumps(item))]:
+            assert not cur_copy.is_dirty()
+            cur_copy.value = 2
+            assert cur_copy.get_dirty_fields() == {"value"}
+        assert item.get_dirty_fields() == {"name"}
+
+    def test_dirty_tracking_batch_update(self):
+        item = SimpleDataItem.create_as_nested(name="old", value=1)
+        item.clear_dirty()
+        with item.batch_update():
+            item.name = "new"
+        assert item.get_dirty_fields() == {"name"}
+        item.clear_dirty()
+        try:
+            with item.batch_update():
+                item.value = "invalid"
+        except pydantic.ValidationError:
+            pass
+        assert not item.is_dirty()
+
+    def test_dirty_tracking_is_taken_over_by_snapshot(self):
+        item = SimpleDataItem.create_as_nested(name="old", value=1)
+        item.clear_dirty()
+        item.name = "new"
+        snapshot = item.snapshot()
+        assert snapshot.get_dirty_fields() == {"name"}
+        snapshot.clear_dirty()
+        assert item.get_dirty_fields() == {"name"}
+
     def test_all_fields_are_not_definable_true(self):
         item = SimpleDataItem.create_non_definable(nested=True)
         assert item.all_fields_are_not_definable() is True
@@ -1,5 +1,6 @@
 from typing import Optional
 
+import pydantic
 from balderhub.unit.scenarios import ScenarioUnit
 
 from balderhub.data.lib.utils.single_data_item import SingleDataItem
@@ -258,6 +259,71 @@ class ScenarioUtilsSingleDataItemCollection(ScenarioUnit):
         result = collection.get_random()
         assert result in [item1, item2]
 
+    def test_sample(self):
+        collection = SingleDataItemCollection([
+            SimpleItem.create_as_nested(name=f"test{idx}", value=idx % 4) for idx in range(40)
+        ])
+        sampled = collection.sample(5, seed=1)
+        assert len(sampled) == 5
+        assert sampled.has_unique_elements()
+        assert sampled.get_all_unique_identifier() == collection.sample(5, seed=1).get_all_unique_identifier()
+        assert len(collection.sample(100)) == 40
+
+    def test_sample_with_filter(self):
+        collection = SingleDataItemCollection([
+            SimpleItem.create_as_nested(name=f"test{idx}", value=idx % 4) for idx in range(40)
+        ])
+
+        class ValueFilter(Filter):
+            def apply(self, item: SimpleItem) -> bool:
+                return item.value == 2
+
+        sampled = collection.sample(3, filter_obj=ValueFilter(), seed=2)
+        assert len(sampled) == 3
+        assert all(item.value == 2 for item in sampled)
+        assert len(collection.sample(20, filter_obj=ValueFilter())) == 10
+
+    def test_sample_stratified(self):
+        collection = SingleDataItemCollection([
+            SimpleItem.create_as_nested(name=f"test{idx}", value=idx % 3) for idx in range(30)
+        ])
+        sampled = collection.sample_stratified('value', 2, seed=3)
+        assert [item.value for item in sampled] == [0, 0, 1, 1, 2, 2]
+        assert sampled.has_unique_elements()
+        assert sampled.get_all_unique_identifier() == \
+            collection.sample_stratified('value', 2, seed=3).get_all_unique_identifier()
+        # values with less items are returned completely
+        collection.append(SimpleItem.create_as_nested(name="rare", value=7))
+        assert [item.name for item in collection.sample_stratified('value', 2) if item.value == 7] == ["rare"]
+
+    def test_sample_iterable(self):
+        def stream_items():
+            for idx in range(40):
+                yield SimpleItem.create_as_nested(name=f"test{idx}", value=idx % 4)
+
+        class ValueFilter(Filter):
+            def apply(self, item: SimpleItem) -> bool:
+                return item.value == 2
+
+        sampled = SingleDataItemCollection.sample_iterable(stream_items(), 5, seed=5)
+        assert len(sampled) == 5
+        assert sampled.has_unique_elements()
+        assert sampled.get_all_unique_identifier() == \
+            SingleDataItemCollection.sample_iterable(stream_items(), 5, seed=5).get_all_unique_identifier()
+        filtered = SingleDataItemCollection.sample_iterable(stream_items(), 3, filter_obj=ValueFilter(), seed=6)
+        assert len(filtered) == 3
+        assert all(item.value == 2 for item in filtered)
+        assert len(SingleDataItemCollection.sample_iterable(stream_items(), 20, filter_obj=ValueFilter())) == 10
+
+    def test_sample_hands_out_own_items(self):
+        collection = SingleDataItemCollection([
+            SimpleItem.create_as_nested(name=f"test{idx}", value=idx) for idx in range(10)
+        ])
+        copied = collection.snapshot()
+        sampled = copied.sample(3, seed=4)
+        sampled[0].value = 100
+        assert all(item.value != 100 for item in collection)
+
     def test_append(self):
         item1 = SimpleItem.create_as_nested(name="test1", value=1)
         item2 = SimpleItem.create_as_nested(name="test2", value=2)
@@ -275,6 +341,88 @@ class ScenarioUtilsSingleDataItemCollection(ScenarioUnit):
         assert len(collection) == 1
         assert collection[0] == item2
 
+    def _create_value_collection(self):
+        return SingleDataItemCollection([
+            SimpleItem.create_as_nested(name=f"test{idx}", value=value) for idx, value in enumerate([5, 1, 4, 1, 3])
+        ])
+
+    def test_filter_range(self):
+        collection = self._create_value_collection()
+        assert [item.value for item in collection.filter_range('value', gte=3)] == [5, 4, 3]
+        assert [item.value for item in collection.filter_range('value', gt=1, lt=5)] == [4, 3]
+        assert [item.value for item in collection.filter_between('value', 1, 3)] == [1, 1, 3]
+        assert len(collection.filter_range('value', gt=5)) == 0
+
+    def test_filter_range_raises_with_both_lower_limits(self):
+        collection = self._create_value_collection()
+        try:
+            collection.filter_range('value', gt=1, gte=1)
+            assert False, "ValueError should be raised"
+        except ValueError:
+            pass
+
+    def test_filter_range_ignores_missing_values(self):
+        collection = SingleDataItemCollection([
+            OptionalItem.create_as_nested(name="a", optional_field="x"),
+            OptionalItem.create_as_nested(name="b", optional_field=None),
+            OptionalItem.create_as_nested(name="c", optional_field="z"),
+        ])
+        assert [item.name for item in collection.filter_range('optional_field', lte="y")] == ["a"]
+
+    def test_filter_range_raises_for_incomparable_limits(self):
+        indexed_collection = self._create_value_collection()
+        indexed_collection.add_index('value', ordered=True)
+        for cur_collection in [self._create_value_collection(), indexed_collection]:
+            try:
+                cur_collection.filter_range('value', gte="3")
+                assert False, 'TypeError expected'
+            except TypeError:
+                pass
+            try:
+                cur_collection.filter_between('value', 1, "3")
+                assert False, 'TypeError expected'
+            except TypeError:
+                pass
+
+    def test_order_by(self):
+        collection = self._create_value_collection()
+        assert [item.name for item in collection.order_by('value')] == ["test1", "test3", "test4", "test2", "test0"]
+        assert [item.name for item in collection.order_by('value', reverse=True)] == \
+            ["test0", "test2", "test4", "test1", "test3"]
+
+    def test_get_largest_and_smallest(self):
+        collection = self._create_value_collection()
+        assert [item.value for item in collection.get_largest('value', 2)] == [5, 4]
+        assert [item.name for item in collection.get_smallest('value', 3)] == ["test1", "test3", "test4"]
+        assert len(collection.get_largest('value', 10)) == 5
+
+    def test_sorted_index_gives_same_results(self):
+        collection = self._create_value_collection()
+        expected = (
+            [item.name for item in collection.order_by('value', reverse=True)],
+            [item.name for item in collection.get_largest('value', 3)],
+            [item.name for item in collection.get_smallest('value', 10)],
+        )
+        collection.add_index('value', ordered=True)
+        # the sorted index returns the range ordered by the value
+        assert [item.name for item in collection.filter_between('value', 1, 4)] == ["test1", "test3", "test4", "test2"]
+        assert [item.name for item in collection.order_by('value', reverse=True)] == expected[0]
+        assert [item.name for item in collection.get_largest('value', 3)] == expected[1]
+        assert [item.name for item in collection.get_smallest('value', 10)] == expected[2]
+
+    def test_own_indexes_are_maintained(self):
+        collection = self._create_value_collection()
+        collection.add_index('value', ordered=True)
+        collection.add_index('name')
+        assert collection.get_by(name="test2").value == 4
+        collection.append(SimpleItem.create_as_nested(name="test5", value=2))
+        collection.remove(collection.get_by(name="test0"))
+        assert [item.value for item in collection.get_largest('value', 2)] == [4, 3]
+        assert collection.get_by(name="test5").value == 2
+        assert len(collection.filter_by(name="test0")) == 0
+        collection[0].value = 10
+        assert [item.name for item in collection.get_largest('value', 1)] == ["test1"]
+
     def test_get_difference_error_messages_empty_collections(self):
         collection1 = SingleDataItemCollection()
         collection2 = SingleDataItemCollection()
@@ -416,3 +564,71 @@ class ScenarioUtilsSingleDataItemCollection(ScenarioUnit):
         collection1 = SingleDataItemCollection([item1])
         collection2 = SingleDataItemCollection([item2])
         assert collection1.compare(collection2, allow_non_definable=True)
+
+    def test_batch_update(self):
+        item1 = SimpleItem.create_as_nested(name="test1", value=1)
+        item2 = SimpleItem.create_as_nested(name="test2", value=2)
+        collection = SingleDataItemCollection([item1, item2])
+        with collection.batch_update() as updated_collection:
+            assert updated_collection is collection
+            for item in collection:
+                old_value = item.value
+                item.value = "temporary"
+                item.set_field_value("value", old_value * 10)
+        assert collection.get_all_unique_identifier() == ["test1_10", "test2_20"]
+
+    def test_batch_update_rolls_back_all_items(self):
+        item1 = SimpleItem.create_as_nested(name="test1", value=1)
+        item2 = SimpleItem.create_as_nested(name="test2", value=2)
+        collection = SingleDataItemCollection([item1, item2])
+        try:
+            with collection.batch_update():
+                item1.value = 10
+                item2.value = "invalid"
+            assert False, "ValidationError expected"
+        except pydantic.ValidationError:
+            pass
+        assert item1.value == 1
+        assert item2.value == 2
+
+    def test_snapshot_shares_items_until_handed_out(self):
+        items = [NestedItem.create_as_nested(id=idx, simple__name=f"n{idx}", simple__value=idx) for idx in range(3)]
+        collection = SingleDataItemCollection(items)
+        snapshot = collection.snapshot()
+        assert len(snapshot) == 3
+        assert snapshot.compare(collection)
+        assert snapshot._items[0] is items[0]
+        handed_out = snapshot[0]
+        assert handed_out is not items[0]
+        assert snapshot[0] is handed_out
+        handed_out.set_field_value("simple__value", 100, only_change_this_value=True)
+        assert items[0].simple.value == 0
+        assert not snapshot.compare(collection)
+
+    def test_snapshot_protects_both_sides(self):
+        items = [NestedItem.create_as_nested(id=idx, simple__name=f"n{idx}", simple__value=idx) for idx in range(3)]
+        collection = SingleDataItemCollection(items)
+        snapshot = collection.snapshot()
+        collection.get_by(id=1).id = 10
+        assert snapshot.get_by_identifier(1).id == 1
+        assert collection.get_by_identifier(10).id == 10
+        # changes on derived collections are kept in the collection they are derived from
+        snapshot.filter_by(id=2)[0].simple = SimpleItem(name="new", value=5)
+        assert snapshot.get_by(id=2).simple.name == "new"
+        assert collection.get_by(id=2).simple.name == "n2"
+        for cur_item in snapshot:
+            cur_item.set_field_value("simple__name", "all", only_change_this_value=True)
+        assert collection.get_all_unique_identifier() == [0, 10, 2]
+        assert [cur_item.simple.name for cur_item in collection] == ["n0", "n1", "n2"]
+
+    def test_get_dirty_items_and_clear_dirty(self):
+        items = [SimpleItem.create_as_nested(name=f"n{idx}", value=idx) for idx in range(3)]
+        collection = SingleDataItemCollection(items)
+        collection.clear_dirty()
+        assert len(collection.get_dirty_items()) == 0
+        items[1].value = 10
+        dirty_items = collection.get_dirty_items()
+        assert len(dirty_items) == 1
+        assert dirty_items[0] is items[1]
+        collection.clear_dirty()
+        assert not items[1].is_dirty()
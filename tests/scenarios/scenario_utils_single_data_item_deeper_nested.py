@@ -66,3 +66,10 @@ class ScenarioUtilsSingleDataItem(ScenarioUnit):
         assert item.name == NOT_DEFINABLE
         # the nested top-level field should be a NOT_DEFINABLE marker, not an instance
         assert item.lvl1 == NOT_DEFINABLE
+
+    def test_create_non_definable_nested_true_deep_returns_independent_items(self):
+        item1 = RootDeepNestedDataItem.create_non_definable(nested=True)
+        item2 = RootDeepNestedDataItem.create_non_definable(nested=True)
+        item1.lvl1.lvl2.lvl3.a = 1
+        assert item1.lvl1.lvl2.lvl3 is not item2.lvl1.lvl2.lvl3
+        assert item2.lvl1.lvl2.lvl3.a == NOT_DEFINABLE